@@ -0,0 +1,111 @@
+import time
+from collections import Counter
+
+import config
+from app.metrics import METRICS
+from vision.card_detector import CardPrediction
+
+
+# Prediction for card slots the empty-slot gate found to be bare felt
+EMPTY_SLOT = CardPrediction(label="NO_CARD", rank_conf=0.0, suit_conf=0.0, card_conf=0.0)
+
+
+def analyze_tables(frame, tables, player_detector, card_clf, card_cache, skip_empty=config.CARD_EMPTY_GATE,
+                   table_ids=None):
+    """
+    Run player detection and card classification for every table in the frame.
+
+    Args:
+        skip_empty: Answer card slots that show bare felt with NO_CARD directly
+                    instead of classifying them (PlayerDetector.empty_card_slots)
+        table_ids: Table numbers for the per-table metrics and card cache keys
+                   (default: position in tables)
+
+    Returns:
+        List of per-table dicts: {"table", "players", "cards"}, where "cards" is a
+        list of (roi_name, roi_xyxy, card_info) and card_info holds label/confidences
+        and whether the slot was gated as empty ("empty_slot").
+    """
+    analysis = []
+
+    # Card crops that missed the cache, classified together after the loop
+    card_crops = []
+    card_misses = []
+
+    # ROI geometry compiled once per table box, shared with the player detector
+    present = [(table_ids[table_idx] if table_ids is not None else table_idx, table,
+                player_detector.layouts.get(table, frame.shape))
+               for table_idx, table in enumerate(tables)
+               if table is not None and table.w > 0 and table.h > 0]
+
+    # Seats of every table scored, then exclusion groups + NMS in one batched pass (timed per table inside)
+    players_per_table = player_detector.detect_tables(frame, [layout for _, _, layout in present],
+                                                      table_ids=[table_id for table_id, _, _ in present])
+
+    for (table_id, table, layout), players in zip(present, players_per_table):
+        table_result = {"table": table, "players": players, "cards": []}
+        analysis.append(table_result)
+
+        # Collect card crops from player and community card ROIs fully inside the frame
+        for roi_name, (x1, y1, x2, y2) in layout.card_rois:
+            card_region = frame[y1:y2, x1:x2]
+
+            if card_region.size > 0:
+                # Reuse the last prediction while the ROI pixels are unchanged
+                cache_key = (table_id, roi_name)
+                fingerprint = card_cache.fingerprint(card_region)
+                cached = card_cache.get(cache_key, card_region, fingerprint)
+                card = [roi_name, (x1, y1, x2, y2), cached]
+                if cached is None:
+                    card_misses.append((card, cache_key, card_region, fingerprint))
+                    card_crops.append(card_region)
+                table_result["cards"].append(card)
+
+    # Empty slots (e.g. the whole board preflop) never reach the classifier
+    if skip_empty and card_crops:
+        with METRICS.timer("empty_gate"):
+            empty = player_detector.empty_card_slots(card_crops).tolist()
+    else:
+        empty = [False] * len(card_crops)
+
+    # Classify every other uncached card crop of every table in one forward pass
+    to_classify = [crop for crop, e in zip(card_crops, empty) if not e]
+    if to_classify:
+        t0 = time.perf_counter()
+        predictions = iter(card_clf.predict_corners(to_classify))
+        classify_s = time.perf_counter() - t0
+        METRICS.observe("card_classify", classify_s)
+        METRICS.inc("card_crops_classified", len(to_classify))
+        # One forward pass serves every table; each table is charged its share of the crops
+        crops_per_table = Counter(cache_key[0] for (_, cache_key, _, _), e in zip(card_misses, empty) if not e)
+        for table_id, n in crops_per_table.items():
+            METRICS.observe("card_classify", classify_s * n / len(to_classify), table=table_id)
+    else:
+        predictions = iter(())
+
+    for (card, cache_key, card_region, fingerprint), is_empty in zip(card_misses, empty):
+        prediction = EMPTY_SLOT if is_empty else next(predictions)
+        card_cache.put(cache_key, card_region, fingerprint, prediction)
+        card[2] = prediction
+
+    for table_result in analysis:
+        for card in table_result["cards"]:
+            prediction = card[2]
+
+            # Apply confidence threshold
+            if prediction.card_conf < config.CARD_CONF_THRES:
+                label = "NO_CARD"
+                card_conf = prediction.card_conf
+            else:
+                label = prediction.label
+                card_conf = prediction.card_conf
+
+            card[2] = {
+                "label": label,
+                "rank_conf": prediction.rank_conf,
+                "suit_conf": prediction.suit_conf,
+                "card_conf": card_conf,
+                "empty_slot": prediction is EMPTY_SLOT
+            }
+
+    return analysis
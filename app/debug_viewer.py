@@ -19,6 +19,11 @@ class DebugViewer:
         self.debug_messages = []
         self.max_messages = 20  # Keep last 20 messages
 
+        # The panel is only rebuilt when the card labels or messages change
+        self._messages_rev = 0
+        self._panel_key = None
+        self.panel_redraws = 0
+
     def show(self, frame, detected_cards: dict = None):
         """
         Display frame with optional detected cards in separate debug window.
@@ -30,9 +35,16 @@ class DebugViewer:
         """
         cv2.imshow(self.window_name, frame)
         
-        # Show debug window
+        # Show debug window; confidences alone changing does not trigger a redraw
         if detected_cards is not None:
-            self._update_debug_window(detected_cards)
+            panel_key = (
+                tuple(sorted((roi_name, card.get("label")) for roi_name, card in detected_cards.items())),
+                self._messages_rev
+            )
+            if panel_key != self._panel_key:
+                self._panel_key = panel_key
+                self._update_debug_window(detected_cards)
+                self.panel_redraws += 1
         
         key = cv2.waitKey(1) & 0xFF
         return key
@@ -41,6 +53,7 @@ class DebugViewer:
         """Add a message to the debug output."""
         timestamp = time.strftime("%H:%M:%S")
         self.debug_messages.append(f"[{timestamp}] {message}")
+        self._messages_rev += 1
         
         # Keep only last N messages
         if len(self.debug_messages) > self.max_messages:
@@ -0,0 +1,310 @@
+import functools
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+import config
+
+
+# Upper bucket bounds in seconds: 0.25 ms .. 1 s, plus the implicit +Inf bucket
+DEFAULT_BUCKETS_S = (0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (non-cumulative counts; the last bucket is +Inf)."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS_S):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def state(self) -> tuple:
+        return list(self.counts), self.sum, self.count
+
+    def merge(self, state: tuple):
+        counts, total, count = state
+        for i, c in enumerate(counts):
+            self.counts[i] += c
+        self.sum += total
+        self.count += count
+
+    def quantile(self, q: float) -> float:
+        """Approximate quantile in seconds, interpolated inside the bucket it falls in."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            if c and seen + c >= rank:
+                lo = self.buckets[i - 1] if i > 0 else 0.0
+                hi = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lo + (hi - lo) * (rank - seen) / c
+            seen += c
+        return self.buckets[-1]
+
+
+def _sorted(hists: dict):
+    # By stage, the all-tables series (table None) before per-table ones
+    return sorted(hists.items(), key=lambda kv: (kv[0][0], kv[0][1] is not None, kv[0][1] or 0))
+
+
+class _Timer:
+    __slots__ = ("registry", "stage", "table", "t0")
+
+    def __init__(self, registry, stage, table):
+        self.registry = registry
+        self.stage = stage
+        self.table = table
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.stage, time.perf_counter() - self.t0, self.table)
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class MetricsRegistry:
+    """
+    Per-stage (and optionally per-table) latency histograms plus plain counters.
+
+    Recording is a perf_counter pair, a bisect and a dict lookup under a lock,
+    a couple of microseconds per observation, so it can stay on in the frame
+    loop. With enabled=False timer() returns a shared no-op context manager.
+
+    Typical use:
+        with METRICS.timer("card_classify"): ...
+        METRICS.observe("player_detect", seconds, table=table_id)
+        METRICS.instrument(table_detector, "detect", "table_detect")
+    """
+
+    def __init__(self, enabled: bool = True, buckets: Tuple[float, ...] = DEFAULT_BUCKETS_S):
+        self.enabled = enabled
+        self.buckets = buckets
+        self.histograms: Dict[Tuple[str, Optional[int]], Histogram] = {}
+        self.counters: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def timer(self, stage: str, table: Optional[int] = None):
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, stage, table)
+
+    def observe(self, stage: str, seconds: float, table: Optional[int] = None):
+        if not self.enabled:
+            return
+        key = (stage, table)
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = Histogram(self.buckets)
+            hist.observe(seconds)
+
+    def inc(self, name: str, n: float = 1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def timed(self, stage: str):
+        """Decorator timing every call of a function as `stage`."""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                t0 = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.observe(stage, time.perf_counter() - t0)
+            return wrapper
+        return decorator
+
+    def instrument(self, obj, method: str, stage: str):
+        """Time obj.method as `stage` by shadowing it on the instance (calls through self too)."""
+        setattr(obj, method, self.timed(stage)(getattr(obj, method)))
+
+    def drain(self) -> dict:
+        """Picklable state of everything recorded so far, then reset (for worker processes)."""
+        with self._lock:
+            state = {
+                "histograms": {key: hist.state() for key, hist in self.histograms.items()},
+                "counters": dict(self.counters),
+            }
+            self.histograms.clear()
+            self.counters.clear()
+        return state
+
+    def merge(self, state: dict):
+        """Add a drain() result from another registry."""
+        with self._lock:
+            for key, hist_state in state["histograms"].items():
+                hist = self.histograms.get(key)
+                if hist is None:
+                    hist = self.histograms[key] = Histogram(self.buckets)
+                hist.merge(hist_state)
+            for name, n in state["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + n
+
+    def snapshot(self) -> Dict[Tuple[str, Optional[int]], Histogram]:
+        """Copies of all histograms, safe to read while recording continues."""
+        with self._lock:
+            copies = {}
+            for key, hist in self.histograms.items():
+                copy = Histogram(self.buckets)
+                copy.merge(hist.state())
+                copies[key] = copy
+            return copies
+
+    def prometheus_text(self, prefix: str = "pokerbot") -> str:
+        """All metrics in the Prometheus text exposition format."""
+        hists = self.snapshot()
+        with self._lock:
+            counters = dict(self.counters)
+
+        name = f"{prefix}_stage_seconds"
+        lines = [f"# HELP {name} Wall time per processing stage.", f"# TYPE {name} histogram"]
+        for (stage, table), hist in _sorted(hists):
+            labels = f'stage="{stage}"' + (f',table="{table}"' if table is not None else "")
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), hist.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"{name}_sum{{{labels}}} {hist.sum:.6f}")
+            lines.append(f"{name}_count{{{labels}}} {hist.count}")
+        for counter, value in sorted(counters.items()):
+            lines.append(f"# TYPE {prefix}_{counter}_total counter")
+            lines.append(f"{prefix}_{counter}_total {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry used by the pipeline, analysis code and worker processes
+METRICS = MetricsRegistry(enabled=config.METRICS_ENABLED)
+
+
+def summarize(hists: Dict[Tuple[str, Optional[int]], Histogram]) -> dict:
+    """{"stage" or "stage[table]": {count, mean_ms, p50_ms, p95_ms}} for a JSON log line."""
+    out = {}
+    for (stage, table), hist in _sorted(hists):
+        if not hist.count:
+            continue
+        out[stage if table is None else f"{stage}[{table}]"] = {
+            "count": hist.count,
+            "mean_ms": round(hist.sum / hist.count * 1000, 3),
+            "p50_ms": round(hist.quantile(0.5) * 1000, 3),
+            "p95_ms": round(hist.quantile(0.95) * 1000, 3),
+        }
+    return out
+
+
+class MetricsExporter:
+    """
+    Publishes a MetricsRegistry:
+      - http_port: Prometheus text at http://127.0.0.1:<port>/metrics
+      - textfile_path: the same text rewritten atomically every interval_s
+        (for node_exporter's textfile collector)
+      - json_log: one JSON line per interval_s on stdout with the stages
+        observed during that interval (not cumulative)
+    """
+
+    def __init__(self, registry: MetricsRegistry = METRICS, http_port: int = 0, textfile_path: str = "",
+                 json_log: bool = False, interval_s: float = 10.0):
+        self.registry = registry
+        self.http_port = http_port
+        self.textfile_path = textfile_path
+        self.json_log = json_log
+        self.interval_s = interval_s
+
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._stop = threading.Event()
+        self._threads = []
+        self._last = {}
+
+    def start(self):
+        if self.http_port:
+            registry = self.registry
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split("?")[0] != "/metrics":
+                        self.send_error(404)
+                        return
+                    body = registry.prometheus_text().encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, *args):
+                    pass
+
+            self._server = ThreadingHTTPServer(("127.0.0.1", self.http_port), Handler)
+            self._threads.append(threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True))
+
+        if self.textfile_path or self.json_log:
+            self._last = self.registry.snapshot()
+            self._threads.append(threading.Thread(target=self._loop, name="metrics-export", daemon=True))
+
+        for t in self._threads:
+            t.start()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval_s):
+            self.export()
+
+    def export(self):
+        if self.textfile_path:
+            tmp = self.textfile_path + ".tmp"
+            with open(tmp, "w") as f:
+                f.write(self.registry.prometheus_text())
+            os.replace(tmp, self.textfile_path)
+        if self.json_log:
+            print(self.json_line())
+
+    def json_line(self) -> str:
+        current = self.registry.snapshot()
+        delta = {}
+        for key, hist in current.items():
+            d = Histogram(hist.buckets)
+            d.merge(hist.state())
+            prev = self._last.get(key)
+            if prev is not None:
+                d.merge(([-c for c in prev.counts], -prev.sum, -prev.count))
+            delta[key] = d
+        self._last = current
+        return json.dumps({"ts": round(time.time(), 3), "interval_s": self.interval_s,
+                           "stages": summarize(delta)})
+
+    def stop(self):
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        for t in self._threads:
+            t.join(2.0)
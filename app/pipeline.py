@@ -0,0 +1,326 @@
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.metrics import METRICS
+from capture.frame_ring import SharedFrameRing
+
+
+# Marks the end of an offline frame source; forwarded through every stage
+_END_OF_STREAM = object()
+# Capture-thread pause when the source has no frame ready yet, instead of spinning on it
+_IDLE_SLEEP_S = 0.001
+
+
+@dataclass
+class FramePacket:
+    """One captured frame travelling through the pipeline."""
+    seq: int
+    t_capture: float
+    frame: Any
+    data: Dict[str, Any] = field(default_factory=dict)  # per-stage outputs, e.g. "tables"
+    ring_seq: Optional[int] = None  # set when frame is a read-only view into the pipeline's frame ring
+
+
+class LatestSlot:
+    """
+    Bounded hand-off between two stages that always favours the newest item.
+    When the slot is full, put() evicts the oldest item and counts it as dropped,
+    so a slow consumer never makes the producer wait.
+
+    With drop=False put() waits for room instead and nothing is dropped: the
+    producer runs at the consumer's pace (offline sources that must be
+    processed frame by frame).
+    """
+
+    def __init__(self, maxsize: int = 1, drop: bool = True):
+        self.maxsize = maxsize
+        self.drop = drop
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if self.drop:
+                while len(self._items) >= self.maxsize:
+                    self._items.popleft()
+                    self.dropped += 1
+            else:
+                while len(self._items) >= self.maxsize and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+            self._items.append(item)
+            self._cond.notify_all()
+
+    def get(self, timeout: Optional[float] = None):
+        """Return the oldest queued item, or None on timeout."""
+        with self._cond:
+            if not self._items:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            item = self._items.popleft()
+            self._cond.notify_all()  # a producer may be waiting for room
+            return item
+
+    def close(self):
+        """Wake every waiter; put() no longer blocks (the item is discarded)."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class StageStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.processed = 0
+        self.busy_s = 0.0
+        self._t0 = time.perf_counter()
+
+    def record(self, dt: float):
+        self.processed += 1
+        self.busy_s += dt
+
+    def reset(self):
+        self.processed = 0
+        self.busy_s = 0.0
+        self._t0 = time.perf_counter()
+
+    def snapshot(self) -> dict:
+        elapsed = max(time.perf_counter() - self._t0, 1e-9)
+        return {
+            "fps": self.processed / elapsed,
+            "mean_ms": self.busy_s / self.processed * 1000 if self.processed else 0.0,
+            "utilization": self.busy_s / elapsed,
+        }
+
+
+class FramePipeline:
+    """
+    Runs capture and each processing stage on its own thread, connected by
+    LatestSlot queues:
+
+        source() -> [capture] -> slot -> [stage 1] -> slot -> ... -> output slot
+
+    Stage functions take a FramePacket and return it (after filling packet.data),
+    or None to discard the frame. The last stage's output is fetched with get(),
+    usually from the main thread where rendering/GUI calls must happen.
+
+    drop_frames=False makes every slot blocking (see LatestSlot): capture and
+    each stage wait for the next stage instead of dropping frames, so an
+    offline source replayed as fast as possible is processed frame by frame.
+    Keep the default for live sources, which would otherwise fall behind.
+
+    If source_finished is given and returns True when source() yields None,
+    the pipeline drains and `finished` becomes True once get() has returned
+    every remaining packet.
+
+    With ring_slots > 0, captured frames are written into a SharedFrameRing
+    (created from the first frame's shape) and packets carry read-only views
+    into it plus their ring sequence number, so worker processes and
+    recorders can read the same frame without copies. The ring must be large
+    enough that no frame still held by a stage is overwritten, see
+    min_ring_slots(); frames of a different shape bypass the ring.
+    """
+
+    def __init__(self, source: Callable[[], Any], stages: List[Tuple[str, Callable[[FramePacket], Optional[FramePacket]]]],
+                 queue_size: int = 1, drop_frames: bool = True, latency_window: int = 300,
+                 source_finished: Optional[Callable[[], bool]] = None,
+                 ring_slots: int = 0, ring_readers: int = 4):
+        min_slots = self.min_ring_slots(len(stages), queue_size)
+        if 0 < ring_slots < min_slots:
+            raise ValueError(f"ring_slots must be at least {min_slots} for {len(stages)} stages "
+                             f"with queue_size {queue_size}")
+        self.ring_slots = ring_slots
+        self.ring_readers = ring_readers
+        self.ring: Optional[SharedFrameRing] = None
+        self._ring_ready = threading.Event()
+        self.ring_overwritten = 0
+        self.source = source
+        self.source_finished = source_finished
+        self.finished = False
+        self.stage_fns = stages
+        self.slots = [LatestSlot(queue_size, drop=drop_frames) for _ in range(len(stages) + 1)]
+        self.stats = [StageStats("capture")] + [StageStats(name) for name, _ in stages]
+        self.render_stats = StageStats("render")
+
+        self._latencies = deque(maxlen=latency_window)
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._errors: List[BaseException] = []
+        self._seq = 0
+
+    @staticmethod
+    def min_ring_slots(n_stages: int, queue_size: int) -> int:
+        """
+        Frames that can be in flight at once: one being captured, queue_size in
+        each slot, one in each stage and one with the consumer of get().
+        """
+        return 1 + (n_stages + 1) * queue_size + n_stages + 1
+
+    def wait_ring(self, timeout: Optional[float] = None) -> Optional[SharedFrameRing]:
+        """The frame ring once the first frame has been captured (None if disabled or timed out)."""
+        if not self.ring_slots:
+            return None
+        self._ring_ready.wait(timeout)
+        return self.ring
+
+    def start(self):
+        self._threads = [threading.Thread(target=self._capture_loop, name="capture", daemon=True)]
+        for idx, (name, fn) in enumerate(self.stage_fns):
+            self._threads.append(threading.Thread(
+                target=self._stage_loop, args=(idx, fn), name=name, daemon=True
+            ))
+        for t in self._threads:
+            t.start()
+
+    def stop(self, timeout: float = 2.0):
+        self._stop.set()
+        for slot in self.slots:
+            slot.close()
+        for t in self._threads:
+            t.join(timeout)
+        if self.ring is not None:
+            # Views handed out in packets keep the mapping alive; unlink still
+            # removes the name so the segment is freed once they are gone
+            self.ring.unlink()
+
+    def get(self, timeout: Optional[float] = 0.1) -> Optional[FramePacket]:
+        """Newest fully processed packet, or None. Re-raises worker exceptions."""
+        if self._errors:
+            raise self._errors[0]
+        if self.finished:
+            return None
+        packet = self.slots[-1].get(timeout)
+        if packet is _END_OF_STREAM:
+            self.finished = True
+            return None
+        return packet
+
+    def mark_done(self, packet: FramePacket, render_s: float = 0.0):
+        """Record end-to-end latency once the consumer has finished with a packet."""
+        self.render_stats.record(render_s)
+        latency = time.perf_counter() - packet.t_capture
+        self._latencies.append(latency)
+        METRICS.observe("render", render_s)
+        METRICS.observe("end_to_end", latency)
+
+    def _capture_loop(self):
+        stats = self.stats[0]
+        try:
+            while not self._stop.is_set():
+                t0 = time.perf_counter()
+                frame = self.source()
+                if frame is None:
+                    if self.source_finished is not None and self.source_finished():
+                        self.slots[0].put(_END_OF_STREAM)
+                        return
+                    time.sleep(_IDLE_SLEEP_S)
+                    continue
+                t1 = time.perf_counter()
+                stats.record(t1 - t0)
+                METRICS.observe("capture", t1 - t0)
+                self._seq += 1
+                packet = FramePacket(seq=self._seq, t_capture=t1, frame=frame)
+                if self.ring_slots:
+                    self._to_ring(packet)
+                self.slots[0].put(packet)
+        except BaseException as e:
+            self._errors.append(e)
+            self._stop.set()
+
+    def _to_ring(self, packet: FramePacket):
+        """Write the captured frame into the ring and swap it for a read-only view."""
+        frame = packet.frame
+        if self.ring is None:
+            self.ring = SharedFrameRing(frame.shape, frame.dtype, slots=self.ring_slots,
+                                        max_readers=self.ring_readers)
+            self._ring_ready.set()
+        if frame.shape != self.ring.shape or frame.dtype != self.ring.dtype:
+            return
+        packet.ring_seq = self.ring.write(frame, packet.t_capture)
+        packet.frame = self.ring.read(packet.ring_seq)
+
+    def _stage_loop(self, idx: int, fn):
+        stats = self.stats[idx + 1]
+        in_slot, out_slot = self.slots[idx], self.slots[idx + 1]
+        try:
+            while not self._stop.is_set():
+                packet = in_slot.get(timeout=0.1)
+                if packet is None:
+                    continue
+                if packet is _END_OF_STREAM:
+                    out_slot.put(packet)
+                    return
+                t0 = time.perf_counter()
+                ring_seq = packet.ring_seq
+                packet = fn(packet)
+                dt = time.perf_counter() - t0
+                stats.record(dt)
+                METRICS.observe(stats.name, dt)
+                if ring_seq is not None and not self.ring.is_current(ring_seq):
+                    # Should not happen with slots >= min_ring_slots(); the stage saw a torn frame
+                    self.ring_overwritten += 1
+                if packet is not None:
+                    out_slot.put(packet)
+        except BaseException as e:
+            self._errors.append(e)
+            self._stop.set()
+
+    def report(self, reset: bool = True) -> dict:
+        """Per-stage throughput/time, frames dropped between stages and end-to-end latency."""
+        stages = {}
+        for idx, stats in enumerate(self.stats + [self.render_stats]):
+            snap = stats.snapshot()
+            if idx < len(self.slots):
+                # frames this stage produced that the next stage never saw
+                snap["dropped"] = self.slots[idx].dropped
+            stages[stats.name] = snap
+
+        lat = np.array(self._latencies) * 1000 if self._latencies else np.zeros(1)
+        report = {
+            "stages": stages,
+            "latency_ms": {
+                "p50": float(np.percentile(lat, 50)),
+                "p95": float(np.percentile(lat, 95)),
+                "max": float(lat.max()),
+            },
+        }
+        if self.ring is not None:
+            ring = self.ring.stats()
+            ring["overwritten"] = self.ring_overwritten
+            report["ring"] = ring
+
+        if reset:
+            for stats in self.stats + [self.render_stats]:
+                stats.reset()
+            for slot in self.slots:
+                slot.dropped = 0
+            self._latencies.clear()
+        return report
+
+    @staticmethod
+    def format_report(report: dict) -> str:
+        lat = report["latency_ms"]
+        parts = [f"e2e p50 {lat['p50']:.0f}ms p95 {lat['p95']:.0f}ms"]
+        for name, s in report["stages"].items():
+            part = f"{name} {s['fps']:.1f}fps/{s['mean_ms']:.1f}ms"
+            if s.get("dropped"):
+                part += f" drop {s['dropped']}"
+            parts.append(part)
+        ring = report.get("ring")
+        if ring is not None:
+            # Only readers that fell behind (e.g. a recorder on a slow disk) are listed
+            behind = [f"r{i} drop {r['dropped']}" for i, r in ring["readers"].items() if r["dropped"]]
+            if ring["overwritten"]:
+                behind.append(f"overwritten {ring['overwritten']}")
+            if behind:
+                parts.append("ring " + " ".join(behind))
+        return " | ".join(parts)
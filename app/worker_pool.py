@@ -0,0 +1,291 @@
+import multiprocessing as mp
+import queue
+import time
+import traceback
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import config
+from app.metrics import METRICS
+
+
+@dataclass
+class WorkerSettings:
+    """Everything a worker process needs to build its own detectors and models."""
+    card_weights: str = "vision/models/tiny_corner_net_best_cardv4.pt"
+    card_backend: str = config.CARD_BACKEND
+    template_match: bool = config.CARD_TEMPLATE_MATCH
+    skip_empty: bool = config.CARD_EMPTY_GATE
+    cache_diff_threshold: float = config.CARD_CACHE_DIFF_THRES
+    # Threads per worker for torch / OpenCV; more than 1 oversubscribes the cores
+    threads: int = 1
+
+
+def _build_analyzer(settings: WorkerSettings):
+    """Player detector, card classifier and card cache for one worker."""
+    import cv2
+    import torch
+    from vision.card_cache import CardCache
+    from vision.card_detector import CardClassifier
+    from vision.player_detector import PlayerDetector
+    from vision.template_matcher import CascadeCardClassifier, TemplateCardMatcher
+
+    torch.set_num_threads(settings.threads)
+    cv2.setNumThreads(settings.threads)
+
+    player_detector = PlayerDetector(
+        edge_ratio_threshold=config.EDGE_RATIO_THRESHOLD,
+        laplacian_var_threshold=config.LAPLACIAN_VAR_THRESHOLD,
+        nms_overlap_threshold=config.NMS_OVERLAP_THRESHOLD,
+        empty_slot_edge_ratio=config.EMPTY_SLOT_EDGE_RATIO_THRESHOLD,
+        empty_slot_laplacian_var=config.EMPTY_SLOT_LAPLACIAN_VAR_THRESHOLD
+    )
+    card_clf = CardClassifier(weights_path=settings.card_weights, device="cpu", backend=settings.card_backend)
+    METRICS.instrument(card_clf, "predict_corners", "card_cnn")
+    if settings.template_match:
+        card_clf = CascadeCardClassifier(
+            TemplateCardMatcher(min_score=config.CARD_TEMPLATE_MIN_SCORE,
+                                min_margin=config.CARD_TEMPLATE_MIN_MARGIN),
+            card_clf
+        )
+    card_cache = CardCache(
+        diff_threshold=settings.cache_diff_threshold,
+        fingerprint_size=config.CARD_CACHE_FINGERPRINT_SIZE
+    )
+    return player_detector, card_clf, card_cache
+
+
+def _worker_main(worker_id: int, settings: WorkerSettings, jobs: mp.Queue, results: mp.Queue):
+    """
+    Worker loop. A job is (seq, shm_name, shape, dtype, table_indices, table_ids, tables),
+    or (seq, ("ring", ring_name, ring_seq), None, None, table_indices, table_ids, tables)
+    for a frame in a SharedFrameRing; either way the frame is read straight
+    from shared memory, never pickled. table_indices are positions in the
+    frame's table list (for merging), table_ids the persistent ids.
+    """
+    from app.analysis import analyze_tables
+    from capture.frame_ring import SharedFrameRing
+
+    try:
+        player_detector, card_clf, card_cache = _build_analyzer(settings)
+    except BaseException:
+        results.put(("error", worker_id, None, traceback.format_exc()))
+        return
+    results.put(("ready", worker_id, None, None))
+
+    shm = ring = None
+    try:
+        while True:
+            job = jobs.get()
+            if job is None:
+                break
+            seq, shm_name, shape, dtype, table_indices, table_ids, tables = job
+            try:
+                ring_seq = None
+                if isinstance(shm_name, tuple):
+                    _, ring_name, ring_seq = shm_name
+                    if ring is None or ring.name != ring_name:
+                        if ring is not None:
+                            ring.close()
+                        ring = SharedFrameRing.attach(ring_name)
+                    frame = ring.read(ring_seq)
+                    if frame is None:
+                        raise RuntimeError(f"Frame {ring_seq} was overwritten before analysis started")
+                else:
+                    # The parent reallocates the segment when frames get larger
+                    if shm is None or shm.name != shm_name:
+                        if shm is not None:
+                            shm.close()
+                        shm = shared_memory.SharedMemory(name=shm_name)
+                    frame = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+                t0 = time.perf_counter()
+                analysis = analyze_tables(frame, tables, player_detector, card_clf, card_cache,
+                                          skip_empty=settings.skip_empty, table_ids=table_ids)
+                del frame  # release the buffer export before the segment can be closed
+                busy_s = time.perf_counter() - t0
+                if ring_seq is not None and not ring.is_current(ring_seq):
+                    raise RuntimeError(f"Frame {ring_seq} was overwritten during analysis; enlarge the ring")
+
+                # analyze_tables skips degenerate boxes, so match results back by table
+                by_table = {id(table): idx for idx, table in zip(table_indices, tables)}
+                out = [(by_table[id(r["table"])], r) for r in analysis]
+                # This frame's stage timings travel back to the parent's registry
+                results.put(("result", worker_id, seq, (out, busy_s, METRICS.drain())))
+            except BaseException:
+                results.put(("error", worker_id, seq, traceback.format_exc()))
+    finally:
+        if shm is not None:
+            shm.close()
+        if ring is not None:
+            ring.close()
+
+
+class TableWorkerPool:
+    """
+    Per-table analysis (player detection, card classification) spread over N
+    worker processes, each with its own PlayerDetector, CardClassifier and
+    CardCache.
+
+    Each frame is copied once into a shared-memory segment, or not at all when
+    it already lives in a SharedFrameRing (ring_ref); workers map it as a
+    NumPy view, so only the small table boxes and results are pickled. Tables
+    are assigned to workers by id (table id -> worker id % N), which keeps a
+    table on the same worker from frame to frame so its card cache stays warm.
+    Each worker analyzes all of its tables in one analyze_tables call, so their
+    card crops still share one classifier batch.
+
+    analyze() blocks until every table of the frame is done and returns the
+    same per-table list as app.analysis.analyze_tables, in table order.
+    """
+
+    def __init__(self, n_workers: int, settings: Optional[WorkerSettings] = None,
+                 start_timeout_s: float = 120.0, result_timeout_s: float = 10.0):
+        """
+        Args:
+            n_workers: Worker processes to start (one loaded model each).
+            settings: Model/detector settings for the workers (defaults from config).
+            start_timeout_s: Max time for all workers to load their models.
+            result_timeout_s: Max time to wait for one frame's results.
+        """
+        self.n_workers = n_workers
+        self.settings = settings or WorkerSettings()
+        self.result_timeout_s = result_timeout_s
+
+        # "spawn" everywhere: fork would copy torch/OpenCV thread pools in a bad state
+        ctx = mp.get_context("spawn")
+        self._jobs = [ctx.Queue() for _ in range(n_workers)]
+        self._results = ctx.Queue()
+        self._procs = [
+            ctx.Process(target=_worker_main, args=(i, self.settings, self._jobs[i], self._results),
+                        name=f"table-worker-{i}", daemon=True)
+            for i in range(n_workers)
+        ]
+        for p in self._procs:
+            p.start()
+
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._seq = 0
+        self.frames = 0
+        self.busy_s = [0.0] * n_workers
+
+        try:
+            self._wait_ready(start_timeout_s)
+        except BaseException:
+            self.stop()
+            raise
+
+    def _wait_ready(self, timeout_s: float):
+        ready = 0
+        deadline = time.perf_counter() + timeout_s
+        while ready < self.n_workers:
+            kind, worker_id, _, payload = self._get_result(deadline)
+            if kind == "error":
+                raise RuntimeError(f"Table worker {worker_id} failed to start:\n{payload}")
+            ready += kind == "ready"
+
+    def _get_result(self, deadline: float):
+        # Poll so a crashed worker is reported right away instead of at the deadline
+        while True:
+            try:
+                return self._results.get(timeout=min(max(deadline - time.perf_counter(), 0.001), 0.5))
+            except queue.Empty:
+                dead = [f"{p.name} (exit code {p.exitcode})" for p in self._procs if not p.is_alive()]
+                if dead:
+                    raise RuntimeError(f"Table workers died: {', '.join(dead)}")
+                if time.perf_counter() >= deadline:
+                    raise TimeoutError("Table workers timed out")
+
+    def _frame_buffer(self, frame: np.ndarray) -> np.ndarray:
+        """Shared-memory array shaped like frame, reallocated only if frame grows."""
+        if self._shm is None or self._shm.size < frame.nbytes:
+            if self._shm is not None:
+                self._shm.close()
+                self._shm.unlink()
+            self._shm = shared_memory.SharedMemory(create=True, size=frame.nbytes)
+        return np.ndarray(frame.shape, dtype=frame.dtype, buffer=self._shm.buf)
+
+    def analyze(self, frame: np.ndarray, tables, ring_ref: Optional[Tuple[str, int]] = None,
+                table_ids: Optional[List[int]] = None) -> List[Dict]:
+        """
+        Analyze every table of the frame on the workers; same output as analyze_tables.
+
+        Args:
+            frame: The frame (only read when ring_ref is None).
+            tables: TableBox list for the frame.
+            ring_ref: (ring name, sequence number) of the frame in a SharedFrameRing;
+                workers then read it in place instead of from a copy.
+            table_ids: Persistent id of each table (TableDetector.table_ids), used for
+                worker assignment, card cache keys and metrics (default: position in tables).
+        """
+        if not tables:
+            return []
+
+        self._seq += 1
+        seq = self._seq
+
+        if ring_ref is not None:
+            frame_ref = ("ring",) + tuple(ring_ref)
+            shape = dtype = None
+        else:
+            # Safe to overwrite: the previous frame's jobs all finished before it returned
+            shared = self._frame_buffer(frame)
+            shared[...] = frame
+            del shared
+            frame_ref, shape, dtype = self._shm.name, frame.shape, frame.dtype.str
+
+        if table_ids is None:
+            table_ids = list(range(len(tables)))
+        assigned = {}
+        for idx, table_id in enumerate(table_ids):
+            assigned.setdefault(table_id % self.n_workers, []).append(idx)
+        for worker_id, indices in assigned.items():
+            self._jobs[worker_id].put((seq, frame_ref, shape, dtype, indices, [table_ids[i] for i in indices],
+                                       [tables[i] for i in indices]))
+
+        merged = []
+        pending = len(assigned)
+        deadline = time.perf_counter() + self.result_timeout_s
+        while pending:
+            kind, worker_id, result_seq, payload = self._get_result(deadline)
+            if kind == "error":
+                raise RuntimeError(f"Table worker {worker_id} failed:\n{payload}")
+            if result_seq != seq:
+                continue  # late result of a frame that already timed out
+            out, busy_s, metrics = payload
+            self.busy_s[worker_id] += busy_s
+            METRICS.merge(metrics)
+            merged.extend(out)
+            pending -= 1
+
+        self.frames += 1
+        merged.sort(key=lambda item: item[0])
+        return [result for _, result in merged]
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.n_workers,
+            "frames": self.frames,
+            "busy_s": list(self.busy_s),
+        }
+
+    def stop(self, timeout: float = 5.0):
+        for jobs in self._jobs:
+            jobs.put(None)
+        for p in self._procs:
+            p.join(timeout)
+            if p.is_alive():
+                p.terminate()
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
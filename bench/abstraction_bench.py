@@ -0,0 +1,154 @@
+"""
+Card abstraction checks, timings and the solver-side compression.
+
+  1. suit isomorphism: canonical_keys() class counts by full enumeration
+     (preflop hands, flop and turn boards; --full-flop adds all 26M flop
+     hands) against the exact Burnside counts, and keys/sec;
+  2. compression per street from the saved bucket tables;
+  3. bucket quality: spread of exact EHS inside each flop, turn and river
+     bucket compared with the spread over all hands (flop and turn: every
+     hole pair of --spread-boards random boards, river: random hands);
+  4. lookup cost of HandBucketer for a live hand (first sight vs cached);
+  5. a flop-turn-river CFRSolver run on build_abstraction(): infosets
+     stored with buckets vs. what suit-isomorphic or raw hands would need.
+
+Needs the tables (python -m poker.abstraction). Run from the repo root:
+    python -m bench.abstraction_bench
+"""
+
+import argparse
+import itertools
+import time
+
+import numpy as np
+
+from bench.common import run_meta, write_results
+from poker.abstraction import (HandBucketer, STREET_BOARD_CARDS, board_strength, build_abstraction, canonical_keys,
+                               compression_report, deal_hands, isomorphic_count, print_report, river_strength)
+from poker.cards import N_CARDS, card_label, parse_cards
+from poker.cfr import DECISION, CFRSolver, GameTree, TreeConfig
+
+
+def enumerate_check(full_flop: bool) -> dict:
+    cases = {"preflop hands": ((2,), None), "flop boards": ((3,), None), "turn boards": ((4,), None)}
+    if full_flop:
+        cases["flop hands"] = ((2, 3), None)
+    out = {}
+    for name, (sizes, _) in cases.items():
+        t0 = time.perf_counter()
+        if sizes == (2, 3):
+            keys = []
+            for hole in itertools.combinations(range(N_CARDS), 2):
+                rest = np.array(list(itertools.combinations([c for c in range(N_CARDS) if c not in hole], 3)))
+                keys.append(np.unique(canonical_keys(np.broadcast_to(hole, (len(rest), 2)), rest)))
+            found = len(np.unique(np.concatenate(keys)))
+            rows = len(keys) * len(rest)
+        else:
+            rows_arr = np.array(list(itertools.combinations(range(N_CARDS), sizes[0])))
+            found = len(np.unique(canonical_keys(rows_arr)))
+            rows = len(rows_arr)
+        seconds = time.perf_counter() - t0
+        expected = isomorphic_count(*sizes)
+        out[name] = {"rows": rows, "classes": found, "expected": expected, "keys_per_s": rows / seconds}
+        print(f"  {name:14} {rows:>11,} -> {found:>10,} classes (Burnside {expected:,}) "
+              f"{'OK' if found == expected else 'FAILED'}  {rows / seconds / 1e6:.2f}M keys/s")
+    return out
+
+
+def bucket_spread(bucketer: HandBucketer, street: str, n: int, n_boards: int, rng) -> dict:
+    m = STREET_BOARD_CARDS[street]
+    if street == "river":
+        holes, boards = deal_hands(rng, n)
+        holes = holes[:, 0]
+        ehs = river_strength(holes, boards)
+    else:
+        # board_strength values every hole pair of a board at once, so sample boards, not hands
+        holes, boards, ehs = [], [], []
+        for _ in range(n_boards):
+            board = np.sort(rng.choice(N_CARDS, m, replace=False))
+            live = np.setdiff1d(np.arange(N_CARDS), board)
+            a, b = np.triu_indices(len(live), 1)
+            holes.append(np.stack([live[a], live[b]], axis=1))
+            boards.append(np.broadcast_to(board, (len(a), m)))
+            ehs.append(board_strength(board))
+        holes, boards, ehs = np.concatenate(holes), np.concatenate(boards), np.concatenate(ehs)
+    buckets = bucketer.hand_buckets(holes, boards)
+    within = np.sqrt(np.mean([ehs[buckets == b].var() for b in np.unique(buckets)]))
+    counts = np.bincount(buckets, minlength=bucketer.n_buckets(street))
+    return {"hands": len(ehs), "overall_std": float(ehs.std()), "within_std": float(within),
+            "min_share": float(counts.min() / len(ehs)), "max_share": float(counts.max() / len(ehs))}
+
+
+def infosets_per_street(tree: GameTree, per_street) -> int:
+    return sum(per_street[tree.street[n]] for n, kind in enumerate(tree.kind) if kind == DECISION)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Card abstraction benchmark")
+    parser.add_argument("--full-flop", action="store_true", help="Enumerate all 26M flop hands (slow)")
+    parser.add_argument("--spread-hands", type=int, default=4000, help="River hands for the bucket spread")
+    parser.add_argument("--spread-boards", type=int, default=30, help="Flop / turn boards for the bucket spread")
+    parser.add_argument("--samples", type=int, default=20000, help="Deals for build_abstraction")
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--out", default=None, help="Write JSON results here")
+    args = parser.parse_args()
+    results = {"meta": run_meta(args=vars(args))}
+    rng = np.random.default_rng(1)
+    bucketer = HandBucketer()
+
+    print("suit isomorphism:")
+    results["isomorphism"] = enumerate_check(args.full_flop)
+
+    print("compression per street:")
+    rows = compression_report(bucketer)
+    print_report(rows)
+    results["compression"] = rows
+
+    print("EHS spread inside buckets (std of exact EHS):")
+    results["spread"] = {}
+    for street in ("flop", "turn", "river"):
+        s = bucket_spread(bucketer, street, args.spread_hands, args.spread_boards, rng)
+        results["spread"][street] = s
+        print(f"  {street:6} {s['hands']:>6} hands, all {s['overall_std']:.3f}, within bucket {s['within_std']:.3f}; "
+              f"bucket shares {100 * s['min_share']:.1f}%..{100 * s['max_share']:.1f}%")
+
+    hole, board = parse_cards(("Ah", "10d")), parse_cards(("Qh", "7c", "2s"))
+    iso_hole, iso_board = parse_cards(("As", "10c")), parse_cards(("Qs", "7d", "2h"))
+    t0 = time.perf_counter()
+    first = bucketer.hand_bucket(hole, board)
+    first_ms = (time.perf_counter() - t0) * 1000
+    t0 = time.perf_counter()
+    for _ in range(1000):
+        cached = bucketer.hand_bucket(iso_hole, iso_board)
+    cached_us = (time.perf_counter() - t0) * 1000
+    board_bucket = bucketer.board_bucket(board)
+    rep = " ".join(card_label(c) for c in bucketer.representative_board("flop", board_bucket))
+    results["lookup"] = {"first_ms": first_ms, "cached_us": cached_us}
+    print(f"AhTd on Qh7c2s: bucket {first} ({first_ms:.1f} ms first time), suit-isomorphic AsTc on Qs7d2h "
+          f"bucket {cached} ({cached_us:.0f} us cached); board bucket {board_bucket}, represented by {rep}")
+
+    streets = ("flop", "turn", "river")
+    t0 = time.perf_counter()
+    abstraction = build_abstraction(bucketer, streets, samples=args.samples)
+    build_s = time.perf_counter() - t0
+    tree = GameTree(TreeConfig(bet_sizes=(0.5, 1.0), stack=4.0, streets=len(streets)))
+    solver = CFRSolver(tree, abstraction)
+    history = solver.solve(args.iterations, eval_every=max(1, args.iterations // 3))
+    stats = solver.stats()
+    by_row = {r["street"]: r for r in rows}
+    iso = infosets_per_street(tree, [by_row[s]["iso_hands"] for s in streets])
+    raw = infosets_per_street(tree, [by_row[s]["hands"] for s in streets])
+    results["solver"] = {"build_s": build_s, "stats": stats, "history": history,
+                         "infosets_iso": iso, "infosets_raw": raw}
+    print(f"flop-turn-river game, sizes (0.5, 1), stack 4 pots; abstraction estimated in {build_s:.1f} s:")
+    print(f"  infosets: raw hands {raw:,}, suit-isomorphic {iso:,}, buckets {stats['infosets']:,} "
+          f"({iso / stats['infosets']:,.0f}x fewer than isomorphic, {raw / stats['infosets']:,.0f}x fewer than raw)")
+    print(f"  arrays {stats['array_bytes'] / 1e6:.2f} MB, {stats['iterations_per_s']:.1f} it/s, exploitability "
+          + ", ".join(f"{r['exploitability']:.4f} @ {r['iteration']}" for r in history))
+
+    if args.out:
+        write_results(args.out, results)
+
+
+if __name__ == "__main__":
+    main()
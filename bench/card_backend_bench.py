@@ -0,0 +1,73 @@
+"""
+Per-batch inference latency of each CardClassifier backend (eager, TorchScript,
+ONNX Runtime), measured on the model forward pass only (preprocessing excluded).
+
+Export the models first with `python -m vision.export_card_model`.
+
+Run from the repo root:
+    python -m bench.card_backend_bench --batches 1 7 14 28 56 --iters 200
+"""
+
+import argparse
+import time
+
+import torch
+
+from bench.common import run_meta, write_results
+from vision.card_detector import BACKENDS, CardClassifier
+
+
+CARD_MODEL_PATH = "vision/models/tiny_corner_net_best_cardv4.pt"
+
+
+@torch.no_grad()
+def time_forward(clf: CardClassifier, batch: int, iters: int, input_size: int = 96) -> dict:
+    x = torch.rand(batch, 3, input_size, input_size)
+    for _ in range(5):  # warmup (TorchScript profiling runs, ORT allocations)
+        clf._forward(x)
+    samples = []
+    for _ in range(iters):
+        t0 = time.perf_counter()
+        clf._forward(x)
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    return {
+        "p50_ms": samples[len(samples) // 2] * 1000,
+        "min_ms": samples[0] * 1000,
+        "per_card_us": samples[len(samples) // 2] / batch * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CardClassifier backend latency")
+    parser.add_argument("--weights", default=CARD_MODEL_PATH)
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--batches", nargs="+", type=int, default=[1, 7, 14, 28, 56])
+    parser.add_argument("--iters", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=0, help="torch.set_num_threads (0 = default)")
+    parser.add_argument("--out", default=None, help="Write JSON results here")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    results = {"meta": run_meta(weights=args.weights, torch_threads=torch.get_num_threads()), "backends": {}}
+    print(f"{'backend':<12}{'batch':>6}{'p50 ms':>10}{'min ms':>10}{'us/card':>10}")
+    for backend in args.backends:
+        try:
+            clf = CardClassifier(args.weights, backend=backend)
+        except (ImportError, FileNotFoundError) as e:
+            print(f"{backend:<12} skipped: {e}")
+            continue
+        results["backends"][backend] = {}
+        for batch in args.batches:
+            r = time_forward(clf, batch, args.iters)
+            results["backends"][backend][str(batch)] = r
+            print(f"{backend:<12}{batch:>6}{r['p50_ms']:>10.3f}{r['min_ms']:>10.3f}{r['per_card_us']:>10.1f}")
+
+    if args.out:
+        write_results(args.out, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+CFRSolver size, throughput and convergence per bet-size abstraction.
+
+For each bet-size set (1..5 sizes) at the given streets / stack depth:
+betting-tree nodes, infosets, bytes of the regret + strategy arrays,
+iterations/sec, infoset updates/sec and exploitability after --iterations.
+The last column projects how many buckets per street would fit the
+regret/strategy arrays into --memory-gb, the limit on how fine a card
+abstraction a single machine can pair with that bet-size set.
+
+Also runs CFR+ and DCFR side by side on one configuration and prints
+exploitability over wall-clock time, and first checks the solver on Kuhn
+poker (known game value -1/18 chip for the first player).
+
+Run from the repo root:
+    python -m bench.cfr_bench --streets 2 --buckets 50 --iterations 50
+"""
+
+import argparse
+
+import numpy as np
+
+from bench.common import peak_rss_mb, run_meta, write_results
+from poker.cfr import VARIANTS, CardAbstraction, CFRSolver, GameTree, TreeConfig, entries_needed
+
+
+SIZE_SETS = [(1.0,), (0.5, 1.0), (0.33, 0.66, 1.0), (0.25, 0.5, 0.75, 1.0), (0.25, 0.5, 0.75, 1.0, 1.5)]
+
+
+def kuhn_check(iterations: int) -> dict:
+    """
+    Kuhn poker: ante 1 chip each (pot 2), one 1-chip bet (half the pot, all
+    of the 0.5-pot stack) and no raises; buckets J, Q, K are single cards,
+    so a pair with the same card is incompatible.
+    """
+    tree = GameTree(TreeConfig(bet_sizes=(0.5,), stack=0.5, max_bets=1, all_in=False))
+    showdown = (np.arange(3)[:, None] > np.arange(3)[None, :]) + 0.5 * np.eye(3)
+    abstraction = CardAbstraction(np.full(3, 1 / 3), [], showdown, compat=[1 - np.eye(3)])
+    solver = CFRSolver(tree, abstraction)
+    solver.solve(iterations)
+    value = 2 * solver.expected_value(0)  # pots -> chips
+    bets = solver.average_strategy(tree.root)[:, 1]  # actions: check, bet (labelled all-in)
+    result = {"iterations": iterations, "value_chips": value, "exploitability": solver.exploitability(),
+              "root_bet": bets.tolist()}
+    print(f"Kuhn poker, {iterations} CFR+ iterations: value {value:.5f} chips (exact {-1 / 18:.5f}), exploitability "
+          f"{result['exploitability']:.1e} pots; first bet J {bets[0]:.3f} Q {bets[1]:.3f} K {bets[2]:.3f} "
+          f"(equilibrium: K = 3 J, Q never)")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CFR solver benchmark")
+    parser.add_argument("--streets", type=int, default=2)
+    parser.add_argument("--stack", type=float, default=4.0, help="Effective stack in starting pots")
+    parser.add_argument("--buckets", type=int, default=50, help="Card buckets per street")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--max-sizes", type=int, default=len(SIZE_SETS))
+    parser.add_argument("--memory-gb", type=float, default=16.0)
+    parser.add_argument("--converge-iterations", type=int, default=200)
+    parser.add_argument("--kuhn-iterations", type=int, default=2000)
+    parser.add_argument("--out", default=None, help="Write JSON results here")
+    args = parser.parse_args()
+    results = {"meta": run_meta(args=vars(args)), "sizes": {}, "convergence": {}}
+    abstraction = CardAbstraction.uniform(args.buckets, args.streets)
+    results["kuhn"] = kuhn_check(args.kuhn_iterations)
+
+    print(f"{args.streets} street(s), stack {args.stack:g} pots, {args.buckets} buckets/street, "
+          f"{args.iterations} CFR+ iterations:")
+    print(f"  {'sizes':>5} {'nodes':>8} {'infosets':>10} {'arrays MB':>10} {'it/s':>8} {'infosets/s':>11} "
+          f"{'exploit':>9} {'buckets in ' + f'{args.memory_gb:g} GB':>16}")
+    for sizes in SIZE_SETS[:args.max_sizes]:
+        tree = GameTree(TreeConfig(bet_sizes=sizes, stack=args.stack, streets=args.streets))
+        solver = CFRSolver(tree, abstraction)
+        history = solver.solve(args.iterations)
+        stats = solver.stats()
+        # Arrays grow linearly with buckets per street
+        per_bucket = entries_needed(tree, CardAbstraction.uniform(1, args.streets)) * 8
+        fit = int(args.memory_gb * 1e9 // per_bucket)
+        stats.update(exploitability=history[-1]["exploitability"], buckets_fit=fit,
+                     infosets_per_s=stats["infosets"] * 2 * stats["iterations_per_s"])
+        results["sizes"][len(sizes)] = stats
+        print(f"  {len(sizes):>5} {stats['nodes']:>8} {stats['infosets']:>10} {stats['array_bytes'] / 1e6:>10.2f} "
+              f"{stats['iterations_per_s']:>8.1f} {stats['infosets_per_s']:>11.0f} "
+              f"{stats['exploitability']:>9.4f} {fit:>16}")
+
+    sizes = SIZE_SETS[1]
+    print(f"convergence, sizes {sizes}: exploitability (pots) by wall-clock time")
+    for variant in VARIANTS:
+        tree = GameTree(TreeConfig(bet_sizes=sizes, stack=args.stack, streets=args.streets))
+        solver = CFRSolver(tree, abstraction, variant=variant)
+        history = solver.solve(args.converge_iterations, eval_every=max(1, args.converge_iterations // 5))
+        results["convergence"][variant] = history
+        print(f"  {variant:5} " + "  ".join(f"{r['seconds']:6.1f}s {r['exploitability']:.5f}" for r in history))
+
+    results["peak_rss_mb"] = peak_rss_mb()
+    print(f"peak RSS {results['peak_rss_mb']:.0f} MB")
+    if args.out:
+        write_results(args.out, results)
+
+
+if __name__ == "__main__":
+    main()
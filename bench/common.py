@@ -0,0 +1,132 @@
+"""
+Shared helpers for the bench/ scripts: per-stage latency samples, optional
+allocation tracking, peak RSS and JSON result files.
+"""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+
+
+class StageRecorder:
+    """
+    Collects wall-clock samples per named stage.
+
+    With track_alloc=True each stage also records the peak bytes allocated while it
+    ran (Python + NumPy allocations via tracemalloc; PyTorch's allocator is not
+    visible to tracemalloc). Tracking slows everything down, so latency numbers
+    from such a run should not be compared with normal runs. Stages that wrap
+    other stages should pass track_alloc=False, since the inner stages reset
+    the tracemalloc peak.
+    """
+
+    def __init__(self, track_alloc: bool = False):
+        self.samples = defaultdict(list)
+        self.alloc_peaks = defaultdict(list)
+        self.counters = defaultdict(int)
+        self.track_alloc = track_alloc
+        if track_alloc and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name: str, track_alloc: bool = True):
+        track_alloc = track_alloc and self.track_alloc
+        if track_alloc:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples[name].append(time.perf_counter() - t0)
+            if track_alloc:
+                peak = tracemalloc.get_traced_memory()[1]
+                self.alloc_peaks[name].append(peak - before)
+
+    def add(self, name: str, seconds: float):
+        """Record a sample measured elsewhere (e.g. a sum of other stages)."""
+        self.samples[name].append(seconds)
+
+    def count(self, name: str, n: int = 1):
+        self.counters[name] += n
+
+    def summary(self) -> dict:
+        stages = {}
+        for name, samples in self.samples.items():
+            ms = np.asarray(samples) * 1000
+            stats = {
+                "count": int(ms.size),
+                "mean_ms": float(ms.mean()),
+                "p50_ms": float(np.percentile(ms, 50)),
+                "p95_ms": float(np.percentile(ms, 95)),
+                "p99_ms": float(np.percentile(ms, 99)),
+                "max_ms": float(ms.max()),
+            }
+            if name in self.alloc_peaks:
+                stats["alloc_peak_kb"] = float(np.max(self.alloc_peaks[name]) / 1024)
+                stats["alloc_mean_kb"] = float(np.mean(self.alloc_peaks[name]) / 1024)
+            stages[name] = stats
+        return stages
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None if unavailable."""
+    try:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is KB on Linux, bytes on macOS
+        return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+    except (ImportError, AttributeError):
+        return None
+
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_meta(**extra) -> dict:
+    meta = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+    }
+    meta.update(extra)
+    return meta
+
+
+def write_results(path: str, results: dict):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    print(f"Wrote {path}")
+
+
+def print_stage_table(stages: dict):
+    print(f"{'stage':<22}{'count':>8}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}  (ms)")
+    for name, s in stages.items():
+        line = (f"{name:<22}{s['count']:>8}{s['mean_ms']:>10.2f}{s['p50_ms']:>10.2f}"
+                f"{s['p95_ms']:>10.2f}{s['p99_ms']:>10.2f}")
+        if "alloc_peak_kb" in s:
+            line += f"  alloc peak {s['alloc_peak_kb']:.0f} KB"
+        print(line)
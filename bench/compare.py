@@ -0,0 +1,64 @@
+"""
+Diff two bench result JSON files (e.g. from bench/vision_bench.py on two commits).
+
+    python -m bench.compare bench_results/base.json bench_results/head.json --fail-pct 10
+
+Exits with status 1 if any stage's p50/p95 regresses by more than --fail-pct.
+"""
+
+import argparse
+import json
+import sys
+
+
+METRICS = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def pct_change(old: float, new: float) -> float:
+    if old == 0:
+        return 0.0 if new == 0 else float("inf")
+    return (new - old) / old * 100
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two bench result files")
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--fail-pct", type=float, default=None,
+                        help="Fail if p50 or p95 of any stage gets slower by more than this percentage")
+    args = parser.parse_args()
+
+    base, head = load(args.base), load(args.head)
+    print(f"base: {base['meta'].get('commit')}  head: {head['meta'].get('commit')}")
+
+    regressions = []
+    print(f"{'stage':<22}" + "".join(f"{m:>24}" for m in METRICS))
+    for name in sorted(set(base["stages"]) | set(head["stages"])):
+        b, h = base["stages"].get(name), head["stages"].get(name)
+        if b is None or h is None:
+            print(f"{name:<22}  only in {'head' if b is None else 'base'}")
+            continue
+        cells = []
+        for m in METRICS:
+            change = pct_change(b[m], h[m])
+            cells.append(f"{b[m]:.2f} -> {h[m]:.2f} ({change:+.0f}%)")
+            if args.fail_pct is not None and m != "p99_ms" and change > args.fail_pct:
+                regressions.append(f"{name} {m} {change:+.1f}%")
+        print(f"{name:<22}" + "".join(f"{c:>24}" for c in cells))
+
+    for key, label in (("fps", "fps"), ("peak_rss_mb", "peak RSS MB")):
+        if base.get(key) is not None and head.get(key) is not None:
+            print(f"{label}: {base[key]:.1f} -> {head[key]:.1f} ({pct_change(base[key], head[key]):+.0f}%)")
+
+    if regressions:
+        print("REGRESSIONS: " + ", ".join(regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
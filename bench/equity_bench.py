@@ -0,0 +1,78 @@
+"""
+EquityEstimator throughput, accuracy and early stopping.
+
+  1. trials/sec and evaluated hands/sec (hero + every opponent per trial)
+     for each street and 1 / 3 / 8 opponents at a fixed trial count;
+  2. preflop heads-up equities against published values;
+  3. the default early-stopping settings (config.EQUITY_*) on a few spots:
+     trials used, time, and whether the CI target or the frame budget
+     stopped the run.
+
+Run from the repo root:
+    python -m bench.equity_bench --trials 200000
+"""
+
+import argparse
+
+import config
+from bench.common import run_meta, write_results
+from poker.cards import parse_cards
+from poker.equity import EquityEstimator
+
+
+STREETS = {
+    "preflop": (),
+    "flop": ("Qh", "7c", "2s"),
+    "turn": ("Qh", "7c", "2s", "9d"),
+    "river": ("Qh", "7c", "2s", "9d", "3h"),
+}
+HERO = ("Ah", "10d")
+
+# Heads-up preflop equity vs a random hand (all-in to the river)
+REFERENCE = {("Ah", "As"): 0.8520, ("Ah", "Kd"): 0.6540, ("7h", "2c"): 0.3460, ("5s", "5d"): 0.6032}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo equity benchmark")
+    parser.add_argument("--trials", type=int, default=200000, help="Trials per throughput run")
+    parser.add_argument("--opponents", type=int, nargs="+", default=[1, 3, 8])
+    parser.add_argument("--batch", type=int, default=config.EQUITY_BATCH)
+    parser.add_argument("--out", default=None, help="Write JSON results here")
+    args = parser.parse_args()
+    estimator = EquityEstimator(batch=args.batch, seed=0)
+    estimator.equity(parse_cards(HERO), max_trials=args.batch, time_budget_s=None)  # load tables
+    results = {"meta": run_meta(args=vars(args)), "throughput": {}, "reference": {}, "early_stop": {}}
+
+    print(f"{args.trials} trials per run, batch {args.batch}:")
+    for street, board in STREETS.items():
+        for opponents in args.opponents:
+            r = estimator.equity(parse_cards(HERO), parse_cards(board), opponents, ci_target=0,
+                                 max_trials=args.trials, time_budget_s=None)
+            trials_s = r.trials / r.elapsed_s
+            results["throughput"][f"{street}/{opponents}"] = {
+                "trials_per_s": trials_s, "hands_per_s": trials_s * (1 + opponents), "equity": r.equity}
+            print(f"  {street:8} {opponents} opp: {trials_s / 1e6:5.2f}M trials/s, "
+                  f"{trials_s * (1 + opponents) / 1e6:5.2f}M hands/s  (equity {100 * r.equity:.1f}%)")
+
+    print("heads-up preflop vs published equity:")
+    for hero, expected in REFERENCE.items():
+        r = estimator.equity(parse_cards(hero), ci_target=0.002, max_trials=2000000, time_budget_s=None)
+        within = abs(r.equity - expected) <= r.ci_halfwidth + 0.001
+        results["reference"]["".join(hero)] = {"equity": r.equity, "expected": expected, "ok": within}
+        print(f"  {''.join(hero):6} {100 * r.equity:5.2f}% +/- {100 * r.ci_halfwidth:.2f} "
+              f"(published {100 * expected:.2f}%)  {'OK' if within else 'OFF'}")
+
+    print(f"early stopping (CI target {config.EQUITY_CI_TARGET}, budget {1000 * config.EQUITY_TIME_BUDGET_S:.0f} ms):")
+    for street, board in STREETS.items():
+        for opponents in (1, max(args.opponents)):
+            r = estimator.equity(parse_cards(HERO), parse_cards(board), opponents)
+            results["early_stop"][f"{street}/{opponents}"] = {
+                "trials": r.trials, "ms": r.elapsed_s * 1000, "ci": r.ci_halfwidth, "converged": r.converged}
+            print(f"  {street:8} {opponents} opp: {r}  {'converged' if r.converged else 'budget hit'}")
+
+    if args.out:
+        write_results(args.out, results)
+
+
+if __name__ == "__main__":
+    main()
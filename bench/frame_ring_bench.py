@@ -0,0 +1,170 @@
+"""
+SharedFrameRing checks and timings:
+
+  1. hand-off cost per frame: a private copy per consumer (what the pipeline
+     and TableWorkerPool did) vs. one ring write + read-only views;
+  2. a reader in another process following the ring in order while the
+     writer runs ahead: every frame it sees must carry its own sequence
+     number (no torn or stale reads) and skipped frames must be reported
+     as dropped;
+  3. optionally TableWorkerPool fed by copy vs. by ring reference, with a
+     label parity check (--pool-workers, needs the card model).
+
+Run from the repo root:
+    python -m bench.frame_ring_bench
+    python -m bench.frame_ring_bench --pool-workers 2 --tables 6
+"""
+
+import argparse
+import multiprocessing as mp
+import time
+
+import numpy as np
+
+from bench.common import run_meta, write_results
+from capture.frame_ring import SharedFrameRing
+
+
+def stamp(frame: np.ndarray, seq: int):
+    # Sequence number in the first and last row, so a torn frame shows as a mismatch
+    frame[0, :8, 0] = np.frombuffer(np.int64(seq).tobytes(), np.uint8)
+    frame[-1, -8:, 0] = frame[0, :8, 0]
+
+
+def stamped_seq(frame: np.ndarray) -> int:
+    first = int(np.frombuffer(frame[0, :8, 0].tobytes(), np.int64)[0])
+    last = int(np.frombuffer(frame[-1, -8:, 0].tobytes(), np.int64)[0])
+    return first if first == last else -1
+
+
+def handoff_ms(frame: np.ndarray, consumers: int, iters: int, slots: int) -> dict:
+    t0 = time.perf_counter()
+    for _ in range(iters):
+        views = [frame.copy() for _ in range(consumers)]
+    copy_ms = (time.perf_counter() - t0) / iters * 1000
+
+    with SharedFrameRing(frame.shape, frame.dtype, slots=slots) as ring:
+        t0 = time.perf_counter()
+        for _ in range(iters):
+            seq = ring.write(frame)
+            views = [ring.read(seq) for _ in range(consumers)]
+        ring_ms = (time.perf_counter() - t0) / iters * 1000
+        del views
+    return {"copy_ms": copy_ms, "ring_ms": ring_ms}
+
+
+def _follow(ring_name: str, reader_id: int, frames: int, delay_s: float, out: mp.Queue):
+    ring = SharedFrameRing.attach(ring_name)
+    reader = ring.reader(reader_id, start_at_latest=False)
+    seen = stale = bad = 0
+    while reader.cursor < frames:
+        item = reader.next(timeout=5.0)
+        if item is None:
+            break
+        seq, frame = item
+        time.sleep(delay_s)  # simulated work while holding the view
+        # A view is only trustworthy if the slot still holds seq after use
+        if ring.is_current(seq):
+            seen += 1
+            bad += stamped_seq(frame) != seq
+        else:
+            stale += 1
+        del frame, item
+    out.put({"seen": seen, "stale": stale, "bad": bad, "dropped": reader.dropped, "last": reader.cursor})
+    del reader
+    ring.close()
+
+
+def follow_check(shape, frames: int, slots: int, fps: float, delay_s: float) -> dict:
+    ctx = mp.get_context("spawn")
+    out = ctx.Queue()
+    with SharedFrameRing(shape, np.uint8, slots=slots, max_readers=1) as ring:
+        proc = ctx.Process(target=_follow, args=(ring.name, 0, frames, delay_s, out))
+        proc.start()
+        frame = np.zeros(shape, np.uint8)
+        time.sleep(2.0)  # let the reader attach before the first frame
+        for _ in range(frames):
+            seq, view = ring.begin_write()
+            view[...] = frame
+            stamp(view, seq)
+            ring.commit(seq)
+            time.sleep(1.0 / fps)
+        del view
+        result = out.get(timeout=30)
+        proc.join(10)
+    result["written"] = frames
+    return result
+
+
+def pool_check(n_workers: int, n_tables: int, n_frames: int, slots: int) -> dict:
+    from app.worker_pool import TableWorkerPool, WorkerSettings
+    from bench.worker_scaling_bench import labels_of, synthetic_frames
+
+    frames, tables = synthetic_frames(n_tables, n_frames)
+    out = {}
+    with SharedFrameRing(frames[0].shape, frames[0].dtype, slots=slots) as ring:
+        for mode in ("copy", "ring"):
+            with TableWorkerPool(n_workers, WorkerSettings()) as pool:
+                pool.analyze(frames[0], tables)  # warm up
+                labels = []
+                t0 = time.perf_counter()
+                for frame in frames:
+                    if mode == "ring":
+                        seq = ring.write(frame)
+                        labels.append(labels_of(pool.analyze(ring.read(seq), tables, ring_ref=(ring.name, seq))))
+                    else:
+                        labels.append(labels_of(pool.analyze(frame, tables)))
+                out[mode] = {"ms_per_frame": (time.perf_counter() - t0) / n_frames * 1000, "labels": labels}
+    mismatches = sum(a != b for fa, fb in zip(out["copy"]["labels"], out["ring"]["labels"]) for a, b in zip(fa, fb))
+    return {mode: {"ms_per_frame": r["ms_per_frame"]} for mode, r in out.items()} | {"label_mismatches": mismatches}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SharedFrameRing benchmark")
+    parser.add_argument("--width", type=int, default=2560)
+    parser.add_argument("--height", type=int, default=1440)
+    parser.add_argument("--consumers", type=int, default=3, help="Consumers per frame in the hand-off test")
+    parser.add_argument("--iters", type=int, default=50)
+    parser.add_argument("--slots", type=int, default=8)
+    parser.add_argument("--follow-frames", type=int, default=120)
+    parser.add_argument("--fps", type=float, default=60)
+    parser.add_argument("--reader-delay-ms", type=float, default=40,
+                        help="Per-frame work of the cross-process reader (slower than --fps causes drops)")
+    parser.add_argument("--pool-workers", type=int, default=0)
+    parser.add_argument("--tables", type=int, default=6)
+    parser.add_argument("--out", default=None, help="Write JSON results here")
+    args = parser.parse_args()
+
+    shape = (args.height, args.width, 3)
+    frame = np.random.default_rng(0).integers(0, 255, shape, dtype=np.uint8)
+    results = {"meta": run_meta(args=vars(args))}
+
+    h = handoff_ms(frame, args.consumers, args.iters, args.slots)
+    results["handoff"] = h
+    print(f"{args.width}x{args.height}, {args.consumers} consumers per frame:")
+    print(f"  private copies {h['copy_ms']:7.2f} ms/frame")
+    print(f"  ring + views   {h['ring_ms']:7.2f} ms/frame")
+
+    f = follow_check(shape, args.follow_frames, args.slots, args.fps, args.reader_delay_ms / 1000)
+    results["follow"] = f
+    # Every sequence number up to the cursor was either read or reported dropped
+    ok = f["bad"] == 0 and f["seen"] + f["stale"] + f["dropped"] == f["last"]
+    print(f"cross-process reader ({args.reader_delay_ms:.0f} ms/frame vs {args.fps:.0f} fps writer):")
+    print(f"  written {f['written']}, seen {f['seen']}, reported dropped {f['dropped']}, "
+          f"overwritten while held {f['stale']}, torn {f['bad']}  {'OK' if ok else 'FAILED'}")
+
+    if args.pool_workers:
+        p = pool_check(args.pool_workers, args.tables, 30, args.slots)
+        results["pool"] = p
+        print(f"TableWorkerPool, {args.pool_workers} workers, {args.tables} tables:")
+        print(f"  copy to pool segment {p['copy']['ms_per_frame']:7.2f} ms/frame")
+        print(f"  ring reference       {p['ring']['ms_per_frame']:7.2f} ms/frame")
+        parity = "OK" if p["label_mismatches"] == 0 else f"{p['label_mismatches']} tables differ"
+        print(f"  parity: {parity}")
+
+    if args.out:
+        write_results(args.out, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+HandEvaluator throughput and a correctness check.
+
+  1. table build time and the cold load of the cached tables;
+  2. every one of the 2,598,960 five-card hands is evaluated and the
+     per-category counts are compared with the known totals;
+  3. random 7-card hands: each value must equal the best of its 21
+     five-card subsets;
+  4. hands/sec of evaluate_batch per hand size and batch size, and of the
+     scalar evaluate().
+
+Run from the repo root:
+    python -m bench.hand_eval_bench --hands 1000000
+"""
+
+import argparse
+import itertools
+import tempfile
+import time
+
+import numpy as np
+
+from bench.common import run_meta, write_results
+from poker.evaluator import HAND_CATEGORIES, EVALUATOR, HandEvaluator, build_tables
+
+
+# Five-card hands per category, high card .. straight flush
+EXPECTED_5 = (1302540, 1098240, 123552, 54912, 10200, 5108, 3744, 624, 40)
+
+
+def random_hands(n: int, k: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return np.argsort(rng.random((n, 52)), axis=1)[:, :k].astype(np.uint8)
+
+
+def rate(fn, n_hands: int, repeats: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return n_hands / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hand evaluator benchmark")
+    parser.add_argument("--hands", type=int, default=1000000, help="Hands per throughput run")
+    parser.add_argument("--check", type=int, default=100000, help="Random 7-card hands checked against subsets")
+    parser.add_argument("--out", default=None, help="Write JSON results here")
+    args = parser.parse_args()
+    results = {"meta": run_meta(args=vars(args))}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        t0 = time.perf_counter()
+        build_tables(tmp)
+        build_s = time.perf_counter() - t0
+        cold = HandEvaluator(tmp)
+        t0 = time.perf_counter()
+        cold.evaluate_batch(random_hands(1000, 7))
+        load_ms = (time.perf_counter() - t0) * 1000
+        del cold
+    results["build_s"], results["load_ms"] = build_s, load_ms
+    print(f"tables: build {build_s:.2f} s, first 7-card batch from cache {load_ms:.1f} ms")
+
+    all5 = np.array(list(itertools.combinations(range(52), 5)), dtype=np.uint8)
+    values = EVALUATOR.evaluate_batch(all5)
+    counts = np.bincount(EVALUATOR.table("category")[values], minlength=len(HAND_CATEGORIES)).tolist()
+    distinct = len(np.unique(values))
+    ok5 = tuple(counts) == EXPECTED_5 and distinct == 7462
+    results["five_card"] = {"counts": dict(zip(HAND_CATEGORIES, counts)), "distinct": distinct, "ok": ok5}
+    print(f"all five-card hands: {distinct} distinct values, category counts {'OK' if ok5 else 'FAILED'}")
+    if not ok5:
+        print(f"  got {counts}")
+
+    hands = random_hands(args.check, 7, seed=1)
+    subsets = [EVALUATOR.evaluate_batch(hands[:, list(c)]) for c in itertools.combinations(range(7), 5)]
+    mismatches = int((np.max(subsets, axis=0) != EVALUATOR.evaluate_batch(hands)).sum())
+    results["seven_card_mismatches"] = mismatches
+    print(f"{args.check} random 7-card hands vs best 5-card subset: "
+          f"{'OK' if not mismatches else f'{mismatches} differ'}")
+
+    throughput = {}
+    print("evaluate_batch hands/sec:")
+    for k in (5, 6, 7):
+        for batch in (1000, 10000, 100000):
+            batches = [random_hands(batch, k, seed=i) for i in range(max(1, args.hands // batch))]
+            n = batch * len(batches)
+            throughput[f"{k}x{batch}"] = rate(lambda: [EVALUATOR.evaluate_batch(b) for b in batches], n)
+        print("  " + f"{k} cards: " + ", ".join(
+            f"batch {b:>6} {throughput[f'{k}x{b}'] / 1e6:5.2f}M" for b in (1000, 10000, 100000)))
+    scalar_hands = random_hands(20000, 7).tolist()
+    throughput["scalar7"] = rate(lambda: [EVALUATOR.evaluate(h) for h in scalar_hands], len(scalar_hands))
+    print(f"  evaluate() one 7-card hand at a time: {throughput['scalar7'] / 1e3:.0f}k/s")
+    results["hands_per_s"] = throughput
+
+    if args.out:
+        write_results(args.out, results)
+
+
+if __name__ == "__main__":
+    main()
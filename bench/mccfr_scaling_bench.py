@@ -0,0 +1,88 @@
+"""
+Parallel MCCFR scaling: iterations/sec for 1..N worker processes and
+exploitability over wall-clock time.
+
+  1. throughput: for workers = 0 (in-process) and 1..--max-workers, run
+     --seconds of ParallelMCCFR rounds and report iterations/sec, speedup
+     over one worker and worker utilization (traversal time over
+     workers x wall-clock; the rest is merging and pool overhead);
+  2. convergence: exploitability (pots) against solving time for the same
+     worker counts, next to the exact vector-form CFR+ solver.
+
+With more workers than cores the extra processes only time-share, so the
+speedup column flattens at the core count (os.cpu_count() is printed).
+
+Run from the repo root:
+    python -m bench.mccfr_scaling_bench --streets 2 --buckets 50 --max-workers 8
+"""
+
+import argparse
+import os
+
+from bench.common import peak_rss_mb, run_meta, write_results
+from poker.cfr import CardAbstraction, CFRSolver, GameTree, TreeConfig
+from poker.mccfr import ParallelMCCFR
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel MCCFR scaling benchmark")
+    parser.add_argument("--streets", type=int, default=2)
+    parser.add_argument("--stack", type=float, default=4.0, help="Effective stack in starting pots")
+    parser.add_argument("--buckets", type=int, default=50, help="Card buckets per street")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--sync-every", type=int, default=200, help="Iterations per worker between merges")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Solving time per throughput run")
+    parser.add_argument("--converge-seconds", type=float, default=30.0)
+    parser.add_argument("--evals", type=int, default=6, help="Exploitability samples per convergence run")
+    parser.add_argument("--out", default=None, help="Write JSON results here")
+    args = parser.parse_args()
+    results = {"meta": run_meta(args=vars(args)), "throughput": {}, "convergence": {}}
+    cfg = TreeConfig(bet_sizes=(0.5, 1.0), stack=args.stack, streets=args.streets)
+    abstraction = CardAbstraction.uniform(args.buckets, args.streets)
+    counts = [0] + list(range(1, args.max_workers + 1))
+
+    print(f"{args.streets} street(s), stack {args.stack:g} pots, {args.buckets} buckets/street, "
+          f"sync every {args.sync_every} iterations, {os.cpu_count()} cores")
+    print(f"  {'workers':>7} {'it/s':>9} {'speedup':>8} {'utilization':>12}")
+    single = None
+    for workers in counts:
+        with ParallelMCCFR(cfg, abstraction, workers=workers, sync_every=args.sync_every) as solver:
+            solver.run_round()  # pool start-up and first imports are not throughput
+            solver.iteration = solver.elapsed_s = solver.busy_s = 0
+            solver.solve(seconds=args.seconds)
+            stats = solver.stats()
+        if workers == 1:
+            single = stats["iterations_per_s"]
+        stats["speedup"] = stats["iterations_per_s"] / single if single and workers else None
+        results["throughput"][workers] = stats
+        label = "local" if workers == 0 else str(workers)
+        speedup = f"{stats['speedup']:.2f}x" if stats["speedup"] else "-"
+        print(f"  {label:>7} {stats['iterations_per_s']:>9.0f} {speedup:>8} {stats['utilization']:>12.2f}")
+
+    print(f"convergence: exploitability (pots) by solving time, {args.converge_seconds:g} s per run")
+    every = args.converge_seconds / args.evals
+    for workers in counts:
+        with ParallelMCCFR(cfg, abstraction, workers=workers, sync_every=args.sync_every) as solver:
+            history = solver.solve(seconds=args.converge_seconds, eval_every_s=every)
+        results["convergence"][f"mccfr-{workers}"] = history
+        label = "local" if workers == 0 else f"{workers}w"
+        print(f"  mccfr {label:>5} " + "  ".join(f"{r['seconds']:5.1f}s {r['exploitability']:.4f}" for r in history))
+
+    exact = CFRSolver(GameTree(cfg), abstraction)
+    history = []
+    while exact.elapsed_s < args.converge_seconds:
+        exact.iterate()
+        if exact.elapsed_s >= every * (len(history) + 1) or exact.elapsed_s >= args.converge_seconds:
+            history.append({"iteration": exact.iteration, "seconds": exact.elapsed_s,
+                            "exploitability": exact.exploitability()})
+    results["convergence"]["cfr+"] = history
+    print(f"  {'cfr+ exact':>11} " + "  ".join(f"{r['seconds']:5.1f}s {r['exploitability']:.4f}" for r in history))
+
+    results["peak_rss_mb"] = peak_rss_mb()
+    print(f"peak RSS {results['peak_rss_mb']:.0f} MB")
+    if args.out:
+        write_results(args.out, results)
+
+
+if __name__ == "__main__":
+    main()
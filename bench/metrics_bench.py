@@ -0,0 +1,110 @@
+"""
+Overhead of app.metrics on the per-table analysis loop, and a check of the
+Prometheus / JSON exports.
+
+analyze_tables runs over the same synthetic frames with the registry enabled
+and disabled, in alternating rounds so drift and noise hit both equally; the
+overhead is the difference in median frame time. A MetricsExporter is then
+started on a local port and its /metrics output is parsed back.
+
+Run from the repo root:
+    python -m bench.metrics_bench --tables 6 --rounds 5
+"""
+
+import argparse
+import time
+import urllib.request
+
+import numpy as np
+
+import config
+from app.analysis import analyze_tables
+from app.metrics import METRICS, MetricsExporter, MetricsRegistry, summarize
+from bench.common import run_meta, write_results
+from bench.worker_scaling_bench import synthetic_frames
+from vision.card_cache import CardCache
+from vision.card_detector import CardClassifier
+from vision.player_detector import PlayerDetector
+from vision.template_matcher import CascadeCardClassifier, TemplateCardMatcher
+
+
+CARD_MODEL_PATH = "vision/models/tiny_corner_net_best_cardv4.pt"
+
+
+def observe_cost_us(n: int = 200000) -> float:
+    registry = MetricsRegistry()
+    t0 = time.perf_counter()
+    for i in range(n):
+        with registry.timer("stage", table=i & 7):
+            pass
+    return (time.perf_counter() - t0) / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Metrics overhead benchmark")
+    parser.add_argument("--tables", type=int, default=6)
+    parser.add_argument("--frames", type=int, default=40)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--port", type=int, default=9464)
+    parser.add_argument("--out", default=None, help="Write JSON results here")
+    args = parser.parse_args()
+
+    frames, tables = synthetic_frames(args.tables, args.frames)
+    player_detector = PlayerDetector(nms_overlap_threshold=config.NMS_OVERLAP_THRESHOLD)
+    cnn = CardClassifier(CARD_MODEL_PATH, backend=config.CARD_BACKEND)
+    METRICS.instrument(cnn, "predict_corners", "card_cnn")
+    card_clf = CascadeCardClassifier(TemplateCardMatcher(), cnn)
+    # No card cache, so every frame does the full amount of work
+    card_cache = CardCache(diff_threshold=-1.0)
+
+    def frame_times():
+        samples = []
+        for frame in frames:
+            t0 = time.perf_counter()
+            analyze_tables(frame, tables, player_detector, card_clf, card_cache)
+            samples.append(time.perf_counter() - t0)
+        return samples
+
+    frame_times()  # warm up
+    times = {True: [], False: []}
+    for _ in range(args.rounds):
+        for enabled in (False, True):
+            METRICS.enabled = enabled
+            times[enabled] += frame_times()
+    METRICS.enabled = True
+
+    off_ms = float(np.median(times[False]) * 1000)
+    on_ms = float(np.median(times[True]) * 1000)
+    per_obs_us = observe_cost_us()
+    obs_per_frame = sum(h.count for h in METRICS.snapshot().values()) / (args.rounds * args.frames)
+    print(f"{args.tables} tables, {args.rounds} x {args.frames} frames per mode")
+    print(f"  metrics off {off_ms:8.3f} ms/frame (median)")
+    print(f"  metrics on  {on_ms:8.3f} ms/frame (median), {obs_per_frame:.1f} observations/frame")
+    print(f"  measured overhead {100 * (on_ms - off_ms) / off_ms:+.2f}% (noise included)")
+    print(f"  isolated cost {per_obs_us:.2f} us/observation -> "
+          f"{100 * per_obs_us * obs_per_frame / 1000 / off_ms:.3f}% of frame time")
+
+    exporter = MetricsExporter(http_port=args.port, json_log=False)
+    exporter.start()
+    try:
+        text = urllib.request.urlopen(f"http://127.0.0.1:{args.port}/metrics", timeout=5).read().decode()
+    finally:
+        exporter.stop()
+    series = [line for line in text.splitlines() if line.startswith("pokerbot_stage_seconds_count")]
+    print(f"  /metrics: {len(text.splitlines())} lines, {len(series)} stage series, e.g.")
+    for line in series[:4]:
+        print(f"    {line}")
+    print(f"  JSON line: {exporter.json_line()[:200]}...")
+
+    results = {
+        "meta": run_meta(tables=args.tables, frames=args.frames, rounds=args.rounds),
+        "off_ms": off_ms, "on_ms": on_ms,
+        "observe_us": per_obs_us, "observations_per_frame": obs_per_frame,
+        "stages": summarize(METRICS.snapshot()),
+    }
+    if args.out:
+        write_results(args.out, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Check and time PlayerDetector's array-based exclusion groups + NMS against the
+previous list-based implementation (kept below as the reference).
+
+Random confidences/occupancy are drawn over the real SEAT_ROIS layout of many
+tables. Every table must produce the same kept seats with both implementations.
+
+Run from the repo root:
+    python -m bench.nms_bench --tables 12 --iters 2000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+import config
+from state.table_state import TableBox
+from vision.player_detector import PlayerDetector, PlayerSeat
+
+
+def reference_intersection_over_min(box_a, box_b) -> float:
+    x1_a, y1_a, x2_a, y2_a = box_a
+    x1_b, y1_b, x2_b, y2_b = box_b
+
+    xi1 = max(x1_a, x1_b)
+    yi1 = max(y1_a, y1_b)
+    xi2 = min(x2_a, x2_b)
+    yi2 = min(y2_a, y2_b)
+
+    if xi2 < xi1 or yi2 < yi1:
+        return 0.0
+
+    intersection = (xi2 - xi1) * (yi2 - yi1)
+
+    area_a = (x2_a - x1_a) * (y2_a - y1_a)
+    area_b = (x2_b - x1_b) * (y2_b - y1_b)
+    min_area = min(area_a, area_b)
+
+    if min_area == 0:
+        return 0.0
+
+    return intersection / min_area
+
+
+def reference_nms(candidates, threshold):
+    if len(candidates) <= 1:
+        return candidates
+
+    sorted_candidates = sorted(candidates, key=lambda x: x.confidence, reverse=True)
+
+    keep = []
+    suppressed = set()
+
+    for i, cand_i in enumerate(sorted_candidates):
+        if i in suppressed:
+            continue
+
+        keep.append(cand_i)
+
+        box_i = (cand_i.x1, cand_i.y1, cand_i.x2, cand_i.y2)
+        for j in range(i + 1, len(sorted_candidates)):
+            if j in suppressed:
+                continue
+
+            cand_j = sorted_candidates[j]
+            box_j = (cand_j.x1, cand_j.y1, cand_j.x2, cand_j.y2)
+
+            if reference_intersection_over_min(box_i, box_j) > threshold:
+                suppressed.add(j)
+
+    return keep
+
+
+def reference_exclusion_groups(occupied):
+    by_name = {p.seat_name: p for p in occupied}
+    to_remove = set()
+
+    for group in config.SEAT_EXCLUSION_GROUPS:
+        present = [by_name[name] for name in group if name in by_name]
+        if len(present) <= 1:
+            continue
+
+        best = max(present, key=lambda p: p.confidence)
+        for p in present:
+            if p.seat_name != best.seat_name:
+                to_remove.add(p.seat_name)
+
+    return [p for p in occupied if p.seat_name not in to_remove]
+
+
+def reference_resolve(seat_names, boxes, confidences, occupied, threshold):
+    candidates = [
+        PlayerSeat(seat_name=name, seat_id=i, x1=int(b[0]), y1=int(b[1]), x2=int(b[2]), y2=int(b[3]),
+                   edge_ratio=0.0, laplacian_var=0.0, confidence=float(c), is_occupied=bool(o))
+        for i, (name, b, c, o) in enumerate(zip(seat_names, boxes, confidences, occupied))
+    ]
+    occupied_candidates = reference_exclusion_groups([c for c in candidates if c.is_occupied])
+    kept = reference_nms(occupied_candidates, threshold)
+    mask = np.zeros(len(candidates), dtype=bool)
+    mask[[c.seat_id for c in kept]] = True
+    return mask
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exclusion groups + NMS benchmark")
+    parser.add_argument("--tables", type=int, default=12)
+    parser.add_argument("--iters", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    detector = PlayerDetector(nms_overlap_threshold=config.NMS_OVERLAP_THRESHOLD)
+    frame_shape = (1440, 2560, 3)
+
+    boxes = []
+    for _ in range(args.tables):
+        x1, y1 = rng.integers(0, 1600), rng.integers(0, 800)
+        w = int(rng.integers(600, 950))
+        table = TableBox(int(x1), int(y1), int(x1 + w), int(y1 + w * 0.74))
+        boxes.append(detector.layouts.get(table, frame_shape).seat_boxes)
+    boxes = np.stack(boxes)  # [T, n_seats, 4]
+    seat_names = list(detector.seat_coords)
+
+    # Parity on many random occupancy patterns (with some tied confidences)
+    mismatches = 0
+    for _ in range(args.iters):
+        confidences = np.round(rng.random(boxes.shape[:2]), 2)
+        occupied = rng.random(boxes.shape[:2]) < 0.6
+        fast = detector.resolve_occupied(boxes, confidences, occupied)
+        for t in range(args.tables):
+            ref = reference_resolve(seat_names, boxes[t], confidences[t], occupied[t], detector.nms_overlap_threshold)
+            mismatches += int(not np.array_equal(ref, fast[t]))
+    print(f"parity: {mismatches} mismatching tables out of {args.iters * args.tables}")
+
+    confidences = rng.random(boxes.shape[:2])
+    occupied = rng.random(boxes.shape[:2]) < 0.6
+
+    start = time.perf_counter()
+    for _ in range(args.iters):
+        for t in range(args.tables):
+            reference_resolve(seat_names, boxes[t], confidences[t], occupied[t], detector.nms_overlap_threshold)
+    ref_us = (time.perf_counter() - start) / args.iters * 1e6
+
+    start = time.perf_counter()
+    for _ in range(args.iters):
+        for t in range(args.tables):
+            detector.resolve_occupied(boxes[t], confidences[t], occupied[t])
+    per_table_us = (time.perf_counter() - start) / args.iters * 1e6
+
+    start = time.perf_counter()
+    for _ in range(args.iters):
+        detector.resolve_occupied(boxes, confidences, occupied)
+    batched_us = (time.perf_counter() - start) / args.iters * 1e6
+
+    print(f"{args.tables} tables, per frame:")
+    print(f"  reference (lists):     {ref_us:8.1f} us  (includes PlayerSeat construction)")
+    print(f"  arrays, table by table:{per_table_us:8.1f} us")
+    print(f"  arrays, all tables:    {batched_us:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Preflop decision cost: PreflopEquityTable lookups vs. Monte Carlo on demand,
+plus a spot check of the built table against fresh high-trial estimates.
+
+Needs the table (python -m poker.preflop). Run from the repo root:
+    python -m bench.preflop_bench
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from bench.common import run_meta, write_results
+from poker.cards import parse_card
+from poker.equity import EquityEstimator
+from poker.preflop import PREFLOP, class_combo, hand_class_name
+from state.table_state import TableState
+
+
+SPOT_CHECK = ("AA", "AKs", "AKo", "T9s", "55", "72o")
+
+
+def per_call_us(fn, n: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Preflop table benchmark")
+    parser.add_argument("--calls", type=int, default=100000)
+    parser.add_argument("--check-trials", type=int, default=400000)
+    parser.add_argument("--out", default=None, help="Write JSON results here")
+    args = parser.parse_args()
+    results = {"meta": run_meta(args=vars(args))}
+
+    t0 = time.perf_counter()
+    PREFLOP.equity(parse_card("Ah"), parse_card("As"))
+    load_ms = (time.perf_counter() - t0) * 1000
+
+    c1, c2 = parse_card("Ah"), parse_card("10h")
+    state = TableState(0, hero=("Ah", "10h"), occupied=0b10110)
+    estimator = EquityEstimator(seed=0)
+    timings = {
+        "card ids": per_call_us(lambda: PREFLOP.equity(c1, c2, 3), args.calls),
+        "labels": per_call_us(lambda: PREFLOP.from_labels("Ah", "10h", 3), args.calls),
+        "TableState": per_call_us(lambda: PREFLOP.for_state(state), args.calls),
+        "Monte Carlo (config defaults)": per_call_us(lambda: estimator.equity((c1, c2), (), 3), 50),
+    }
+    results["load_ms"], results["us_per_call"] = load_ms, timings
+    print(f"first lookup (maps the file) {load_ms:.2f} ms; ATs vs 3 opponents = {PREFLOP.for_state(state):.4f}")
+    for name, us in timings.items():
+        print(f"  {name:30} {us:10.2f} us/call")
+
+    print(f"table vs fresh estimate ({args.check_trials} trials):")
+    names = {hand_class_name(i): i for i in range(169)}
+    checks = {}
+    for name in SPOT_CHECK:
+        idx = names[name]
+        for opponents in (1, 4, 8):
+            r = estimator.equity(class_combo(idx), (), opponents, ci_target=0, max_trials=args.check_trials,
+                                 time_budget_s=None)
+            stored = PREFLOP.class_equity(idx, opponents)
+            stored_se = float(PREFLOP.table[1, idx, opponents - 1])
+            # Both are estimates: allow 3 standard errors of their difference
+            ok = abs(stored - r.equity) <= 3 * np.hypot(stored_se, r.std_error)
+            checks[f"{name}/{opponents}"] = {"table": stored, "fresh": r.equity, "ok": bool(ok)}
+            print(f"  {name:4} vs {opponents}: table {100 * stored:5.2f}%  fresh {100 * r.equity:5.2f}%  "
+                  f"{'OK' if ok else 'OFF'}")
+    results["spot_check"] = checks
+
+    if args.out:
+        write_results(args.out, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Compare per-card preprocessing latency of the torchvision/PIL path and the cv2 path
+in CardClassifier, and check that both produce the same input tensor.
+
+Run from the repo root:
+    python -m bench.preprocess_bench --batch 14 --iters 500
+"""
+
+import argparse
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+
+from vision.card_detector import CardClassifier
+
+
+CARD_MODEL_PATH = "vision/models/tiny_corner_net_best_cardv4.pt"
+CARDS_DIR = "vision/models/52cards"
+
+
+def load_crops(batch: int):
+    paths = sorted(glob.glob(os.path.join(CARDS_DIR, "*.png")))
+    images = [cv2.imread(p) for p in paths]
+    return [images[i % len(images)] for i in range(batch)]
+
+
+def time_per_card(fn, crops, iters: int) -> float:
+    fn(crops)  # warmup
+    start = time.perf_counter()
+    for _ in range(iters):
+        fn(crops)
+    elapsed = time.perf_counter() - start
+    return elapsed / (iters * len(crops)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CardClassifier preprocessing benchmark")
+    parser.add_argument("--batch", type=int, default=14, help="Crops per call (7 ROIs x 2 tables)")
+    parser.add_argument("--iters", type=int, default=500)
+    parser.add_argument("--weights", default=CARD_MODEL_PATH)
+    args = parser.parse_args()
+
+    clf = CardClassifier(weights_path=args.weights, device="cpu")
+    crops = load_crops(args.batch)
+
+    ref = clf.preprocess_tv(crops).numpy()
+    fast = clf.preprocess_cv2(crops).numpy()
+    max_diff = float(np.abs(ref - fast).max())
+
+    tv_us = time_per_card(clf.preprocess_tv, crops, args.iters)
+    cv_us = time_per_card(clf.preprocess_cv2, crops, args.iters)
+
+    print(f"batch={args.batch} iters={args.iters}")
+    print(f"  torchvision/PIL: {tv_us:8.1f} us/card")
+    print(f"  cv2 buffer:      {cv_us:8.1f} us/card  ({tv_us / cv_us:.1f}x)")
+    print(f"  max abs diff:    {max_diff:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Check and time PlayerDetector seat scoring against the original per-ROI
+implementation (CV_64F Laplacian + np.var, np.count_nonzero), kept below as
+the reference.
+
+Synthetic frames: noisy felt with several tables, about half the seats
+covered by a coloured panel with text. For every seat both are compared:
+  - Laplacian variance relative difference and edge ratio absolute difference
+    (both should be at rounding level, scoring is still per ROI);
+  - seats whose occupied/empty decision differs (should be none);
+  - scoring time for all tables of a frame, and full detect_tables() time.
+
+Run from the repo root:
+    python -m bench.seat_score_bench --tables 3 --frames 20
+"""
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+import config
+from state.table_state import TableBox
+from vision.player_detector import PlayerDetector
+
+
+def reference_scores(detector: PlayerDetector, frame: np.ndarray, boxes: np.ndarray):
+    edge_ratios, laplacian_vars = [], []
+    for x1, y1, x2, y2 in boxes.tolist():
+        roi = frame[y1:y2, x1:x2]
+        if roi.size == 0:
+            edge_ratios.append(0.0)
+            laplacian_vars.append(0.0)
+            continue
+        roi_gray = detector._to_grayscale(roi)
+        edges = cv2.Canny(roi_gray, detector.canny_low, detector.canny_high)
+        edge_ratios.append(float(np.count_nonzero(edges)) / edges.size)
+        laplacian_vars.append(float(np.var(cv2.Laplacian(roi_gray, cv2.CV_64F))))
+    return np.array(edge_ratios), np.array(laplacian_vars)
+
+
+def synthetic_frame(rng, detector: PlayerDetector, tables, shape, felt_noise: float) -> np.ndarray:
+    frame = np.empty(shape, dtype=np.float32)
+    frame[:] = (30, 90, 40)
+    frame += rng.normal(0, felt_noise, shape[:2] + (1,))
+    frame = np.clip(frame, 0, 255).astype(np.uint8)
+    for table in tables:
+        for x1, y1, x2, y2 in detector.layouts.get(table, shape).seat_boxes.tolist():
+            if rng.random() < 0.5 or x2 - x1 < 10 or y2 - y1 < 10:
+                continue
+            color = tuple(int(v) for v in rng.integers(0, 255, 3))
+            cv2.rectangle(frame, (x1 + 3, y1 + 3), (x2 - 3, y2 - 3), color, -1)
+            for line in range(3):
+                cv2.putText(frame, f"Player{rng.integers(99)} {rng.integers(5, 200)}bb", (x1 + 5, y1 + 15 + 14 * line),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1)
+    return frame
+
+
+def best_ms(run, iters: int, repeats: int = 5) -> float:
+    """Min over repeats of the mean time per call, in ms (robust to a busy machine)."""
+    run()
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        for _ in range(iters):
+            run()
+        best = min(best, (time.perf_counter() - t0) / iters * 1000)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seat scoring check and benchmark")
+    parser.add_argument("--tables", type=int, default=3)
+    parser.add_argument("--frames", type=int, default=20)
+    parser.add_argument("--felt-noise", type=float, default=3.0, help="Std of the felt noise (grey levels)")
+    parser.add_argument("--iters", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    cv2.setNumThreads(1)
+    rng = np.random.default_rng(args.seed)
+    detector = PlayerDetector(edge_ratio_threshold=config.EDGE_RATIO_THRESHOLD,
+                              laplacian_var_threshold=config.LAPLACIAN_VAR_THRESHOLD,
+                              nms_overlap_threshold=config.NMS_OVERLAP_THRESHOLD)
+    shape = (1440, 2560, 3)
+    tables = []
+    for t in range(args.tables):
+        x1, y1 = 20 + (t % 3) * 850, 30 + (t // 3 % 2) * 700
+        tables.append(TableBox(x1, y1, x1 + 840, y1 + 622))
+
+    lap_rel, edge_abs, flips, seats = [], [], 0, 0
+    for _ in range(args.frames):
+        frame = synthetic_frame(rng, detector, tables, shape, args.felt_noise)
+        for table in tables:
+            boxes = detector.layouts.get(table, shape).seat_boxes
+            edge, lap = detector._score_seats(frame, boxes)
+            ref_edge, ref_lap = reference_scores(detector, frame, boxes)
+            nonzero = ref_lap > 0
+            lap_rel.append(np.abs(lap - ref_lap)[nonzero] / ref_lap[nonzero])
+            edge_abs.append(np.abs(edge - ref_edge))
+            occupied = (edge > detector.edge_ratio_threshold) & (lap > detector.laplacian_var_threshold)
+            ref_occupied = ((ref_edge > detector.edge_ratio_threshold) &
+                            (ref_lap > detector.laplacian_var_threshold))
+            flips += int(np.count_nonzero(occupied != ref_occupied))
+            seats += len(edge)
+    lap_rel, edge_abs = np.concatenate(lap_rel), np.concatenate(edge_abs)
+    print(f"{seats} seats over {args.frames} frames x {args.tables} tables, felt noise {args.felt_noise:g}:")
+    print(f"  Laplacian variance relative diff: max {lap_rel.max():.2e}")
+    print(f"  edge ratio absolute diff: max {edge_abs.max():.2e}")
+    print(f"  occupancy differs for {flips} seats")
+
+    frame = synthetic_frame(rng, detector, tables, shape, args.felt_noise)
+    layouts = [detector.layouts.get(table, shape) for table in tables]
+    reference = best_ms(lambda: [reference_scores(detector, frame, l.seat_boxes) for l in layouts], args.iters)
+    current = best_ms(lambda: [detector._score_seats(frame, l.seat_boxes) for l in layouts], args.iters)
+    detect = best_ms(lambda: detector.detect_tables(frame, layouts), args.iters)
+    print(f"  reference scoring {reference:.2f} ms per frame")
+    print(f"  current   scoring {current:.2f} ms per frame ({reference / current:.2f}x)")
+    print(f"  detect_tables     {detect:.2f} ms per frame")
+
+
+if __name__ == "__main__":
+    main()
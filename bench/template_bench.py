@@ -0,0 +1,116 @@
+"""
+Accuracy, coverage and speed of the template-matching fast path
+(TemplateCardMatcher) against the TinyCornerNet classifier alone.
+
+Crops are the 52 reference cards plus jittered variants (rescaled, shifted,
+noisy) and any captured ROI directories passed with --images; captured ROIs
+are unlabelled, so the CNN's prediction is used as their label.
+
+The reference cards are also the templates, so accuracy on them says little
+about screen captures. --labelled takes directories of captured ROIs sorted
+into one sub-directory per label (<dir>/Qh/*.png, <dir>/NO_CARD/*.png) and
+reports the gate's accepted share and accepted-match accuracy on those
+alone; that number is what CARD_TEMPLATE_MATCH should be decided on.
+
+Run from the repo root:
+    python -m bench.template_bench
+    python -m bench.template_bench --images captured_cards/20240101_120000 --min-score 0.8
+    python -m bench.template_bench --labelled labelled_cards
+"""
+
+import argparse
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+
+import config
+from vision.card_detector import BACKENDS, CardClassifier
+from vision.export_card_model import labelled_crops
+from vision.template_matcher import CascadeCardClassifier, TemplateCardMatcher
+
+
+CARD_MODEL_PATH = "vision/models/tiny_corner_net_best_cardv4.pt"
+
+
+def time_per_crop_us(fn, crops, iters: int) -> float:
+    fn(crops)  # warmup
+    t0 = time.perf_counter()
+    for _ in range(iters):
+        fn(crops)
+    return (time.perf_counter() - t0) / iters / len(crops) * 1e6
+
+
+def labelled_rois(dirs):
+    """Captured ROI crops and labels from <dir>/<label>/*.png."""
+    crops, labels = [], []
+    for d in dirs:
+        for path in sorted(glob.glob(os.path.join(d, "*", "*.png"))):
+            img = cv2.imread(path)
+            if img is not None:
+                crops.append(img)
+                labels.append(os.path.basename(os.path.dirname(path)))
+    return crops, labels
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Template matcher vs CNN card classification")
+    parser.add_argument("--weights", default=CARD_MODEL_PATH)
+    parser.add_argument("--backend", choices=BACKENDS, default=config.CARD_BACKEND)
+    parser.add_argument("--images", action="append", default=[], help="Captured card ROI directory (repeatable)")
+    parser.add_argument("--labelled", action="append", default=[],
+                        help="Captured ROIs in one sub-directory per label (repeatable)")
+    parser.add_argument("--min-score", type=float, default=config.CARD_TEMPLATE_MIN_SCORE)
+    parser.add_argument("--min-margin", type=float, default=config.CARD_TEMPLATE_MIN_MARGIN)
+    parser.add_argument("--max-shift", type=int, default=1)
+    parser.add_argument("--batch", type=int, default=14, help="Crops per call when timing")
+    parser.add_argument("--iters", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    crops, labels = labelled_crops(args.images, seed=args.seed)
+    matcher = TemplateCardMatcher(max_shift=args.max_shift, min_score=args.min_score, min_margin=args.min_margin)
+    cnn = CardClassifier(args.weights, backend=args.backend)
+    cascade = CascadeCardClassifier(matcher, cnn)
+
+    cnn_preds = [p.label for p in cnn.predict_corners(crops)]
+    labels = [l if l is not None else c for l, c in zip(labels, cnn_preds)]
+    template_preds = matcher.predict_corners(crops)
+    cascade_preds = [p.label for p in cascade.predict_corners(crops)]
+
+    accepted = [p for p in template_preds if p is not None]
+    wrong = sum(p.label != l for p, l in zip(template_preds, labels) if p is not None)
+    top1 = np.mean([matcher.labels[i] == l for i, l in zip(matcher.match(crops)[0], labels)])
+
+    print(f"{len(crops)} crops, min_score {args.min_score}, min_margin {args.min_margin}, max_shift {args.max_shift}")
+    print(f"  template top-1 (ungated): {100 * top1:6.2f}%")
+    print(f"  template accepted:        {100 * len(accepted) / len(crops):6.2f}% of crops, {wrong} wrong")
+    print(f"  CNN accuracy:             {100 * np.mean([p == l for p, l in zip(cnn_preds, labels)]):6.2f}%")
+    print(f"  cascade accuracy:         {100 * np.mean([p == l for p, l in zip(cascade_preds, labels)]):6.2f}%")
+
+    real_crops, real_labels = labelled_rois(args.labelled)
+    if real_crops:
+        real_preds = matcher.predict_corners(real_crops)
+        real_accepted = [(p.label, l) for p, l in zip(real_preds, real_labels) if p is not None]
+        real_wrong = sum(p != l for p, l in real_accepted)
+        real_cnn = np.mean([p.label == l for p, l in zip(cnn.predict_corners(real_crops), real_labels)])
+        print(f"labelled captured ROIs ({len(real_crops)}):")
+        print(f"  template accepted:        {100 * len(real_accepted) / len(real_crops):6.2f}% of crops, "
+              f"{real_wrong} wrong ({100 * (1 - real_wrong / max(len(real_accepted), 1)):.2f}% accepted-match accuracy)")
+        print(f"  CNN accuracy:             {100 * real_cnn:6.2f}%")
+    else:
+        print("no --labelled captured ROIs: the numbers above use the templates' own images and do not "
+              "validate the gate on screen captures")
+
+    batch = crops[:args.batch]
+    print(f"\nper-crop latency, batches of {len(batch)} ({args.backend} CNN):")
+    print(f"  template only: {time_per_crop_us(matcher.predict_corners, batch, args.iters):8.1f} us")
+    print(f"  CNN only:      {time_per_crop_us(cnn.predict_corners, batch, args.iters):8.1f} us")
+    print(f"  cascade:       {time_per_crop_us(cascade.predict_corners, batch, args.iters):8.1f} us"
+          f"  (mixed batch, {100 * cascade.template_rate:.0f}% matched)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+Offline benchmark of the vision pipeline on recorded frames.
+
+Replays a FrameSource (directory of images, video file or .raw dump) as fast as
+possible through TableDetector, PlayerDetector and CardClassifier using the same
+analyze_tables() code path as main.py, and reports per-stage p50/p95/p99
+latency, frames/sec, allocations and peak RSS. Results are written as JSON so
+two commits can be compared with bench/compare.py.
+
+Run from the repo root:
+    python -m bench.vision_bench --source recordings/6tables --out bench_results/head.json
+    python -m bench.vision_bench --source frames.raw --table-box 696,186,1542,815 --no-cache
+"""
+
+import argparse
+import time
+
+import config
+from app.analysis import analyze_tables
+from bench.common import StageRecorder, peak_rss_mb, print_stage_table, run_meta, write_results
+from capture.frame_source import open_frame_source
+from state.table_state import TableBox
+from vision.card_cache import CardCache
+from vision.card_detector import BACKENDS, CardClassifier
+from vision.player_detector import PlayerDetector
+from vision.template_matcher import CascadeCardClassifier, TemplateCardMatcher
+
+
+CARD_MODEL_PATH = "vision/models/tiny_corner_net_best_cardv4.pt"
+
+
+class TimedProxy:
+    """Forwards attribute access to `target`, timing the listed methods as bench stages."""
+
+    def __init__(self, target, recorder: StageRecorder, methods: dict):
+        self._target = target
+        self._recorder = recorder
+        self._methods = methods  # method name -> stage name
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        stage = self._methods.get(name)
+        if stage is None:
+            return attr
+
+        def timed(*args, **kwargs):
+            with self._recorder.stage(stage):
+                return attr(*args, **kwargs)
+        return timed
+
+
+# Street from the number of community cards on the board
+STREETS = {0: "preflop", 3: "flop", 4: "turn", 5: "river"}
+
+
+def frame_street(analysis) -> str:
+    """Street most tables in the frame are on ("unknown" for odd board counts)."""
+    streets = []
+    for table_result in analysis:
+        board = sum(1 for roi_name, _, info in table_result["cards"]
+                    if roi_name.startswith("community") and info["label"] != "NO_CARD")
+        streets.append(STREETS.get(board, "unknown"))
+    return max(streets, key=streets.count) if streets else "no_table"
+
+
+def print_street_table(streets: dict):
+    print(f"{'street':<10}{'frames':>8}{'slots':>8}{'empty':>8}{'classify p50':>14}{'frame p50':>12}  (ms)")
+    for street, s in streets.items():
+        print(f"{street:<10}{s['frames']:>8}{s['slots']:>8}{s['empty_slots']:>8}"
+              f"{s['classify_p50_ms']:>14.2f}{s['frame_p50_ms']:>12.2f}")
+
+
+def parse_box(text: str) -> TableBox:
+    x1, y1, x2, y2 = (int(v) for v in text.split(","))
+    return TableBox(x1, y1, x2, y2, 1.0)
+
+
+def build_table_fn(args, recorder: StageRecorder):
+    """Returns frame -> List[TableBox]. A fixed --table-box skips YOLO entirely."""
+    if args.table_box:
+        boxes = [parse_box(b) for b in args.table_box]
+        return lambda frame: list(boxes)
+
+    from vision.table_detector import TableDetector
+    detector = TableDetector(
+        model_path=args.table_model,
+        conf_thres=config.TABLE_CONF_THRES,
+        device=config.DEVICE,
+        redetect_every_n_frames=config.TABLE_REDETECT_EVERY_N_FRAMES,
+        redetect_interval_s=config.TABLE_REDETECT_INTERVAL_S,
+    )
+    method = detector.track if args.track else detector.detect
+
+    def detect(frame):
+        with recorder.stage("table_detect"):
+            return method(frame)
+    return detect
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline vision pipeline benchmark")
+    parser.add_argument("--source", required=True, help="Image directory, video file or .raw dump")
+    parser.add_argument("--out", default=None, help="Write JSON results here")
+    parser.add_argument("--max-frames", type=int, default=0, help="Stop after N measured frames (0 = all)")
+    parser.add_argument("--warmup", type=int, default=3, help="Frames run before measuring")
+    parser.add_argument("--loop", action="store_true", help="Loop the source (use with --max-frames)")
+    parser.add_argument("--table-model", default=config.MODEL_TABLE_PATH)
+    parser.add_argument("--table-box", action="append", default=[],
+                        help="Fixed table box x1,y1,x2,y2 instead of YOLO (repeatable)")
+    parser.add_argument("--track", action="store_true", help="Use TableDetector.track instead of detect")
+    parser.add_argument("--weights", default=CARD_MODEL_PATH)
+    parser.add_argument("--backend", choices=BACKENDS, default=config.CARD_BACKEND)
+    parser.add_argument("--no-templates", action="store_true", help="Skip the template-matching fast path")
+    parser.add_argument("--no-gate", action="store_true", help="Classify empty card slots too")
+    parser.add_argument("--no-cache", action="store_true", help="Classify every card crop every frame")
+    parser.add_argument("--alloc", action="store_true", help="Track per-stage allocations (slow)")
+    args = parser.parse_args()
+
+    source = open_frame_source(args.source, realtime=False, loop=args.loop, preload=True)
+    recorder = StageRecorder(track_alloc=args.alloc)
+
+    detect_tables = build_table_fn(args, recorder)
+    player_detector = TimedProxy(PlayerDetector(
+        edge_ratio_threshold=config.EDGE_RATIO_THRESHOLD,
+        laplacian_var_threshold=config.LAPLACIAN_VAR_THRESHOLD,
+        nms_overlap_threshold=config.NMS_OVERLAP_THRESHOLD,
+        empty_slot_edge_ratio=config.EMPTY_SLOT_EDGE_RATIO_THRESHOLD,
+        empty_slot_laplacian_var=config.EMPTY_SLOT_LAPLACIAN_VAR_THRESHOLD
+    ), recorder, {"detect_tables": "player_detect", "empty_card_slots": "empty_gate"})
+    card_clf = CardClassifier(weights_path=args.weights, device="cpu", backend=args.backend)
+    cascade = None
+    if config.CARD_TEMPLATE_MATCH and not args.no_templates:
+        # The CNN is timed separately so its share of card_classify is visible
+        cascade = CascadeCardClassifier(
+            TemplateCardMatcher(min_score=config.CARD_TEMPLATE_MIN_SCORE,
+                                min_margin=config.CARD_TEMPLATE_MIN_MARGIN),
+            TimedProxy(card_clf, recorder, {"predict_corners": "card_cnn"})
+        )
+        card_clf = cascade
+    card_clf = TimedProxy(card_clf, recorder, {"predict_corners": "card_classify"})
+    # A negative threshold never matches, so --no-cache classifies every crop
+    card_cache = CardCache(
+        diff_threshold=-1.0 if args.no_cache else config.CARD_CACHE_DIFF_THRES,
+        fingerprint_size=config.CARD_CACHE_FINGERPRINT_SIZE
+    )
+
+    def run_frame(frame):
+        tables = detect_tables(frame)
+        return analyze_tables(frame, tables, player_detector, card_clf, card_cache,
+                              skip_empty=config.CARD_EMPTY_GATE and not args.no_gate)
+
+    for _ in range(args.warmup):
+        frame = source.get_frame()
+        if frame is None:
+            break
+        run_frame(frame)
+    recorder.samples.clear()
+    recorder.alloc_peaks.clear()
+    card_cache.reset_stats()
+    if cascade is not None:
+        cascade.reset_stats()
+
+    frames = 0
+    t_start = time.perf_counter()
+    while not args.max_frames or frames < args.max_frames:
+        frame = source.get_frame()
+        if frame is None:
+            break
+        classify_before = len(recorder.samples["card_classify"])
+        with recorder.stage("frame_total", track_alloc=False):
+            analysis = run_frame(frame)
+        frames += 1
+        recorder.count("tables", len(analysis))
+        recorder.count("card_rois", sum(len(t["cards"]) for t in analysis))
+
+        # Per-street breakdown, e.g. to see what the empty-slot gate saves preflop
+        street = frame_street(analysis)
+        recorder.add(f"frame.{street}", recorder.samples["frame_total"][-1])
+        recorder.add(f"classify.{street}", sum(recorder.samples["card_classify"][classify_before:]))
+        recorder.count(f"{street}.frames")
+        recorder.count(f"{street}.slots", sum(len(t["cards"]) for t in analysis))
+        recorder.count(f"{street}.empty_slots",
+                       sum(info["empty_slot"] for t in analysis for _, _, info in t["cards"]))
+    elapsed = time.perf_counter() - t_start
+    source.stop()
+
+    if frames == 0:
+        raise SystemExit(f"No frames read from {args.source}")
+
+    stages = recorder.summary()
+    streets = {}
+    for street in list(STREETS.values()) + ["unknown", "no_table"]:
+        if f"frame.{street}" not in stages:
+            continue
+        streets[street] = {
+            "frames": recorder.counters[f"{street}.frames"],
+            "slots": recorder.counters[f"{street}.slots"],
+            "empty_slots": recorder.counters[f"{street}.empty_slots"],
+            "classify_p50_ms": stages.pop(f"classify.{street}")["p50_ms"],
+            "frame_p50_ms": stages.pop(f"frame.{street}")["p50_ms"],
+        }
+
+    results = {
+        "meta": run_meta(source=args.source, frames=frames, args=vars(args)),
+        "fps": frames / elapsed,
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": stages,
+        "streets": streets,
+        "counters": {k: v for k, v in recorder.counters.items() if "." not in k},
+        "card_cache": card_cache.stats(),
+        "card_templates": cascade.stats() if cascade is not None else None,
+    }
+
+    print(f"{frames} frames in {elapsed:.2f}s -> {results['fps']:.1f} fps, "
+          f"peak RSS {results['peak_rss_mb'] or 0:.0f} MB")
+    print_stage_table(results["stages"])
+    print_street_table(streets)
+    print(card_cache.summary())
+    if cascade is not None:
+        print(cascade.summary())
+
+    if args.out:
+        write_results(args.out, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Throughput of per-table analysis in-process vs. TableWorkerPool with 1..N
+worker processes, on synthetic multi-table frames (felt, textured seats and
+reference card images in the card ROIs; the board changes street every few
+frames so the card cache sees realistic churn).
+
+Every pool run is also checked against the in-process labels.
+
+Run from the repo root:
+    python -m bench.worker_scaling_bench --tables 12 --workers 1 2 4 6 12
+"""
+
+import argparse
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+
+import config
+from app.analysis import analyze_tables
+from app.worker_pool import TableWorkerPool, WorkerSettings
+from bench.common import run_meta, write_results
+from state.table_state import TableBox
+from vision.card_cache import CardCache
+from vision.card_detector import BACKENDS, CardClassifier
+from vision.player_detector import PlayerDetector
+from vision.template_matcher import CascadeCardClassifier, TemplateCardMatcher
+
+
+CARD_MODEL_PATH = "vision/models/tiny_corner_net_best_cardv4.pt"
+BOARD_BY_STREET = [0, 3, 4, 5]
+
+
+def synthetic_frames(n_tables: int, n_frames: int, frame_size=(2560, 1440), seed: int = 0):
+    """Frames with n_tables tables tiled in a grid, plus the table boxes."""
+    rng = np.random.default_rng(seed)
+    fw, fh = frame_size
+    cols = int(np.ceil(np.sqrt(n_tables * fw / fh)))
+    rows = int(np.ceil(n_tables / cols))
+    tw, th = fw // cols, fh // rows
+    tables = [TableBox(c * tw, r * th, c * tw + tw - 4, r * th + th - 4, 1.0)
+              for r in range(rows) for c in range(cols)][:n_tables]
+
+    base = np.full((fh, fw, 3), (40, 90, 30), np.uint8)
+    for t_idx, table in enumerate(tables):
+        for s_idx, seat in enumerate(config.SEAT_ROIS.values()):
+            if (s_idx + t_idx) % 3 == 0:
+                x1, y1, x2, y2 = table.roi_from_rel(*seat["occupancy"])
+                base[y1:y2, x1:x2] = rng.integers(0, 255, (y2 - y1, x2 - x1, 3))
+
+    cards = [cv2.imread(p) for p in sorted(glob.glob("vision/models/52cards/*.png"))]
+    frames = []
+    for f in range(n_frames):
+        frame = base.copy()
+        for t_idx, table in enumerate(tables):
+            # Tables are dealt at different times so streets don't line up
+            street = (f // 5 + t_idx) % len(BOARD_BY_STREET)
+            hand = [cards[(7 * t_idx + 3 * (f // 20) + k) % len(cards)] for k in range(7)]
+            for roi_name, rel in config.TABLE_ROIS.items():
+                if "card" not in roi_name:
+                    continue
+                k = int(roi_name[-1]) - 1
+                if roi_name.startswith("community"):
+                    if k >= BOARD_BY_STREET[street]:
+                        continue
+                    k += 2
+                x1, y1, x2, y2 = table.roi_from_rel(*rel)
+                frame[y1:y2, x1:x2] = cv2.resize(hand[k], (x2 - x1, y2 - y1))
+        frames.append(frame)
+    return frames, tables
+
+
+def labels_of(analysis):
+    return [[info["label"] for _, _, info in t["cards"]] for t in analysis]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TableWorkerPool scaling benchmark")
+    parser.add_argument("--tables", type=int, default=12)
+    parser.add_argument("--workers", nargs="+", type=int, default=None,
+                        help="Worker counts to try (default: 1, 2, 4, ... up to tables and cores)")
+    parser.add_argument("--frames", type=int, default=40)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--weights", default=CARD_MODEL_PATH)
+    parser.add_argument("--backend", choices=BACKENDS, default=config.CARD_BACKEND)
+    parser.add_argument("--no-cache", action="store_true", help="Classify every card crop every frame")
+    parser.add_argument("--out", default=None, help="Write JSON results here")
+    args = parser.parse_args()
+
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    workers = args.workers or [n for n in (1, 2, 4, 6, 8, 12, 16) if n <= min(args.tables, cores)] or [1]
+    frames, tables = synthetic_frames(args.tables, args.frames)
+    cache_thres = -1.0 if args.no_cache else config.CARD_CACHE_DIFF_THRES
+
+    # In-process reference: the same models, one thread of work
+    import torch
+    torch.set_num_threads(1)
+    cv2.setNumThreads(1)
+    player_detector = PlayerDetector(nms_overlap_threshold=config.NMS_OVERLAP_THRESHOLD)
+    card_clf = CardClassifier(args.weights, backend=args.backend)
+    if config.CARD_TEMPLATE_MATCH:
+        card_clf = CascadeCardClassifier(TemplateCardMatcher(min_score=config.CARD_TEMPLATE_MIN_SCORE,
+                                                             min_margin=config.CARD_TEMPLATE_MIN_MARGIN), card_clf)
+    card_cache = CardCache(diff_threshold=cache_thres, fingerprint_size=config.CARD_CACHE_FINGERPRINT_SIZE)
+
+    def run(analyze):
+        for frame in frames[:args.warmup]:
+            analyze(frame)
+        t0 = time.perf_counter()
+        labels = [labels_of(analyze(frame)) for frame in frames]
+        return args.frames / (time.perf_counter() - t0), labels
+
+    results = {"meta": run_meta(tables=args.tables, frames=args.frames, cores=cores, args=vars(args)), "runs": {}}
+    base_fps, reference = run(lambda f: analyze_tables(f, tables, player_detector, card_clf, card_cache))
+    results["runs"]["in_process"] = {"fps": base_fps}
+    print(f"{args.tables} tables, {frames[0].shape[1]}x{frames[0].shape[0]}, {cores} cores")
+    # overhead = wall time per frame beyond the busiest worker's analysis time
+    # (frame copy to shared memory, job/result pickling, queue wakeups)
+    print(f"{'mode':<14}{'fps':>8}{'tables/s':>10}{'speedup':>9}{'overhead ms':>13}  parity")
+    print(f"{'in-process':<14}{base_fps:>8.1f}{base_fps * args.tables:>10.0f}{1.0:>8.2f}x")
+
+    settings = WorkerSettings(card_weights=args.weights, card_backend=args.backend, cache_diff_threshold=cache_thres)
+    for n in workers:
+        with TableWorkerPool(n, settings) as pool:
+            fps, labels = run(lambda f: pool.analyze(f, tables))
+            stats = pool.stats()
+        mismatches = sum(a != b for fa, fb in zip(reference, labels) for a, b in zip(fa, fb))
+        overhead_ms = (1.0 / fps - max(stats["busy_s"]) / stats["frames"]) * 1000
+        results["runs"][f"workers_{n}"] = {"fps": fps, "speedup": fps / base_fps, "overhead_ms": overhead_ms,
+                                           "busy_s": stats["busy_s"], "label_mismatches": mismatches}
+        print(f"{f'{n} workers':<14}{fps:>8.1f}{fps * args.tables:>10.0f}{fps / base_fps:>8.2f}x"
+              f"{overhead_ms:>13.2f}  {'OK' if mismatches == 0 else f'{mismatches} tables differ'}")
+
+    if args.out:
+        write_results(args.out, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+# Header layout (int64 words) at the start of the shared segment
+_H_WRITE_SEQ = 0        # last committed sequence number (0 = nothing written yet)
+_H_SLOTS = 1
+_H_MAX_READERS = 2
+_H_NDIM = 3
+_H_SHAPE = 4            # 4 words, unused dims are 0
+_H_DTYPE = 8            # ord(dtype.char)
+_H_FIXED = 9
+_ALIGN = 64             # slot data starts on a cache line
+
+
+class SharedFrameRing:
+    """
+    Fixed-size ring of equally shaped frames in one multiprocessing.shared_memory
+    segment, written by a single producer and read by any number of threads or
+    processes without copying.
+
+    Every write gets a sequence number (1, 2, ...) and lands in slot seq % slots.
+    Each slot records the sequence number it holds (-1 while being written), so a
+    reader can tell whether the frame it is looking at is still the one it asked
+    for. read() returns read-only views into the segment: a view stays valid until
+    the writer laps the ring, i.e. `slots - 1` more frames. Consumers that may
+    hold a frame longer should check is_current(seq) afterwards or copy.
+
+    Reader cursors and drop counters also live in the segment (RingReader), so
+    any process attached to the ring can see how far behind each consumer is.
+    """
+
+    def __init__(self, shape: Tuple[int, ...], dtype=np.uint8, slots: int = 8, max_readers: int = 4,
+                 name: Optional[str] = None, _shm: Optional[shared_memory.SharedMemory] = None):
+        """
+        Args:
+            shape: Frame shape, e.g. (1440, 2560, 3).
+            slots: Frames kept in the ring; must exceed the frames in flight at once.
+            max_readers: Reader cursors reserved in the header.
+            name: Shared memory name (random when None).
+        """
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.slots = slots
+        self.max_readers = max_readers
+        self.frame_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+
+        n_header = _H_FIXED + 2 * slots + 2 * max_readers
+        self._data_offset = -(-n_header * 8 // _ALIGN) * _ALIGN
+        size = self._data_offset + slots * self.frame_bytes
+
+        self.owner = _shm is None
+        self.shm = _shm or shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.name = self.shm.name
+
+        self._header = np.ndarray((n_header,), dtype=np.int64, buffer=self.shm.buf)
+        self._slot_seq = self._header[_H_FIXED:_H_FIXED + slots]
+        self._slot_time = self._header[_H_FIXED + slots:_H_FIXED + 2 * slots]
+        readers = _H_FIXED + 2 * slots
+        self._cursors = self._header[readers:readers + max_readers]
+        self._dropped = self._header[readers + max_readers:readers + 2 * max_readers]
+        self._frames = np.ndarray((slots,) + self.shape, dtype=self.dtype,
+                                  buffer=self.shm.buf, offset=self._data_offset)
+
+        if self.owner:
+            self._header[:] = 0
+            self._header[_H_SLOTS] = slots
+            self._header[_H_MAX_READERS] = max_readers
+            self._header[_H_NDIM] = len(self.shape)
+            self._header[_H_SHAPE:_H_SHAPE + len(self.shape)] = self.shape
+            self._header[_H_DTYPE] = ord(self.dtype.char)
+            self._slot_seq[:] = 0
+            # Touch every page now so the first lap doesn't page-fault in the capture loop
+            self._frames.fill(0)
+
+        # Read-only view of every slot, handed out by read()
+        self._readonly = self._frames.view()
+        self._readonly.flags.writeable = False
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedFrameRing":
+        """Open a ring created by another process (or thread) by name."""
+        shm = shared_memory.SharedMemory(name=name)
+        header = np.ndarray((_H_FIXED,), dtype=np.int64, buffer=shm.buf)
+        shape = tuple(int(v) for v in header[_H_SHAPE:_H_SHAPE + int(header[_H_NDIM])])
+        ring = cls(shape, dtype=np.dtype(chr(int(header[_H_DTYPE]))), slots=int(header[_H_SLOTS]),
+                   max_readers=int(header[_H_MAX_READERS]), _shm=shm)
+        del header
+        return ring
+
+    # --- writer -----------------------------------------------------------
+
+    @property
+    def latest_seq(self) -> int:
+        """Sequence number of the newest committed frame (0 if none)."""
+        return int(self._header[_H_WRITE_SEQ])
+
+    def begin_write(self) -> Tuple[int, np.ndarray]:
+        """
+        Claim the next slot for in-place writing (e.g. cv2.resize(..., dst=view)).
+        Returns (seq, writable view); call commit(seq) when the frame is complete.
+        """
+        seq = self.latest_seq + 1
+        slot = seq % self.slots
+        self._slot_seq[slot] = -1  # readers of the old frame in this slot now see it as gone
+        return seq, self._frames[slot]
+
+    def commit(self, seq: int, t_capture: Optional[float] = None):
+        slot = seq % self.slots
+        self._slot_time[slot] = int((time.perf_counter() if t_capture is None else t_capture) * 1e9)
+        self._slot_seq[slot] = seq
+        self._header[_H_WRITE_SEQ] = seq
+
+    def write(self, frame: np.ndarray, t_capture: Optional[float] = None) -> int:
+        """Copy a frame into the next slot and return its sequence number."""
+        if frame.shape != self.shape:
+            raise ValueError(f"Frame shape {frame.shape} does not match ring shape {self.shape}")
+        seq, view = self.begin_write()
+        np.copyto(view, frame, casting="unsafe")
+        self.commit(seq, t_capture)
+        return seq
+
+    # --- readers ----------------------------------------------------------
+
+    def is_current(self, seq: int) -> bool:
+        """True while slot seq % slots still holds frame seq."""
+        return seq > 0 and int(self._slot_seq[seq % self.slots]) == seq
+
+    def read(self, seq: int) -> Optional[np.ndarray]:
+        """Read-only view of frame seq, or None if it is not written yet or already overwritten."""
+        if not self.is_current(seq):
+            return None
+        return self._readonly[seq % self.slots]
+
+    def capture_time(self, seq: int) -> Optional[float]:
+        """perf_counter() timestamp recorded at commit, if frame seq is still in the ring."""
+        if not self.is_current(seq):
+            return None
+        return int(self._slot_time[seq % self.slots]) / 1e9
+
+    def reader(self, reader_id: int, start_at_latest: bool = True) -> "RingReader":
+        return RingReader(self, reader_id, start_at_latest)
+
+    def stats(self) -> dict:
+        latest = self.latest_seq
+        return {
+            "written": latest,
+            "readers": {
+                i: {"lag": latest - int(self._cursors[i]), "dropped": int(self._dropped[i])}
+                for i in range(self.max_readers) if self._cursors[i] > 0
+            },
+        }
+
+    def close(self):
+        # Views into the buffer must be gone before the segment can be closed
+        del self._readonly, self._frames, self._header
+        del self._slot_seq, self._slot_time, self._cursors, self._dropped
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        if self.owner:
+            self.unlink()
+
+
+class RingReader:
+    """
+    One consumer's cursor into a SharedFrameRing. The cursor and the count of
+    frames this reader never saw are stored in the ring's shared header under
+    reader_id, so the writer (or anyone else) can report per-consumer lag.
+    """
+
+    def __init__(self, ring: SharedFrameRing, reader_id: int, start_at_latest: bool = True):
+        if not 0 <= reader_id < ring.max_readers:
+            raise ValueError(f"reader_id must be in [0, {ring.max_readers})")
+        self.ring = ring
+        self.reader_id = reader_id
+        # Cursor = last sequence number consumed; 0 is reserved for "not started"
+        ring._cursors[reader_id] = max(ring.latest_seq if start_at_latest else 0, 0)
+        ring._dropped[reader_id] = 0
+
+    @property
+    def cursor(self) -> int:
+        return int(self.ring._cursors[self.reader_id])
+
+    @property
+    def dropped(self) -> int:
+        return int(self.ring._dropped[self.reader_id])
+
+    @property
+    def lag(self) -> int:
+        """Frames written that this reader has not consumed yet."""
+        return self.ring.latest_seq - self.cursor
+
+    def _wait_for(self, seq: int, timeout: Optional[float]) -> bool:
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while self.ring.latest_seq < seq:
+            if deadline is not None and time.perf_counter() >= deadline:
+                return False
+            time.sleep(0.0005)
+        return True
+
+    def _take(self, seq: int) -> Optional[Tuple[int, np.ndarray]]:
+        frame = self.ring.read(seq)
+        if frame is None:
+            return None
+        self.ring._dropped[self.reader_id] += seq - self.cursor - 1
+        self.ring._cursors[self.reader_id] = seq
+        return seq, frame
+
+    def next(self, timeout: Optional[float] = None) -> Optional[Tuple[int, np.ndarray]]:
+        """
+        The frame after the cursor, in order (for recorders). If the writer has
+        lapped this reader, skips ahead to half a ring behind the writer (the
+        oldest slots are about to be overwritten) and counts the frames in
+        between as dropped. Returns (seq, view) or None on timeout.
+        """
+        while True:
+            if not self._wait_for(self.cursor + 1, timeout):
+                return None
+            latest = self.ring.latest_seq
+            seq = self.cursor + 1
+            if seq <= latest - self.ring.slots + 1:
+                seq = max(latest - self.ring.slots // 2 + 1, 1)
+            taken = self._take(seq)
+            if taken is not None:
+                return taken
+
+    def latest(self, timeout: Optional[float] = None) -> Optional[Tuple[int, np.ndarray]]:
+        """
+        The newest frame, skipping (and counting as dropped) anything older
+        (for live consumers). Returns (seq, view) or None on timeout.
+        """
+        while True:
+            if not self._wait_for(self.cursor + 1, timeout):
+                return None
+            taken = self._take(self.ring.latest_seq)
+            if taken is not None:
+                return taken
+
+
+class RingRecorder:
+    """
+    Background thread that appends every frame of a ring to a raw dump (see
+    RawDumpRecorder) from read-only views. When the disk is slower than
+    capture, frames are skipped and counted in `dropped` instead of stalling
+    the writer. A frame whose slot was overwritten while it was being
+    written is removed from the dump again and counted in `dropped` too.
+    """
+
+    def __init__(self, ring: SharedFrameRing, path: str, reader_id: int, fps: float = 30):
+        from capture.frame_source import RawDumpRecorder
+
+        # Start from the oldest frame still in the ring, not the newest
+        self.reader = ring.reader(reader_id, start_at_latest=False)
+        self.recorder = RawDumpRecorder(path, fps=fps)
+        self.ring = ring
+        self.overwritten = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="ring-recorder", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            item = self.reader.next(timeout=0.1)
+            if item is not None:
+                seq, frame = item
+                self.recorder.write(frame)
+                if not self.ring.is_current(seq):
+                    self.recorder.drop_last()
+                    self.overwritten += 1
+
+    @property
+    def dropped(self) -> int:
+        return self.reader.dropped + self.overwritten
+
+    def stop(self, timeout: float = 2.0):
+        self._stop.set()
+        self._thread.join(timeout)
+        self.recorder.close()
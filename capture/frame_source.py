@@ -0,0 +1,234 @@
+import glob
+import json
+import os
+import time
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".bmp")
+RAW_EXT = ".raw"
+
+
+class FrameSource:
+    """
+    Base class for anything that produces BGR frames for the vision pipeline.
+
+    get_frame() returns the next frame or None when no frame is ready.
+    Offline sources set `finished` once the last frame has been returned
+    (unless loop=True). With realtime=True they are paced to `fps`,
+    otherwise frames are returned as fast as the consumer asks for them.
+    """
+
+    def __init__(self, fps: float = 30, realtime: bool = True, loop: bool = False):
+        self.fps = fps
+        self.realtime = realtime
+        self.loop = loop
+        self.finished = False
+        self.frames_read = 0
+        self._t_start = None
+
+    def get_frame(self) -> Optional[np.ndarray]:
+        if self.finished:
+            return None
+
+        frame = self._read_next()
+        if frame is None and self.loop and self.frames_read > 0:
+            self._rewind()
+            frame = self._read_next()
+        if frame is None:
+            self.finished = True
+            return None
+
+        self._pace()
+        self.frames_read += 1
+        return frame
+
+    def stop(self):
+        pass
+
+    def _read_next(self) -> Optional[np.ndarray]:
+        raise NotImplementedError
+
+    def _rewind(self):
+        raise NotImplementedError
+
+    def _pace(self):
+        """Sleep until this frame's presentation time when playing back in real time."""
+        if not self.realtime or not self.fps:
+            return
+        now = time.perf_counter()
+        if self._t_start is None:
+            self._t_start = now
+            return
+        due = self._t_start + self.frames_read / self.fps
+        if due > now:
+            time.sleep(due - now)
+
+    def __len__(self) -> int:
+        raise TypeError(f"{type(self).__name__} has no known length")
+
+
+class ImageDirSource(FrameSource):
+    """
+    Frames from a directory of images, in sorted filename order. Files that
+    cv2.imread cannot decode are skipped with a warning (listed in `unreadable`).
+    """
+
+    def __init__(self, directory: str, fps: float = 30, realtime: bool = True, loop: bool = False,
+                 preload: bool = False):
+        """
+        Args:
+            preload: Decode every image up front so playback measures the pipeline, not disk/PNG decoding.
+        """
+        super().__init__(fps=fps, realtime=realtime, loop=loop)
+        self.paths: List[str] = sorted(
+            p for p in glob.glob(os.path.join(directory, "*")) if p.lower().endswith(IMAGE_EXTS)
+        )
+        if not self.paths:
+            raise FileNotFoundError(f"No images found in {directory}")
+        self.unreadable: List[str] = []
+        self._frames = [cv2.imread(p) for p in self.paths] if preload else None
+        self._idx = 0
+
+    def _read_next(self):
+        while self._idx < len(self.paths):
+            idx = self._idx
+            self._idx += 1
+            frame = self._frames[idx] if self._frames is not None else cv2.imread(self.paths[idx])
+            if frame is not None:
+                return frame
+            if self.paths[idx] not in self.unreadable:
+                self.unreadable.append(self.paths[idx])
+                print(f"Warning: could not read {self.paths[idx]}, skipped")
+        return None
+
+    def _rewind(self):
+        self._idx = 0
+
+    def __len__(self):
+        return len(self.paths)
+
+
+class VideoFileSource(FrameSource):
+    """Frames from a video file via cv2.VideoCapture. fps defaults to the file's own rate."""
+
+    def __init__(self, path: str, fps: Optional[float] = None, realtime: bool = True, loop: bool = False):
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise FileNotFoundError(f"Could not open video: {path}")
+        file_fps = self.cap.get(cv2.CAP_PROP_FPS) or 30
+        super().__init__(fps=fps or file_fps, realtime=realtime, loop=loop)
+
+    def _read_next(self):
+        ok, frame = self.cap.read()
+        return frame if ok else None
+
+    def _rewind(self):
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+    def stop(self):
+        self.cap.release()
+
+    def __len__(self):
+        return int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+
+class RawDumpSource(FrameSource):
+    """
+    Frames from a raw dump written by RawDumpRecorder: back-to-back uint8 HxWxC
+    frames in `<name>.raw` plus a `<name>.json` sidecar with the shape and fps.
+    The file is memory-mapped, so frames are served without decoding or copying.
+    """
+
+    def __init__(self, path: str, fps: Optional[float] = None, realtime: bool = True, loop: bool = False):
+        meta = read_raw_meta(path)
+        super().__init__(fps=fps or meta.get("fps", 30), realtime=realtime, loop=loop)
+        shape = (meta["height"], meta["width"], meta["channels"])
+        self.frames = np.memmap(path, dtype=np.uint8, mode="r").reshape((-1,) + shape)
+        self._idx = 0
+
+    def _read_next(self):
+        if self._idx >= len(self.frames):
+            return None
+        frame = self.frames[self._idx]
+        self._idx += 1
+        return frame
+
+    def _rewind(self):
+        self._idx = 0
+
+    def __len__(self):
+        return len(self.frames)
+
+
+class RawDumpRecorder:
+    """Appends frames to a raw dump readable by RawDumpSource."""
+
+    def __init__(self, path: str, fps: float = 30):
+        self.path = path
+        self.fps = fps
+        self.shape = None
+        self.count = 0
+        self._f = open(path, "wb")
+
+    def write(self, frame: np.ndarray):
+        if self.shape is None:
+            self.shape = frame.shape if frame.ndim == 3 else frame.shape + (1,)
+            self._write_meta()
+        elif frame.shape[:2] != self.shape[:2]:
+            raise ValueError(f"Frame shape {frame.shape} does not match dump shape {self.shape}")
+        self._f.write(np.ascontiguousarray(frame, dtype=np.uint8).tobytes())
+        self.count += 1
+
+    def drop_last(self):
+        """Remove the last written frame from the dump (e.g. it changed while being written)."""
+        if self.count == 0:
+            return
+        self._f.seek(-int(np.prod(self.shape)), os.SEEK_END)
+        self._f.truncate()
+        self.count -= 1
+
+    def _write_meta(self):
+        meta = {"height": self.shape[0], "width": self.shape[1], "channels": self.shape[2], "fps": self.fps}
+        with open(_meta_path(self.path), "w") as f:
+            json.dump(meta, f)
+
+    def close(self):
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _meta_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".json"
+
+
+def read_raw_meta(path: str) -> dict:
+    with open(_meta_path(path)) as f:
+        return json.load(f)
+
+
+def open_frame_source(spec: str, fps: float = 30, realtime: bool = True, loop: bool = False,
+                      region=None, output_color: str = "BGR", preload: bool = False) -> FrameSource:
+    """
+    Build a FrameSource from a spec string:
+        "screen"            -> live dxcam ScreenCapture (Windows only)
+        <directory>         -> ImageDirSource
+        <file>.raw          -> RawDumpSource
+        any other file      -> VideoFileSource
+    """
+    if spec == "screen":
+        from capture.screen_capture import ScreenCapture
+        return ScreenCapture(fps=fps, region=region, output_color=output_color)
+    if os.path.isdir(spec):
+        return ImageDirSource(spec, fps=fps, realtime=realtime, loop=loop, preload=preload)
+    if spec.lower().endswith(RAW_EXT):
+        return RawDumpSource(spec, realtime=realtime, loop=loop)
+    return VideoFileSource(spec, realtime=realtime, loop=loop)
@@ -10,9 +10,32 @@ DEVICE = os.getenv("DEVICE", "cpu")
 # Table confidence threshold
 TABLE_CONF_THRES = float(os.getenv("CONF_THRES", 0.7))
 
+# Table tracking: reuse the last YOLO boxes until the schedule expires or the layout changes
+TABLE_REDETECT_EVERY_N_FRAMES = int(os.getenv("TABLE_REDETECT_EVERY_N_FRAMES", 30))
+TABLE_REDETECT_INTERVAL_S = float(os.getenv("TABLE_REDETECT_INTERVAL_S", 2.0))
+# A re-detected table keeps its id when its box overlaps the old one by at least this IoU
+TABLE_MATCH_IOU = 0.5
+
 # Card confidence threshold
 CARD_CONF_THRES = 0.6
 
+# Card classifier runtime: eager, torchscript, onnx or onnx_int8
+# (export with `python -m vision.export_card_model`, quantize with `python -m vision.quantize_card_model`)
+CARD_BACKEND = os.getenv("CARD_BACKEND", "eager")
+
+# Template-matching fast path in front of the card CNN (vision/template_matcher.py):
+# a crop is classified from the 52cards references when its correlation reaches
+# MIN_SCORE and beats the runner-up card by MIN_MARGIN, otherwise the CNN runs.
+# Off until the gate is validated on labelled captured ROIs
+# (python -m bench.template_bench --labelled <dir>); accepted matches skip the CNN
+CARD_TEMPLATE_MATCH = os.getenv("CARD_TEMPLATE_MATCH", "0") == "1"
+CARD_TEMPLATE_MIN_SCORE = 0.85
+CARD_TEMPLATE_MIN_MARGIN = 0.05
+
+# Card cache: reuse a prediction while the ROI thumbnail changes less than this (gray levels)
+CARD_CACHE_DIFF_THRES = 6.0
+CARD_CACHE_FINGERPRINT_SIZE = 16
+
 MODEL_TABLE_PATH = os.path.join(
     BASE_DIR,
     os.getenv("MODEL_TABLE_PATH", "vision/models/table_detector_v1.pt")
@@ -21,13 +44,72 @@ MODEL_TABLE_PATH = os.path.join(
 # Screen Capture Vars
 CAPTURE_FPS = int(os.getenv("CAPTURE_FPS", 30))
 CAPTURE_REGION = None
+# "screen" for live dxcam capture, or a directory of images / video file / .raw dump to replay
+FRAME_SOURCE = os.getenv("FRAME_SOURCE", "screen")
+# Replay at the source's frame rate (1) or as fast as possible (0)
+FRAME_SOURCE_REALTIME = os.getenv("FRAME_SOURCE_REALTIME", "1") == "1"
+FRAME_SOURCE_LOOP = os.getenv("FRAME_SOURCE_LOOP", "0") == "1"
 WINDOW_NAME = "PokerBot Debug (q to quit)"
+# "full" draws every analyzed frame, "overlay" redraws at most RENDER_FPS times a second,
+# "headless" opens no windows and does no drawing at all
+RENDER_MODE = os.getenv("RENDER_MODE", "full")
+RENDER_FPS = float(os.getenv("RENDER_FPS", 10))
+
+# Pipeline: frames queued between stages and report period. Older frames are dropped,
+# except when replaying a recording with FRAME_SOURCE_REALTIME=0 (every frame is processed)
+PIPELINE_QUEUE_SIZE = 1
+PIPELINE_REPORT_INTERVAL_S = 5.0
+# Shared-memory frame ring between capture and consumers (capture/frame_ring.py):
+# -1 = only when worker processes or a recorder need it, 0 = off, N = at least N slots
+FRAME_RING_SLOTS = int(os.getenv("FRAME_RING_SLOTS", -1))
+# Record every captured frame to this .raw dump (replay with FRAME_SOURCE=<path>)
+RECORD_RAW_PATH = os.getenv("RECORD_RAW_PATH", "")
+
+# Per-stage latency metrics (app/metrics.py); exporters are off unless a port/path/interval is set
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+METRICS_HTTP_PORT = int(os.getenv("METRICS_HTTP_PORT", 0))       # serves http://127.0.0.1:<port>/metrics
+METRICS_TEXTFILE = os.getenv("METRICS_TEXTFILE", "")             # Prometheus textfile, rewritten periodically
+METRICS_JSON_LOG = os.getenv("METRICS_JSON_LOG", "0") == "1"     # one JSON line per interval on stdout
+METRICS_EXPORT_INTERVAL_S = float(os.getenv("METRICS_EXPORT_INTERVAL_S", 10.0))
+
+# Table analysis worker processes (app/worker_pool.py); 0 = analyze in-process
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", 0))
+
+# Game-state diffing (state/state_diff.py): frames a changed card/seat, a new table or a
+# missing table must persist before it is reported
+STATE_STABLE_FRAMES = 2
+
+# Hand evaluator lookup tables (poker/evaluator.py), built on first use if missing
+POKER_TABLE_DIR = os.path.join(BASE_DIR, os.getenv("POKER_TABLE_DIR", "poker/tables"))
+
+# Monte Carlo equity (poker/equity.py)
+EQUITY_BATCH = 4096              # trials per vectorized batch
+EQUITY_CI_TARGET = 0.01          # stop once the 95% CI half-width is this tight
+EQUITY_MAX_TRIALS = 200000
+EQUITY_TIME_BUDGET_S = 0.05      # one frame at the decision loop's rate
+
+# Preflop equity by hand class vs 1..8 opponents, built offline with: python -m poker.preflop
+PREFLOP_EQUITY_PATH = os.path.join(POKER_TABLE_DIR, "preflop_equity.npy")
+
+# Card abstraction bucket tables, built offline with: python -m poker.abstraction
+BUCKET_TABLE_PATH = os.path.join(POKER_TABLE_DIR, "buckets.npz")
+ABSTRACTION_EHS_TRIALS = 128     # Monte Carlo trials per hand-strength estimate (flop / turn without a hand table)
+
+# Parallel MCCFR (poker/mccfr.py); 0 = one worker per core
+CFR_WORKERS = int(os.getenv("CFR_WORKERS", 0))
+CFR_SYNC_ITERATIONS = 200        # iterations per worker between regret merges
 
 # Player Detection Vars
 EDGE_RATIO_THRESHOLD = 0.1
 LAPLACIAN_VAR_THRESHOLD = 100.0
 NMS_OVERLAP_THRESHOLD = 0.45
 
+# Empty card slot gate: a card ROI below both thresholds is bare felt and gets
+# NO_CARD without running the classifier
+CARD_EMPTY_GATE = os.getenv("CARD_EMPTY_GATE", "1") == "1"
+EMPTY_SLOT_EDGE_RATIO_THRESHOLD = 0.02
+EMPTY_SLOT_LAPLACIAN_VAR_THRESHOLD = 250.0
+
 
 
 TABLE_ROIS = {
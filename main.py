@@ -1,110 +1,259 @@
-from capture.screen_capture import ScreenCapture
+from capture.frame_source import open_frame_source
+from capture.frame_ring import RingRecorder
 from vision.table_detector import TableDetector
 from vision.player_detector import PlayerDetector
 from vision.card_detector import CardClassifier
+from vision.card_cache import CardCache
+from vision.template_matcher import CascadeCardClassifier, TemplateCardMatcher
 from vision.draw import draw_tables, draw_roi, draw_players
 from app.debug_viewer import DebugViewer
+from app.analysis import analyze_tables
+from app.metrics import METRICS, MetricsExporter
+from app.pipeline import FramePipeline
+from app.worker_pool import TableWorkerPool, WorkerSettings
+from state.table_state import TableState
+from state.state_diff import TableStateDiffer
+from collections import deque
 import config
 import cv2
+import time
 
 
+def render_frame(frame, tables, analysis):
+    """
+    Draw tables, players and card ROIs/labels.
+
+    Returns:
+        (annotated frame, all_detected_cards dict for the debug panel)
+    """
+    # Outline each table (green)
+    annotated = draw_tables(frame, tables)
+    all_detected_cards = {}
+
+    for table_result in analysis:
+        draw_players(annotated, table_result["players"], color=(0, 165, 255))
+
+        for roi_name, roi, card_info in table_result["cards"]:
+            x1, y1 = roi[0], roi[1]
+
+            # Draw the ROIs
+            draw_roi(annotated, roi, roi_name)
+
+            # Store the result
+            all_detected_cards[roi_name] = card_info
+
+            # Draw the card label on the frame
+            text = f"{card_info['label']} ({card_info['card_conf']:.2f})"
+            cv2.putText(annotated, text, (x1, y1 - 5),
+                      cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 255, 0), 1)
+
+    return annotated, all_detected_cards
+
 
 def main():
 
-    cap = ScreenCapture(
-        fps=config.CAPTURE_FPS, 
-        region=config.CAPTURE_REGION, 
+    # Live screen by default; FRAME_SOURCE can point at recorded frames instead
+    cap = open_frame_source(
+        config.FRAME_SOURCE,
+        fps=config.CAPTURE_FPS,
+        realtime=config.FRAME_SOURCE_REALTIME,
+        loop=config.FRAME_SOURCE_LOOP,
+        region=config.CAPTURE_REGION,
         output_color="BGR"
     )
-    
+
     detector = TableDetector(
         model_path=config.MODEL_TABLE_PATH,
         conf_thres=config.TABLE_CONF_THRES,
-        device=config.DEVICE
+        device=config.DEVICE,
+        redetect_every_n_frames=config.TABLE_REDETECT_EVERY_N_FRAMES,
+        redetect_interval_s=config.TABLE_REDETECT_INTERVAL_S,
+        match_iou=config.TABLE_MATCH_IOU
     )
 
-    player_detector = PlayerDetector(
-        edge_ratio_threshold=config.EDGE_RATIO_THRESHOLD,
-        laplacian_var_threshold=config.LAPLACIAN_VAR_THRESHOLD,
-        nms_overlap_threshold=config.NMS_OVERLAP_THRESHOLD
+    card_model_path = "vision/models/tiny_corner_net_best_cardv4.pt"
+
+    # Only the YOLO passes; track() calls detect() through the instance
+    METRICS.instrument(detector, "detect", "table_detect")
+
+    def detect_stage(packet):
+        # YOLO table detection, re-run only when the table layout may have changed
+        packet.data["tables"] = detector.track(packet.frame)
+        # Persistent ids: list positions shift whenever a table opens or closes
+        packet.data["table_ids"] = detector.table_ids
+        return packet
+
+    # Game-state changes per table, produced on the analyze thread for every
+    # analyzed frame (so none are lost when rendering drops frames)
+    state_differ = TableStateDiffer(stable_frames=config.STATE_STABLE_FRAMES)
+    state_events = deque()
+
+    def track_state(packet):
+        table_ids = dict(zip(packet.data["tables"], packet.data["table_ids"]))
+        states = [TableState.from_analysis(table_ids[r["table"]], r, frame_seq=packet.seq)
+                  for r in packet.data["analysis"]]
+        packet.data["states"] = states
+        state_events.extend(state_differ.update(states))
+        return packet
+
+    pool = None
+    card_clf = card_cache = None
+    if config.ANALYSIS_WORKERS > 0:
+        # Tables spread over worker processes, each with its own models and card cache
+        pool = TableWorkerPool(config.ANALYSIS_WORKERS, WorkerSettings(card_weights=card_model_path))
+
+        def analyze_stage(packet):
+            # Workers read the frame straight from the ring when it is in one
+            ring_ref = (pipeline.ring.name, packet.ring_seq) if packet.ring_seq is not None else None
+            packet.data["analysis"] = pool.analyze(packet.frame, packet.data["tables"], ring_ref=ring_ref,
+                                                   table_ids=packet.data["table_ids"])
+            return track_state(packet)
+    else:
+        player_detector = PlayerDetector(
+            edge_ratio_threshold=config.EDGE_RATIO_THRESHOLD,
+            laplacian_var_threshold=config.LAPLACIAN_VAR_THRESHOLD,
+            nms_overlap_threshold=config.NMS_OVERLAP_THRESHOLD,
+            empty_slot_edge_ratio=config.EMPTY_SLOT_EDGE_RATIO_THRESHOLD,
+            empty_slot_laplacian_var=config.EMPTY_SLOT_LAPLACIAN_VAR_THRESHOLD
+        )
+
+        card_clf = CardClassifier(weights_path=card_model_path, device="cpu", backend=config.CARD_BACKEND)
+        METRICS.instrument(card_clf, "predict_corners", "card_cnn")
+        if config.CARD_TEMPLATE_MATCH:
+            card_clf = CascadeCardClassifier(
+                TemplateCardMatcher(min_score=config.CARD_TEMPLATE_MIN_SCORE,
+                                    min_margin=config.CARD_TEMPLATE_MIN_MARGIN),
+                card_clf
+            )
+
+        card_cache = CardCache(
+            diff_threshold=config.CARD_CACHE_DIFF_THRES,
+            fingerprint_size=config.CARD_CACHE_FINGERPRINT_SIZE
+        )
+
+        def analyze_stage(packet):
+            packet.data["analysis"] = analyze_tables(
+                packet.frame, packet.data["tables"], player_detector, card_clf, card_cache,
+                table_ids=packet.data["table_ids"]
+            )
+            return track_state(packet)
+
+    stages = [("detect", detect_stage), ("analyze", analyze_stage)]
+    ring_slots = config.FRAME_RING_SLOTS
+    if ring_slots < 0:
+        ring_slots = 1 if pool is not None or config.RECORD_RAW_PATH else 0
+    if ring_slots > 0:
+        ring_slots = max(ring_slots, FramePipeline.min_ring_slots(len(stages), config.PIPELINE_QUEUE_SIZE))
+
+    # capture -> table detection -> per-table analysis run on worker threads;
+    # rendering stays on the main thread (OpenCV GUI calls)
+    pipeline = FramePipeline(
+        source=cap.get_frame,
+        stages=stages,
+        queue_size=config.PIPELINE_QUEUE_SIZE,
+        # A recording replayed as fast as possible waits for the slowest stage instead of dropping frames
+        drop_frames=config.FRAME_SOURCE == "screen" or config.FRAME_SOURCE_REALTIME,
+        source_finished=lambda: cap.finished,
+        ring_slots=ring_slots
     )
 
-    card_model_path = "vision/models/tiny_corner_net_best_cardv4.pt"
+    # "headless" never touches OpenCV GUI or drawing code; "overlay" renders at RENDER_FPS
+    render_mode = config.RENDER_MODE
+    if render_mode not in ("full", "overlay", "headless"):
+        raise ValueError(f"RENDER_MODE must be full, overlay or headless, not {render_mode!r}")
+    viewer = None if render_mode == "headless" else DebugViewer(config.WINDOW_NAME)
+    render_interval_s = 1.0 / config.RENDER_FPS if render_mode == "overlay" else 0.0
+    last_render_t = 0.0
+
+    if viewer is None:
+        print("Starting PokerBot headless. Press Ctrl+C to quit.")
+    else:
+        print("Starting PokerBot. Press 'q' to quit.")
 
-    card_clf = CardClassifier(weights_path=card_model_path, device="cpu")
+    exporter = None
+    if METRICS.enabled and (config.METRICS_HTTP_PORT or config.METRICS_TEXTFILE or config.METRICS_JSON_LOG):
+        exporter = MetricsExporter(
+            http_port=config.METRICS_HTTP_PORT,
+            textfile_path=config.METRICS_TEXTFILE,
+            json_log=config.METRICS_JSON_LOG,
+            interval_s=config.METRICS_EXPORT_INTERVAL_S
+        )
+        exporter.start()
+        if config.METRICS_HTTP_PORT:
+            print(f"Metrics at http://127.0.0.1:{config.METRICS_HTTP_PORT}/metrics")
 
-    viewer = DebugViewer(config.WINDOW_NAME)
+    pipeline.start()
+    last_report_t = time.perf_counter()
 
-    print("Starting PokerBot. Press 'q' to quit.")
+    recorder = None
+    if config.RECORD_RAW_PATH:
+        ring = pipeline.wait_ring(timeout=10.0)
+        if ring is not None:
+            recorder = RingRecorder(ring, config.RECORD_RAW_PATH, reader_id=0, fps=config.CAPTURE_FPS)
+            recorder.start()
+            print(f"Recording frames to {config.RECORD_RAW_PATH}")
 
     try:
         while True:
-            frame = cap.get_frame()
-            if frame is None:
+            packet = pipeline.get(timeout=0.1)
+            if packet is None:
+                if pipeline.finished:
+                    break
+                if viewer is not None and cv2.waitKey(1) & 0xFF == ord("q"):
+                    break
                 continue
-            
-            # YOLO table detection model on each frame captured
-            tables = detector.detect(frame)
-            
-            # Outline each table (green)
-            annotated = draw_tables(frame, tables)
-            all_detected_cards = {}
-
-            for table in tables:
-                if table is not None and table.w > 0 and table.h > 0:
-                    
-                    
-                    players = player_detector.detect(frame, table)
-                    draw_players(annotated, players, color=(0, 165, 255)) 
-                    
-                    # Detect cards in player and community card ROIs
-                    for roi_name, (x_pct, y_pct, w_pct, h_pct) in config.TABLE_ROIS.items():
-                        if "card" in roi_name:
-                            x1, y1, x2, y2 = table.roi_from_rel(x_pct=x_pct, y_pct=y_pct, w_pct=w_pct, h_pct=h_pct)
-                            
-                            # Draw the ROIs
-                            roi = table.roi_from_rel(x_pct=x_pct, y_pct=y_pct, w_pct=w_pct, h_pct=h_pct)
-                            draw_roi(annotated, roi, roi_name)
-
-                            # Extract the card region from the frame
-                            if x1 >= 0 and y1 >= 0 and x2 <= frame.shape[1] and y2 <= frame.shape[0]:
-                                card_region = frame[y1:y2, x1:x2]
-                                
-                                if card_region.size > 0:
-                                    # Classify the card using the tiny CNN model
-                                    prediction = card_clf.predict_corner(card_region)
-                                    
-                                    # Apply confidence threshold
-                                    if prediction.card_conf < config.CARD_CONF_THRES:
-                                        label = "NO_CARD"
-                                        card_conf = prediction.card_conf
-                                    else:
-                                        label = prediction.label
-                                        card_conf = prediction.card_conf
-                                    
-                                    # Store the result
-                                    all_detected_cards[roi_name] = {
-                                        "label": label,
-                                        "rank_conf": prediction.rank_conf,
-                                        "suit_conf": prediction.suit_conf,
-                                        "card_conf": card_conf
-                                    }
-                                    
-                                    # Draw the card label on the frame
-                                    text = f"{label} ({card_conf:.2f})"
-                                    cv2.putText(annotated, text, (x1, y1 - 5), 
-                                              cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 255, 0), 1)
-
-
-            key = viewer.show(annotated, detected_cards=all_detected_cards)
-            viewer.log_fps()
+
+            while state_events:
+                event = state_events.popleft()
+                if viewer is not None:
+                    viewer.add_debug_message(str(event))
+                else:
+                    print(event)
+
+            key = None
+            t0 = time.perf_counter()
+            if viewer is not None and t0 - last_render_t >= render_interval_s:
+                last_render_t = t0
+                annotated, all_detected_cards = render_frame(
+                    packet.frame, packet.data["tables"], packet.data["analysis"]
+                )
+                key = viewer.show(annotated, detected_cards=all_detected_cards)
+                viewer.log_fps()
+            pipeline.mark_done(packet, render_s=time.perf_counter() - t0)
+
+            now = time.perf_counter()
+            if now - last_report_t >= config.PIPELINE_REPORT_INTERVAL_S:
+                report = FramePipeline.format_report(pipeline.report())
+                print(report)
+                summaries = []
+                if card_cache is not None:
+                    summaries.append(card_cache.summary())
+                if isinstance(card_clf, CascadeCardClassifier):
+                    summaries.append(card_clf.summary())
+                for summary in summaries:
+                    if viewer is not None:
+                        viewer.add_debug_message(summary)
+                    else:
+                        print(summary)
+                last_report_t = now
 
             if key == ord("q"):
                 break
 
+    except KeyboardInterrupt:
+        pass
     finally:
+        if exporter is not None:
+            exporter.stop()
+        if recorder is not None:
+            recorder.stop()
+            print(f"Recorded {recorder.recorder.count} frames ({recorder.dropped} dropped)")
+        pipeline.stop()
+        if pool is not None:
+            pool.stop()
         cap.stop()
-        viewer.close()
+        if viewer is not None:
+            viewer.close()
         print("Stopped.")
 
 
@@ -0,0 +1,672 @@
+"""
+Card abstraction for the solver: suit isomorphism plus equity-based hand
+and board buckets.
+
+  - canonical_keys() maps a hand (hole cards, board) to one key per suit
+    isomorphism class; isomorphic_count() gives the exact number of classes
+    per street (Burnside's lemma over the 24 suit permutations).
+  - Hands are bucketed by expected hand strength (EHS: equity against one
+    random hand over random run-outs) into equal-frequency buckets per
+    street. On the flop and turn the EHS of every hand is computed exactly
+    (every run-out against every opponent hand) once per canonical board,
+    and the buckets are stored per (board, hole pair); river EHS is exact
+    per lookup. Flop boards are clustered by the distribution of EHS they
+    give the hole cards, so one solved representative flop can stand in for
+    a whole bucket.
+  - build_abstraction() estimates bucket priors, street transitions and
+    showdown odds for CFRSolver.
+
+Build the bucket tables (about 10 minutes on one core at the defaults,
+nearly all of it the exact flop and turn tables):
+    python -m poker.abstraction --buckets 50 50 50 50 --board-buckets 30
+"""
+
+import argparse
+import itertools
+import json
+import os
+import time
+from collections import defaultdict
+from math import comb
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import config
+from poker.cards import N_CARDS, N_RANKS, parse_cards
+from poker.cfr import CardAbstraction
+from poker.equity import deal
+from poker.evaluator import EVALUATOR, N_HAND_VALUES, HandEvaluator
+from poker.preflop import N_HAND_CLASSES, class_combo, class_combos, hand_classes
+
+
+STREET_BOARD_CARDS = {"preflop": 0, "flop": 3, "turn": 4, "river": 5}
+STREET_NAMES = tuple(STREET_BOARD_CARDS)
+
+_SUIT_PERMS = np.array(list(itertools.permutations(range(4))), dtype=np.intp)
+# (24, 52): card id under each suit permutation
+_CARD_PERMS = _SUIT_PERMS[:, np.arange(N_CARDS) // N_RANKS] * N_RANKS + np.arange(N_CARDS) % N_RANKS
+
+
+# --- suit isomorphism -----------------------------------------------------
+
+def canonical_keys(*groups: np.ndarray, chunk: int = 1 << 16, return_perm: bool = False):
+    """
+    One int64 key per row that is equal for exactly the suit-isomorphic rows.
+
+    Each group is an (n, k) array of card ids whose order doesn't matter
+    (e.g. hole cards, board); the key is the smallest base-52 encoding of the
+    sorted groups over all 24 suit permutations.
+
+    With return_perm=True also returns, per row, the index of a suit
+    permutation (row of _CARD_PERMS) that maps the row onto its key.
+    """
+    groups = [np.asarray(g, dtype=np.intp) for g in groups]
+    n = len(groups[0])
+    out = np.empty(n, dtype=np.int64)
+    perm = np.empty(n, dtype=np.intp)
+    for start in range(0, n, chunk):
+        key = np.zeros((len(_SUIT_PERMS), min(chunk, n - start)), dtype=np.int64)
+        for g in groups:
+            mapped = np.sort(_CARD_PERMS[:, g[start:start + chunk]], axis=2)
+            for i in range(mapped.shape[2]):
+                key = key * N_CARDS + mapped[:, :, i]
+        perm[start:start + chunk] = key.argmin(axis=0)
+        out[start:start + chunk] = key[perm[start:start + chunk], np.arange(key.shape[1])]
+    return (out, perm) if return_perm else out
+
+
+def decode_board_keys(keys: np.ndarray, m: int) -> np.ndarray:
+    """(n, m) ascending card ids of single-group canonical keys (the canonical board itself)."""
+    keys = np.asarray(keys, dtype=np.int64).copy()
+    boards = np.empty((len(keys), m), dtype=np.uint8)
+    for i in range(m - 1, -1, -1):
+        boards[:, i] = keys % N_CARDS
+        keys //= N_CARDS
+    return boards
+
+
+def hole_pair_index(holes: np.ndarray, boards: np.ndarray) -> np.ndarray:
+    """
+    Index of each row's hole pair among the pairs of cards not on its board,
+    in np.triu_indices order over the live cards (board_strength's order).
+    """
+    holes = np.sort(np.asarray(holes, dtype=np.intp), axis=1)
+    boards = np.asarray(boards, dtype=np.intp)
+    live = N_CARDS - boards.shape[1]
+    # Position of each hole card in its row's ascending list of live cards
+    pos = holes - (boards[:, None, :] < holes[:, :, None]).sum(axis=2)
+    i, j = pos[:, 0], pos[:, 1]
+    return i * (2 * live - i - 1) // 2 + j - i - 1
+
+
+def isomorphic_count(*sizes: int) -> int:
+    """
+    Number of suit-isomorphism classes of disjoint card groups of the given
+    sizes, e.g. isomorphic_count(2, 3) = 1,286,792 flop hands. Burnside: the
+    average, over suit permutations, of the groups fixed by the permutation;
+    a fixed group is a union of whole card orbits (a rank's cycle of suits).
+    """
+    total = 0
+    for perm in _SUIT_PERMS:
+        orbits = [size for size in _cycle_lengths(perm) for _ in range(N_RANKS)]
+        ways = {tuple(0 for _ in sizes): 1}
+        for size in orbits:
+            nxt = defaultdict(int)
+            for filled, count in ways.items():
+                nxt[filled] += count
+                for g, need in enumerate(sizes):
+                    if filled[g] + size <= need:
+                        nxt[filled[:g] + (filled[g] + size,) + filled[g + 1:]] += count
+            ways = nxt
+        total += ways.get(tuple(sizes), 0)
+    return total // len(_SUIT_PERMS)
+
+
+def raw_count(*sizes: int) -> int:
+    total, left = 1, N_CARDS
+    for size in sizes:
+        total *= comb(left, size)
+        left -= size
+    return total
+
+
+def _cycle_lengths(perm: np.ndarray) -> List[int]:
+    seen, lengths = set(), []
+    for start in range(len(perm)):
+        length, i = 0, start
+        while i not in seen:
+            seen.add(i)
+            i = int(perm[i])
+            length += 1
+        if length:
+            lengths.append(length)
+    return lengths
+
+
+# --- hand strength --------------------------------------------------------
+
+def hand_strength(holes: np.ndarray, boards: np.ndarray, trials: int, rng: np.random.Generator,
+                  evaluator: HandEvaluator = EVALUATOR, chunk: int = 1 << 18) -> np.ndarray:
+    """
+    Monte Carlo EHS of each (hole, board) row: the share of pots won (ties
+    half) against one random hand over random run-outs, `trials` per row.
+
+    Args:
+        holes: (n, 2) card ids.
+        boards: (n, m) card ids, m in 0, 3, 4, 5 (one board length per call).
+    """
+    holes = np.asarray(holes, dtype=np.uint8).reshape(-1, 2)
+    boards = np.asarray(boards, dtype=np.uint8).reshape(len(holes), -1)
+    n, m = boards.shape
+    dead = np.zeros((n, N_CARDS), dtype=bool)
+    np.put_along_axis(dead, np.concatenate([holes, boards], axis=1).astype(np.intp), True, axis=1)
+    live = np.argsort(dead, axis=1, kind="stable")[:, :N_CARDS - 2 - m].astype(np.uint8)
+
+    out = np.empty(n)
+    per = max(1, chunk // trials)
+    for start in range(0, n, per):
+        rows = slice(start, start + per)
+        drawn = deal(rng, np.repeat(live[rows], trials, axis=0), 7 - m)
+        board = np.concatenate([np.repeat(boards[rows], trials, axis=0), drawn[:, 2:]], axis=1)
+        hero = evaluator.evaluate_batch(np.concatenate([np.repeat(holes[rows], trials, axis=0), board], axis=1))
+        opp = evaluator.evaluate_batch(np.concatenate([drawn[:, :2], board], axis=1))
+        score = (hero > opp) + 0.5 * (hero == opp)
+        out[rows] = score.reshape(-1, trials).mean(axis=1)
+    return out
+
+
+def board_strength(board: Sequence[int], evaluator: HandEvaluator = EVALUATOR, chunk: int = 294) -> np.ndarray:
+    """
+    Exact EHS of every hole pair on one flop or turn board: every run-out,
+    every opponent hand.
+
+    Per run-out, all hole pairs of the live cards are valued at once (the
+    evaluator's rank keys add up, so that is one broadcast and one table
+    read). A hand beats the opponents that rank below it on the run-out,
+    minus those that share one of its cards; both counts come from sorting,
+    overall and per card, instead of pairing every hand with every other.
+
+    Returns:
+        (C(52 - m, 2),) EHS per hole pair of the live cards, in
+        np.triu_indices order (see hole_pair_index)
+    """
+    board = np.asarray(board, dtype=np.intp)
+    live = np.setdiff1d(np.arange(N_CARDS), board)
+    n_live = len(live)
+    if board.size not in (3, 4):
+        raise ValueError(f"board_strength takes a flop or turn, got {board.size} cards")
+    rank7 = np.asarray(evaluator.table("rank7"))
+    flush = np.asarray(evaluator.table("flush"))
+    keys = evaluator.card_keys[live].astype(np.int32)
+    suits = live // N_RANKS
+    bits = (1 << (live % N_RANKS)).astype(np.int32)
+    board_suits = np.bincount(board // N_RANKS, minlength=4)
+    board_bits = np.zeros(4, dtype=np.int32)
+    for card in board.tolist():
+        board_bits[card // N_RANKS] |= 1 << (card % N_RANKS)
+
+    runouts = np.array(list(itertools.combinations(range(n_live), 5 - board.size)), dtype=np.intp)
+    pair_keys = keys[:, None] + keys[None, :] + int(evaluator.card_keys[board].sum())
+    idx = np.arange(n_live)
+    # Values go up to N_HAND_VALUES; this marks pairs that are not hands on the run-out
+    invalid_value = N_HAND_VALUES + 1
+    bins = invalid_value + 1
+    total = np.zeros((n_live, n_live))
+    for start in range(0, len(runouts), chunk):
+        run = runouts[start:start + chunk]
+        n_run = len(run)
+        rows = np.arange(n_run)
+        # Pairs sharing a card with the run-out (overwritten below) can sum past the table
+        values = rank7.take(pair_keys[None] + keys[run].sum(axis=1)[:, None, None], mode="clip")
+        # Only the suit with the most cards on the five-card board can make a flush
+        counts = board_suits + (suits[run][:, :, None] == np.arange(4)).sum(axis=1)
+        flush_suit = counts.argmax(axis=1)
+        run_bits = np.where(suits[run] == flush_suit[:, None], bits[run], 0).sum(axis=1)
+        suited = np.where(suits[None, :] == flush_suit[:, None], bits[None, :], 0).astype(np.int32)
+        fields = (board_bits[flush_suit] + run_bits)[:, None] | suited
+        np.maximum(values, flush.take(fields[:, :, None] | suited[:, None, :]), out=values)
+        values = values.astype(np.int32)
+        values[:, idx, idx] = invalid_value
+        for c in run.T:
+            values[rows, c, :] = invalid_value
+            values[rows, :, c] = invalid_value
+
+        # Opponents ranked below / equal over all pairs (each pair appears twice, as (a, b) and (b, a))
+        offsets = values + (rows * bins)[:, None, None]
+        hist = np.bincount(offsets.ravel(), minlength=n_run * bins).reshape(n_run, bins)
+        below = (np.cumsum(hist, axis=1) - hist).ravel()
+        hist = hist.ravel()
+        # ... and among the pairs that share card a (row a): position of the first / last equal value
+        order = np.argsort(values, axis=2)
+        ranked = np.take_along_axis(values, order, 2)
+        change = ranked[..., 1:] != ranked[..., :-1]
+        first = np.zeros_like(ranked)
+        first[..., 1:] = np.where(change, idx[1:], 0)
+        np.maximum.accumulate(first, axis=2, out=first)
+        last = np.full_like(ranked, n_live - 1)
+        last[..., :-1] = np.where(change, idx[:-1], n_live - 1)
+        last = np.minimum.accumulate(last[..., ::-1], axis=2)[..., ::-1]
+        row_below = np.empty_like(values)
+        np.put_along_axis(row_below, order, first, 2)
+        row_equal = np.empty_like(values)
+        np.put_along_axis(row_equal, order, last - first + 1, 2)
+
+        # Twice the opponents beaten plus half the ties; a pair sharing both
+        # cards is the hand itself, which ties with itself in both rows
+        score = (below[offsets] - 2 * (row_below + row_below.transpose(0, 2, 1))
+                 + 0.5 * (hist[offsets] - 2 * (row_equal + row_equal.transpose(0, 2, 1)) + 2))
+        score[values == invalid_value] = 0
+        total += score.sum(axis=0)
+
+    a, b = np.triu_indices(n_live, 1)
+    opponents = comb(N_CARDS - 7, 2)
+    return total[a, b] / (2 * opponents * comb(n_live - 2, 5 - board.size))
+
+
+def river_strength(holes: np.ndarray, boards: np.ndarray, evaluator: HandEvaluator = EVALUATOR,
+                   chunk: int = 256) -> np.ndarray:
+    """Exact EHS of (n, 2) hole cards on (n, 5) river boards: every opponent hand."""
+    holes = np.asarray(holes, dtype=np.uint8).reshape(-1, 2)
+    boards = np.asarray(boards, dtype=np.uint8).reshape(len(holes), 5)
+    dead = np.zeros((len(holes), N_CARDS), dtype=bool)
+    np.put_along_axis(dead, np.concatenate([holes, boards], axis=1).astype(np.intp), True, axis=1)
+    live = np.argsort(dead, axis=1, kind="stable")[:, :N_CARDS - 7].astype(np.uint8)
+    a, b = np.triu_indices(N_CARDS - 7, 1)
+
+    out = np.empty(len(holes))
+    for start in range(0, len(holes), chunk):
+        rows = slice(start, start + chunk)
+        hero = evaluator.evaluate_batch(np.concatenate([holes[rows], boards[rows]], axis=1))
+        opp_holes = np.stack([live[rows][:, a], live[rows][:, b]], axis=2)  # (rows, 990, 2)
+        n = len(opp_holes)
+        opp = evaluator.evaluate_batch(np.concatenate(
+            [opp_holes, np.broadcast_to(boards[rows][:, None, :], (n, len(a), 5))], axis=2).reshape(-1, 7))
+        opp = opp.reshape(n, len(a))
+        out[rows] = ((hero[:, None] > opp) + 0.5 * (hero[:, None] == opp)).mean(axis=1)
+    return out
+
+
+def deal_hands(rng: np.random.Generator, n: int, players: int = 1,
+               board: Sequence[int] = ()) -> Tuple[np.ndarray, np.ndarray]:
+    """n random deals: (n, players, 2) hole cards and (n, 5) boards starting with `board`."""
+    fixed = np.asarray(board, dtype=np.uint8)
+    live = np.setdiff1d(np.arange(N_CARDS, dtype=np.uint8), fixed)
+    drawn = deal(rng, np.tile(live, (n, 1)), 2 * players + 5 - len(fixed))
+    boards = np.concatenate([np.broadcast_to(fixed, (n, len(fixed))), drawn[:, 2 * players:]], axis=1)
+    return drawn[:, :2 * players].reshape(n, players, 2), boards
+
+
+def _kmeans(points: np.ndarray, k: int, rng: np.random.Generator, iterations: int = 50) -> np.ndarray:
+    """Cluster labels of the rows of points (k-means++ seeding, Lloyd iterations)."""
+    k = min(k, len(points))
+    centers = np.empty((k, points.shape[1]))
+    centers[0] = points[rng.integers(len(points))]
+    dist = np.square(points - centers[0]).sum(axis=1)
+    for c in range(1, k):
+        pick = rng.choice(len(points), p=dist / dist.sum()) if dist.sum() > 0 else rng.integers(len(points))
+        centers[c] = points[pick]
+        dist = np.minimum(dist, np.square(points - centers[c]).sum(axis=1))
+
+    labels = None
+    for _ in range(iterations):
+        new = np.square(points[:, None, :] - centers[None, :, :]).sum(axis=2).argmin(axis=1)
+        if labels is not None and np.array_equal(new, labels):
+            break
+        labels = new
+        for c in range(k):
+            members = points[labels == c]
+            if len(members):
+                centers[c] = members.mean(axis=0)
+    # Renumber so that labels are 0..used-1
+    return np.unique(labels, return_inverse=True)[1]
+
+
+# --- bucket tables --------------------------------------------------------
+
+def build_tables(buckets: Dict[str, int], board_buckets: Dict[str, int], samples: int = 20000,
+                 trials: int = config.ABSTRACTION_EHS_TRIALS, seed: int = 0, verbose: bool = True,
+                 hand_tables: Sequence[str] = ("flop", "turn")) -> Dict[str, np.ndarray]:
+    """
+    Bucket tables, as saved by save_tables():
+      preflop                  uint16[169]  hand class -> bucket
+      edges_<street>           float32      EHS bucket boundaries, equal-frequency over all hands
+                                            (hand_tables streets) or over `samples` hands
+      board_keys_<street>      int64        sorted canonical keys of every board of the street
+      hand_bucket_<street>     uint8        (boards, hole pairs) bucket of every hole pair on each
+                                            canonical board (decode_board_keys), exact EHS
+      board_bucket_<street>    uint16       board bucket of each key
+      board_rep_<street>       uint8        (buckets, m) representative board of each bucket
+
+    Args:
+        buckets: Hand buckets per street, e.g. {"preflop": 50, "flop": 50, ...}.
+        board_buckets: Board buckets per postflop street to cluster (all
+            canonical boards are enumerated, so keep this to flop / turn).
+        hand_tables: Streets (flop / turn) whose hands get an exact bucket table.
+            River edges use exact EHS per sampled hand; other streets fall
+            back to Monte Carlo EHS with `trials` trials.
+    """
+    rng = np.random.default_rng(seed)
+    tables: Dict[str, np.ndarray] = {}
+    exact_ehs: Dict[str, np.ndarray] = {}
+    t0 = time.perf_counter()
+
+    if "preflop" in buckets:
+        combos = np.array([class_combo(i) for i in range(N_HAND_CLASSES)], dtype=np.uint8)
+        ehs = hand_strength(combos, np.empty((N_HAND_CLASSES, 0)), max(trials, 2000), rng)
+        weights = np.array([class_combos(i) for i in range(N_HAND_CLASSES)])
+        order = np.argsort(ehs, kind="stable")
+        cum = np.cumsum(weights[order]) / weights.sum()
+        rank = np.empty(N_HAND_CLASSES, dtype=np.intp)
+        rank[order] = np.arange(N_HAND_CLASSES)
+        # Equal-frequency by combos, weakest classes in bucket 0
+        tables["preflop"] = np.minimum((cum[rank] - 1e-9) * buckets["preflop"], buckets["preflop"] - 1).astype(np.uint16)
+
+    for street in STREET_NAMES[1:]:
+        if street not in buckets:
+            continue
+        m = STREET_BOARD_CARDS[street]
+        if street in hand_tables:
+            keys, weights, ehs = _exact_board_ehs(m, verbose)
+            edges = _weighted_edges(ehs, weights, buckets[street])
+            tables[f"board_keys_{street}"] = keys
+            tables[f"hand_bucket_{street}"] = np.searchsorted(edges, ehs, side="right").astype(
+                np.uint8 if buckets[street] <= 256 else np.uint16)
+            tables[f"edges_{street}"] = edges.astype(np.float32)
+            exact_ehs[street] = ehs
+            if verbose:
+                print(f"  {street}: {buckets[street]} hand buckets, exact EHS of {ehs.size:,} hole pairs "
+                      f"on {len(keys)} canonical boards, {time.perf_counter() - t0:.0f} s")
+            continue
+        holes, boards = deal_hands(rng, samples, 1)
+        if m == 5:
+            ehs = river_strength(holes[:, 0], boards)
+        else:
+            ehs = hand_strength(holes[:, 0], boards[:, :m], trials, rng)
+        qs = np.linspace(0, 1, buckets[street] + 1)[1:-1]
+        tables[f"edges_{street}"] = np.quantile(ehs, qs).astype(np.float32)
+        if verbose:
+            print(f"  {street}: {buckets[street]} hand buckets from {samples} hands, {time.perf_counter() - t0:.0f} s")
+
+    for street, k in board_buckets.items():
+        m = STREET_BOARD_CARDS[street]
+        boards = np.array(list(itertools.combinations(range(N_CARDS), m)), dtype=np.uint8)
+        keys = canonical_keys(boards)
+        uniq, first = np.unique(keys, return_index=True)
+        reps = boards[first]
+        tables[f"board_keys_{street}"] = uniq
+        if street in exact_ehs:
+            # Quantiles over every hole pair's exact EHS instead of a sample of hole pairs
+            features = np.quantile(exact_ehs[street], _BOARD_QUANTILES, axis=1).T
+        else:
+            features = _board_features(reps, trials, rng)
+        labels = _kmeans(features, k, rng)
+        tables[f"board_bucket_{street}"] = labels.astype(np.uint16)
+        tables[f"board_rep_{street}"] = np.array(
+            [reps[labels == c][np.square(features[labels == c] - features[labels == c].mean(axis=0)).sum(axis=1).argmin()]
+             for c in range(labels.max() + 1)], dtype=np.uint8)
+        if verbose:
+            print(f"  {street}: {len(uniq)} canonical boards -> {labels.max() + 1} board buckets, "
+                  f"{time.perf_counter() - t0:.0f} s")
+    return tables
+
+
+# EHS percentiles of the hole cards on a board, the board's clustering features
+_BOARD_QUANTILES = np.linspace(0.05, 0.95, 10)
+_BOARD_HOLES = 64
+
+
+def _board_features(boards: np.ndarray, trials: int, rng: np.random.Generator) -> np.ndarray:
+    n, m = boards.shape
+    live = np.array([np.setdiff1d(np.arange(N_CARDS, dtype=np.uint8), b) for b in boards])
+    holes = np.stack([deal(rng, live.copy(), 2) for _ in range(_BOARD_HOLES)], axis=1)  # (n, H, 2)
+    ehs = hand_strength(holes.reshape(-1, 2), np.repeat(boards, _BOARD_HOLES, axis=0), max(trials // 2, 16), rng)
+    return np.quantile(ehs.reshape(n, _BOARD_HOLES), _BOARD_QUANTILES, axis=1).T
+
+
+def _exact_board_ehs(m: int, verbose: bool) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    board_strength() of every canonical board with m cards.
+
+    Returns:
+        (sorted canonical keys, boards per key, float32 (keys, hole pairs) EHS)
+    """
+    boards = np.array(list(itertools.combinations(range(N_CARDS), m)), dtype=np.uint8)
+    keys, weights = np.unique(canonical_keys(boards), return_counts=True)
+    canonical = decode_board_keys(keys, m)
+    ehs = np.empty((len(keys), comb(N_CARDS - m, 2)), dtype=np.float32)
+    t0 = time.perf_counter()
+    for i, board in enumerate(canonical):
+        ehs[i] = board_strength(board)
+        if verbose and (i + 1) % 500 == 0:
+            elapsed = time.perf_counter() - t0
+            print(f"    {i + 1}/{len(keys)} boards, {elapsed / (i + 1) * (len(keys) - i - 1):.0f} s left", flush=True)
+    return keys, weights, ehs
+
+
+def _weighted_edges(values: np.ndarray, weights: np.ndarray, n_buckets: int) -> np.ndarray:
+    """Equal-frequency boundaries of (boards, pairs) values, each board row weighted by weights[board]."""
+    order = np.argsort(values, axis=None, kind="stable")
+    cum = np.cumsum(np.repeat(weights, values.shape[1])[order])
+    qs = np.linspace(0, 1, n_buckets + 1)[1:-1] * cum[-1]
+    return values.ravel()[order][np.searchsorted(cum, qs)].astype(np.float64)
+
+
+def save_tables(tables: Dict[str, np.ndarray], meta: dict, path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp.npz"
+    np.savez(tmp, meta=np.array(json.dumps(meta)), **tables)
+    os.replace(tmp, path)
+
+
+class HandBucketer:
+    """
+    Bucket lookups from the saved tables (loaded on first use).
+
+    Preflop buckets are a table read by hand class. On streets with a hand
+    table (flop, turn) the board is mapped to its canonical board and the
+    hole cards through the same suit permutation, and the bucket is one
+    table read. River EHS is computed exactly (all 990 opponent hands) and
+    placed between the street's edges. Streets without a table fall back to
+    Monte Carlo EHS (config.ABSTRACTION_EHS_TRIALS trials). Single lookups
+    are cached by suit-isomorphic key, so repeated frames cost a dict read.
+    """
+
+    def __init__(self, path: Optional[str] = None, trials: int = config.ABSTRACTION_EHS_TRIALS,
+                 seed: int = 0, cache_size: int = 100000):
+        """
+        Args:
+            path: Bucket table file (config.BUCKET_TABLE_PATH by default).
+            trials: Monte Carlo trials per EHS estimate on a flop / turn without a hand table.
+            seed: RNG seed for the EHS estimates.
+            cache_size: Cached single lookups before the cache is cleared.
+        """
+        self.path = path or config.BUCKET_TABLE_PATH
+        self.trials = trials
+        self.rng = np.random.default_rng(seed)
+        self.cache_size = cache_size
+        self._tables: Optional[Dict[str, np.ndarray]] = None
+        self._cache: Dict[Tuple[int, int], int] = {}
+
+    @property
+    def tables(self) -> Dict[str, np.ndarray]:
+        if self._tables is None:
+            if not os.path.exists(self.path):
+                raise FileNotFoundError(f"{self.path} not found; build it with: python -m poker.abstraction")
+            with np.load(self.path) as data:
+                self._tables = {name: data[name] for name in data.files}
+        return self._tables
+
+    @property
+    def meta(self) -> dict:
+        return json.loads(str(self.tables["meta"]))
+
+    def n_buckets(self, street: str) -> int:
+        if street == "preflop":
+            return int(self.tables["preflop"].max()) + 1
+        return len(self.tables[f"edges_{street}"]) + 1
+
+    def n_board_buckets(self, street: str) -> Optional[int]:
+        labels = self.tables.get(f"board_bucket_{street}")
+        return None if labels is None else int(labels.max()) + 1
+
+    def hand_buckets(self, holes: np.ndarray, boards: np.ndarray) -> np.ndarray:
+        """Buckets of (n, 2) hole cards on (n, m) boards of one street."""
+        holes = np.asarray(holes, dtype=np.uint8).reshape(-1, 2)
+        boards = np.asarray(boards, dtype=np.uint8).reshape(len(holes), -1)
+        street = _street_of(boards.shape[1])
+        if street == "preflop":
+            return self.tables["preflop"][hand_classes(holes)].astype(np.intp)
+        table = self.tables.get(f"hand_bucket_{street}")
+        if table is not None:
+            keys, perm = canonical_keys(boards, return_perm=True)
+            board_idx = np.searchsorted(self.tables[f"board_keys_{street}"], keys)
+            holes = _CARD_PERMS[perm[:, None], holes.astype(np.intp)]
+            return table[board_idx, hole_pair_index(holes, decode_board_keys(keys, boards.shape[1]))].astype(np.intp)
+        if street == "river":
+            ehs = river_strength(holes, boards)
+        else:
+            ehs = hand_strength(holes, boards, self.trials, self.rng)
+        return np.searchsorted(self.tables[f"edges_{street}"], ehs, side="right")
+
+    def hand_bucket(self, hole: Sequence[int], board: Sequence[int] = ()) -> int:
+        hole, board = np.asarray(hole)[None, :], np.asarray(board, dtype=np.uint8)[None, :]
+        if board.shape[1] == 0:
+            return int(self.hand_buckets(hole, board)[0])
+        key = (board.shape[1], int(canonical_keys(hole, board)[0]))
+        bucket = self._cache.get(key)
+        if bucket is None:
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            bucket = self._cache[key] = int(self.hand_buckets(hole, board)[0])
+        return bucket
+
+    def from_labels(self, hero_labels: Sequence[Optional[str]], board_labels: Sequence[Optional[str]] = ()) -> int:
+        """Bucket straight from CardClassifier labels, e.g. TableState.hero / .board."""
+        return self.hand_bucket(parse_cards(hero_labels), parse_cards(board_labels))
+
+    def board_bucket(self, board: Sequence[int]) -> int:
+        """Board bucket of a flop (or any clustered street) given as card ids."""
+        street = _street_of(len(board))
+        if f"board_bucket_{street}" not in self.tables:
+            raise ValueError(f"No board buckets were built for the {street}")
+        keys = self.tables[f"board_keys_{street}"]
+        idx = int(np.searchsorted(keys, canonical_keys(np.asarray(board)[None, :])[0]))
+        return int(self.tables[f"board_bucket_{street}"][idx])
+
+    def representative_board(self, street: str, bucket: int) -> Tuple[int, ...]:
+        return tuple(int(c) for c in self.tables[f"board_rep_{street}"][bucket])
+
+
+def _street_of(board_cards: int) -> str:
+    for street, m in STREET_BOARD_CARDS.items():
+        if m == board_cards:
+            return street
+    raise ValueError(f"A board has 0, 3, 4 or 5 cards, got {board_cards}")
+
+
+# --- solver abstraction ---------------------------------------------------
+
+def build_abstraction(bucketer: HandBucketer, streets: Sequence[str] = ("flop", "turn", "river"),
+                      samples: int = 20000, board: Sequence[int] = (), seed: int = 0) -> CardAbstraction:
+    """
+    CardAbstraction over consecutive streets, estimated from `samples` random
+    heads-up deals (boards start with `board` when given, e.g. a solved flop):
+    each player's bucket on every street, the bucket-to-bucket transition
+    counts between streets, and which bucket pairs win at showdown.
+    """
+    if list(streets) != list(STREET_NAMES[STREET_NAMES.index(streets[0]):][:len(streets)]):
+        raise ValueError(f"streets must be consecutive, got {streets}")
+    rng = np.random.default_rng(seed)
+    holes, boards = deal_hands(rng, samples, 2, board)
+    # Both players' hands as 2n rows so each street is one batch
+    holes2 = holes.reshape(-1, 2)
+    boards2 = np.repeat(boards, 2, axis=0)
+    buckets = [bucketer.hand_buckets(holes2, boards2[:, :STREET_BOARD_CARDS[s]]) for s in streets]
+    sizes = [bucketer.n_buckets(s) for s in streets]
+
+    prior = np.bincount(buckets[0], minlength=sizes[0]) / len(buckets[0])
+    transitions = []
+    for s in range(len(streets) - 1):
+        counts = np.bincount(buckets[s] * sizes[s + 1] + buckets[s + 1],
+                             minlength=sizes[s] * sizes[s + 1]).reshape(sizes[s], sizes[s + 1]).astype(float)
+        empty = counts.sum(axis=1) == 0
+        counts[empty] = 1.0  # unreachable bucket: any row-stochastic row will do
+        transitions.append(counts / counts.sum(axis=1, keepdims=True))
+
+    values = EVALUATOR.evaluate_batch(np.concatenate([holes2, boards2], axis=1)).reshape(-1, 2)
+    score = (values[:, 0] > values[:, 1]) + 0.5 * (values[:, 0] == values[:, 1])
+    last = buckets[-1].reshape(-1, 2)
+    b = sizes[-1]
+    wins = np.bincount(last[:, 0] * b + last[:, 1], weights=score, minlength=b * b)
+    wins += np.bincount(last[:, 1] * b + last[:, 0], weights=1.0 - score, minlength=b * b)
+    seen = np.bincount(last[:, 0] * b + last[:, 1], minlength=b * b) + np.bincount(last[:, 1] * b + last[:, 0],
+                                                                                   minlength=b * b)
+    # Pairs never dealt together fall back to bucket order (buckets are sorted by EHS)
+    order = (np.arange(b)[:, None] > np.arange(b)[None, :]) + 0.5 * np.eye(b)
+    showdown = np.where(seen > 0, wins / np.maximum(seen, 1), order.ravel()).reshape(b, b)
+    return CardAbstraction(prior, transitions, showdown)
+
+
+# --- report ---------------------------------------------------------------
+
+def compression_report(bucketer: HandBucketer) -> List[dict]:
+    """
+    Per street: (hole, board) combinations, suit-isomorphic classes and hand
+    buckets, and the same for boards. The hand counts are the private
+    states per betting node a solver stores regrets for, so the ratios are
+    the factor by which each step shrinks its infoset count.
+    """
+    rows = []
+    for street, m in STREET_BOARD_CARDS.items():
+        raw, iso = raw_count(2, m), isomorphic_count(2, m)
+        buckets = bucketer.n_buckets(street) if (street == "preflop" and "preflop" in bucketer.tables) or \
+            f"edges_{street}" in bucketer.tables else None
+        row = {"street": street, "hands": raw, "iso_hands": iso, "hand_buckets": buckets,
+               "iso_ratio": raw / iso, "bucket_ratio": iso / buckets if buckets else None,
+               "total_ratio": raw / buckets if buckets else None}
+        if m:
+            row.update(boards=raw_count(m), iso_boards=isomorphic_count(m), board_buckets=bucketer.n_board_buckets(street))
+        rows.append(row)
+    return rows
+
+
+def print_report(rows: List[dict]):
+    print(f"  {'street':8} {'hands':>14} {'suit-iso':>12} {'buckets':>8} {'iso x':>7} {'bucket x':>10} "
+          f"{'total x':>12}   {'boards':>7} {'iso':>7} {'buckets':>7}")
+    for r in rows:
+        buckets = r["hand_buckets"] or "-"
+        bucket_x = f"{r['bucket_ratio']:.0f}" if r["bucket_ratio"] else "-"
+        total_x = f"{r['total_ratio']:.0f}" if r["total_ratio"] else "-"
+        boards = f"{r.get('boards', '-'):>7} {r.get('iso_boards', '-'):>7} {r.get('board_buckets') or '-':>7}"
+        print(f"  {r['street']:8} {r['hands']:>14,} {r['iso_hands']:>12,} {buckets:>8} {r['iso_ratio']:>7.1f} "
+              f"{bucket_x:>10} {total_x:>12}   {boards}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the card abstraction bucket tables")
+    parser.add_argument("--buckets", type=int, nargs=4, default=[50, 50, 50, 50],
+                        metavar=("PREFLOP", "FLOP", "TURN", "RIVER"), help="Hand buckets per street")
+    parser.add_argument("--board-buckets", type=int, default=30, help="Flop board buckets (0 = skip)")
+    parser.add_argument("--samples", type=int, default=20000, help="Hands per street for the EHS edges")
+    parser.add_argument("--trials", type=int, default=config.ABSTRACTION_EHS_TRIALS,
+                        help="Monte Carlo trials per hand on flop / turn without a hand table")
+    parser.add_argument("--hand-tables", nargs="*", default=["flop", "turn"], choices=["flop", "turn"],
+                        help="Streets that get an exact per-hand bucket table")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=config.BUCKET_TABLE_PATH)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    buckets = dict(zip(STREET_NAMES, args.buckets))
+    board_buckets = {"flop": args.board_buckets} if args.board_buckets else {}
+    tables = build_tables(buckets, board_buckets, args.samples, args.trials, args.seed,
+                          hand_tables=args.hand_tables)
+    save_tables(tables, {"buckets": buckets, "board_buckets": board_buckets, "samples": args.samples,
+                         "trials": args.trials, "seed": args.seed, "hand_tables": args.hand_tables}, args.out)
+    print(f"wrote {args.out} ({os.path.getsize(args.out) / 1024:.0f} KB) in {time.perf_counter() - t0:.0f} s")
+    print_report(compression_report(HandBucketer(args.out)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# Card ids 0..51: id = suit * 13 + rank, rank 0 = deuce .. 12 = ace.
+# The same id is the card's bit in a 52-bit hand mask, so each suit's cards
+# form one 13-bit field of the mask (used by the flush lookup).
+RANK_CHARS = "23456789TJQKA"
+SUIT_CHARS = "cdhs"          # same suits (and order) as vision.card_detector.SUITS
+N_RANKS = 13
+N_CARDS = 52
+FULL_DECK_MASK = (1 << N_CARDS) - 1
+
+# CardClassifier labels use "10" for tens
+_RANK_ALIASES = {"10": 8}
+
+
+def make_card(rank: int, suit: int) -> int:
+    return suit * N_RANKS + rank
+
+
+def card_rank(card: int) -> int:
+    return card % N_RANKS
+
+
+def card_suit(card: int) -> int:
+    return card // N_RANKS
+
+
+def parse_card(label: str) -> int:
+    """
+    Card id from a label such as "Qh", "10d" (CardPrediction.label) or "Td".
+
+    Raises:
+        ValueError: if the label is not a card.
+    """
+    text = label.strip()
+    if len(text) < 2:
+        raise ValueError(f"Not a card label: {label!r}")
+    rank_text, suit_text = text[:-1].upper(), text[-1].lower()
+    rank = _RANK_ALIASES.get(rank_text)
+    if rank is None and len(rank_text) == 1:
+        rank = RANK_CHARS.find(rank_text)
+    suit = SUIT_CHARS.find(suit_text)
+    if rank is None or rank < 0 or suit < 0:
+        raise ValueError(f"Not a card label: {label!r}")
+    return make_card(rank, suit)
+
+
+def parse_cards(labels: Iterable[Optional[str]]) -> Tuple[int, ...]:
+    """Card ids for the labels that are set (None / "" are unread slots and skipped)."""
+    return tuple(parse_card(label) for label in labels if label)
+
+
+def card_label(card: int) -> str:
+    """Short label, e.g. 49 -> "Js" (tens print as "T")."""
+    return RANK_CHARS[card % N_RANKS] + SUIT_CHARS[card // N_RANKS]
+
+
+def cards_to_mask(cards: Iterable[int]) -> int:
+    mask = 0
+    for card in cards:
+        mask |= 1 << card
+    return mask
+
+
+def mask_to_cards(mask: int) -> List[int]:
+    cards = []
+    while mask:
+        low = mask & -mask
+        cards.append(low.bit_length() - 1)
+        mask ^= low
+    return cards
+
+
+def cards_array(hands: Sequence[Sequence[int]]) -> np.ndarray:
+    """(n, k) uint8 array of card ids for the batch evaluator."""
+    return np.asarray(hands, dtype=np.uint8).reshape(len(hands), -1)
@@ -0,0 +1,399 @@
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+# Node kinds of GameTree
+DECISION, CHANCE, FOLD, SHOWDOWN = 0, 1, 2, 3
+VARIANTS = ("cfr+", "dcfr")
+
+
+@dataclass(frozen=True)
+class TreeConfig:
+    """
+    Heads-up betting abstraction. Amounts are in units of the pot at the
+    start of the tree; both players have `stack` behind. Player 0 acts first
+    on every street.
+    """
+    bet_sizes: Tuple[float, ...] = (0.5, 1.0)       # opening bets, as fractions of the pot
+    raise_sizes: Optional[Tuple[float, ...]] = None  # raises, as fractions of the pot after calling (None = bet_sizes)
+    stack: float = 4.0
+    streets: int = 1
+    max_bets: int = 3                                # bets + raises per street
+    all_in: bool = True                              # always offer an all-in
+    max_nodes: int = 2_000_000
+
+
+class GameTree:
+    """
+    The public betting tree of a TreeConfig, stored as flat per-node lists.
+
+    invested[n] is what each player has put in beyond their half of the
+    starting pot when node n is reached. CHANCE nodes sit between streets
+    (one child, the next street's first decision or, after an all-in, the
+    rest of the run-out).
+    """
+
+    def __init__(self, cfg: TreeConfig = TreeConfig()):
+        self.cfg = cfg
+        self.kind: List[int] = []
+        self.player: List[int] = []
+        self.street: List[int] = []
+        self.invested: List[Tuple[float, float]] = []
+        self.children: List[List[int]] = []
+        self.actions: List[List[str]] = []
+        self.root = self._decision(0, 0, (0.0, 0.0), 0)
+
+    def __len__(self) -> int:
+        return len(self.kind)
+
+    def _add(self, kind: int, player: int, street: int, invested: Tuple[float, float]) -> int:
+        if len(self.kind) >= self.cfg.max_nodes:
+            raise ValueError(f"Betting tree exceeds max_nodes={self.cfg.max_nodes}; use fewer bet sizes or streets")
+        self.kind.append(kind)
+        self.player.append(player)
+        self.street.append(street)
+        self.invested.append(invested)
+        self.children.append([])
+        self.actions.append([])
+        return len(self.kind) - 1
+
+    def _decision(self, street: int, player: int, invested: Tuple[float, float], n_bets: int) -> int:
+        cfg = self.cfg
+        node = self._add(DECISION, player, street, invested)
+        mine, theirs = invested[player], invested[1 - player]
+        to_call = theirs - mine
+        pot = 1.0 + invested[0] + invested[1]
+
+        moves = []
+        if to_call > 0:
+            moves.append(("f", self._add(FOLD, player, street, invested)))
+            called = _with(invested, player, theirs)
+            moves.append(("c", None, called))
+        elif player == 1:
+            moves.append(("x", None, invested))
+        else:
+            moves.append(("x", self._decision(street, 1, invested, n_bets)))
+
+        if n_bets < cfg.max_bets and theirs < cfg.stack:
+            sizes = cfg.bet_sizes if to_call == 0 else (cfg.raise_sizes or cfg.bet_sizes)
+            targets: Dict[float, str] = {}
+            for f in sizes:
+                target = min(theirs + f * (pot + to_call), cfg.stack)
+                targets.setdefault(round(target, 6), "a" if target >= cfg.stack else f"{'b' if to_call == 0 else 'r'}{f:g}")
+            if cfg.all_in:
+                targets.setdefault(round(cfg.stack, 6), "a")
+            for target, label in sorted(targets.items()):
+                moves.append((label, self._decision(street, 1 - player, _with(invested, player, target), n_bets + 1)))
+
+        for move in moves:
+            child = move[1] if move[1] is not None else self._close(street, move[2])
+            self.children[node].append(child)
+            self.actions[node].append(move[0])
+        return node
+
+    def _close(self, street: int, invested: Tuple[float, float]) -> int:
+        """The street ended with equal investments: showdown, or deal the next street."""
+        if street == self.cfg.streets - 1:
+            return self._add(SHOWDOWN, -1, street, invested)
+        chance = self._add(CHANCE, -1, street, invested)
+        if invested[0] >= self.cfg.stack:
+            child = self._close(street + 1, invested)
+        else:
+            child = self._decision(street + 1, 0, invested, 0)
+        self.children[chance].append(child)
+        return chance
+
+    def history(self, node: int) -> str:
+        """Action sequence leading to node, e.g. "b0.5 r1 c / x"."""
+        parent = {c: (n, a) for n, cs in enumerate(self.children) for c, a in zip(cs, self.actions[n])}
+        parent.update({cs[0]: (n, "/") for n, cs in enumerate(self.children) if self.kind[n] == CHANCE})
+        path = []
+        while node in parent:
+            node, action = parent[node]
+            path.append(action)
+        return " ".join(reversed(path))
+
+
+def _with(invested: Tuple[float, float], player: int, amount: float) -> Tuple[float, float]:
+    return (amount, invested[1]) if player == 0 else (invested[0], amount)
+
+
+@dataclass
+class CardAbstraction:
+    """
+    Private-hand buckets per street, shared by both players.
+
+    prior: distribution of the street-0 bucket.
+    transitions[s]: (B_s, B_s+1) row-stochastic bucket transition at the
+        deal after street s (players' transitions are treated as independent).
+    showdown: (B_last, B_last) probability that the row bucket beats the
+        column bucket (ties count one half).
+    compat: optional (B_s, B_s) weights of each bucket pair per street
+        (e.g. 1 - eye for card removal when buckets are single cards);
+        all ones when None.
+    """
+    prior: np.ndarray
+    transitions: List[np.ndarray]
+    showdown: np.ndarray
+    compat: Optional[List[np.ndarray]] = None
+    buckets: Tuple[int, ...] = field(init=False)
+
+    def __post_init__(self):
+        self.buckets = (len(self.prior),) + tuple(t.shape[1] for t in self.transitions)
+        for s, t in enumerate(self.transitions):
+            if t.shape[0] != self.buckets[s]:
+                raise ValueError(f"transitions[{s}] has {t.shape[0]} rows, street {s} has {self.buckets[s]} buckets")
+        if self.showdown.shape != (self.buckets[-1],) * 2:
+            raise ValueError(f"showdown must be {self.buckets[-1]}x{self.buckets[-1]}")
+
+    @property
+    def streets(self) -> int:
+        return len(self.buckets)
+
+    @classmethod
+    def uniform(cls, buckets: int, streets: int = 1, spread: float = 0.15) -> "CardAbstraction":
+        """
+        Synthetic abstraction for solver tests: bucket b has strength
+        (b + 0.5) / buckets, the stronger bucket always wins, and between
+        streets a strength moves by a Gaussian step of `spread`.
+        """
+        strength = (np.arange(buckets) + 0.5) / buckets
+        step = np.exp(-0.5 * ((strength[None, :] - strength[:, None]) / spread) ** 2)
+        step /= step.sum(axis=1, keepdims=True)
+        showdown = (strength[:, None] > strength[None, :]) + 0.5 * np.eye(buckets)
+        return cls(np.full(buckets, 1.0 / buckets), [step] * (streets - 1), showdown)
+
+
+class CFRSolver:
+    """
+    Vector-form CFR+ / discounted CFR over a GameTree and a CardAbstraction.
+
+    Each iteration walks the public tree once per player carrying reach
+    probabilities and counterfactual values as vectors over buckets, so the
+    Python work is per public node and the per-hand work is NumPy.
+
+    Regrets and strategy sums are two flat float32 arrays. Decision node n
+    owns entries [entry_base[n], entry_base[n] + B * A): a (B, A) block of its
+    street's buckets by its actions, and infoset id infoset_base[n] + bucket.
+    Regret updates go through views of that block, so there are no per-infoset
+    Python objects and the arrays can live in shared memory (see `buffers`).
+
+    Variants:
+      "cfr+": regrets floored at zero, strategy sums weighted by iteration.
+      "dcfr": discounted CFR (alpha, beta, gamma), Brown & Sandholm 2019.
+    """
+
+    def __init__(self, tree: GameTree, abstraction: CardAbstraction, variant: str = "cfr+",
+                 alpha: float = 1.5, beta: float = 0.0, gamma: float = 2.0,
+                 buffers: Optional[Tuple[np.ndarray, np.ndarray]] = None):
+        """
+        Args:
+            tree: Betting tree.
+            abstraction: Buckets per street; must have as many streets as the tree.
+            variant: "cfr+" or "dcfr".
+            alpha, beta, gamma: DCFR discount exponents.
+            buffers: Optional preallocated (regret, strategy_sum) float32 arrays
+                of size `entries_needed(tree, abstraction)`.
+        """
+        if variant not in VARIANTS:
+            raise ValueError(f"variant must be one of {VARIANTS}")
+        if abstraction.streets != tree.cfg.streets:
+            raise ValueError(f"Abstraction has {abstraction.streets} streets, tree has {tree.cfg.streets}")
+        self.tree = tree
+        self.abs = abstraction
+        self.variant = variant
+        self.alpha, self.beta, self.gamma = alpha, beta, gamma
+        self.iteration = 0
+        self.elapsed_s = 0.0
+
+        self.infoset_base, self.entry_base, self.n_infosets, n_entries = _layout(tree, abstraction)
+        if buffers is None:
+            self.regret = np.zeros(n_entries, dtype=np.float32)
+            self.strategy_sum = np.zeros(n_entries, dtype=np.float32)
+        else:
+            self.regret, self.strategy_sum = buffers
+            if self.regret.shape != (n_entries,) or self.strategy_sum.shape != (n_entries,):
+                raise ValueError(f"buffers must be float32 arrays of {n_entries} entries")
+
+        self._regret_blocks: List[Optional[np.ndarray]] = [None] * len(tree)
+        self._strategy_blocks: List[Optional[np.ndarray]] = [None] * len(tree)
+        for node, base in self.entry_base.items():
+            shape = (abstraction.buckets[tree.street[node]], len(tree.children[node]))
+            size = shape[0] * shape[1]
+            self._regret_blocks[node] = self.regret[base:base + size].reshape(shape)
+            self._strategy_blocks[node] = self.strategy_sum[base:base + size].reshape(shape)
+
+        self._compat = abstraction.compat or [np.ones((b, b)) for b in abstraction.buckets]
+        # Probability that a dealt bucket pair is compatible; values are reported per compatible deal
+        self._deal_mass = float(abstraction.prior @ self._compat[0] @ abstraction.prior)
+        # Compat-weighted probability that each player's bucket wins against the other's
+        self._showdown = (abstraction.showdown * self._compat[-1], (1.0 - abstraction.showdown.T) * self._compat[-1])
+
+    # --- solving ------------------------------------------------------------
+
+    def iterate(self):
+        t = self.iteration + 1
+        t0 = time.perf_counter()
+        weight = float(t) if self.variant == "cfr+" else 1.0
+        prior = self.abs.prior
+        for player in (0, 1):
+            self._cfr(self.tree.root, player, prior, prior, weight)
+            if self.variant == "cfr+":
+                np.maximum(self.regret, 0, out=self.regret)
+        if self.variant == "dcfr":
+            pos = t ** self.alpha / (t ** self.alpha + 1)
+            neg = t ** self.beta / (t ** self.beta + 1)
+            self.regret *= np.where(self.regret > 0, pos, neg).astype(np.float32)
+            self.strategy_sum *= np.float32((t / (t + 1)) ** self.gamma)
+        self.iteration = t
+        self.elapsed_s += time.perf_counter() - t0
+
+    def solve(self, iterations: int, eval_every: int = 0) -> List[dict]:
+        """Run iterations; every eval_every (and at the end) record exploitability. Returns the records."""
+        history = []
+        for i in range(1, iterations + 1):
+            self.iterate()
+            if (eval_every and i % eval_every == 0) or i == iterations:
+                history.append({"iteration": self.iteration, "seconds": self.elapsed_s,
+                                "exploitability": self.exploitability()})
+        return history
+
+    def _cfr(self, node: int, player: int, reach0: np.ndarray, reach1: np.ndarray, weight: float) -> np.ndarray:
+        """Counterfactual values of `player` at node, one per bucket of the node's street."""
+        tree = self.tree
+        kind = tree.kind[node]
+        street = tree.street[node]
+        opp = reach1 if player == 0 else reach0
+        if kind == FOLD:
+            folder = tree.player[node]
+            chips = 0.5 + tree.invested[node][folder]
+            return (chips if folder != player else -chips) * (self._compat[street] @ opp)
+        if kind == SHOWDOWN:
+            chips = 0.5 + tree.invested[node][0]
+            return 2 * chips * (self._showdown[player] @ opp) - chips * (self._compat[street] @ opp)
+        if kind == CHANCE:
+            t = self.abs.transitions[street]
+            return t @ self._cfr(tree.children[node][0], player, reach0 @ t, reach1 @ t, weight)
+
+        regret = self._regret_blocks[node]
+        if not opp.any():
+            return np.zeros(len(regret))
+        sigma = _regret_matching(regret)
+        children = tree.children[node]
+        if tree.player[node] != player:
+            value = 0.0
+            for a, child in enumerate(children):
+                if player == 0:
+                    value = value + self._cfr(child, player, reach0, reach1 * sigma[:, a], weight)
+                else:
+                    value = value + self._cfr(child, player, reach0 * sigma[:, a], reach1, weight)
+            return value
+
+        values = np.empty(sigma.shape)
+        for a, child in enumerate(children):
+            if player == 0:
+                values[:, a] = self._cfr(child, player, reach0 * sigma[:, a], reach1, weight)
+            else:
+                values[:, a] = self._cfr(child, player, reach0, reach1 * sigma[:, a], weight)
+        node_value = (sigma * values).sum(axis=1)
+        regret += values - node_value[:, None]
+        own = reach0 if player == 0 else reach1
+        self._strategy_blocks[node] += weight * own[:, None] * sigma
+        return node_value
+
+    # --- results ------------------------------------------------------------
+
+    def average_strategy(self, node: int) -> np.ndarray:
+        """(buckets, actions) average strategy at a decision node."""
+        return _normalize(self._strategy_blocks[node])
+
+    def current_strategy(self, node: int) -> np.ndarray:
+        return _regret_matching(self._regret_blocks[node])
+
+    def exploitability(self) -> float:
+        """
+        Mean best-response gain of the two players against the average
+        strategy, in pots. Like expected_value(), divided by the
+        compatible-pair mass prior @ compat[0] @ prior when compat is set, so
+        it is per actual deal (card removal does not shrink it).
+        """
+        prior = self.abs.prior
+        gain = sum(float(prior @ self._evaluate(self.tree.root, p, prior, True)) for p in (0, 1))
+        return 0.5 * gain / self._deal_mass
+
+    def expected_value(self, player: int = 0) -> float:
+        """Value of the average strategy profile for player, in pots per (compatible) deal."""
+        prior = self.abs.prior
+        return float(prior @ self._evaluate(self.tree.root, player, prior, False)) / self._deal_mass
+
+    def _evaluate(self, node: int, player: int, opp: np.ndarray, best_response: bool) -> np.ndarray:
+        """Values of player's buckets against the opponent's average strategy (player best-responds or plays its own)."""
+        tree = self.tree
+        kind = tree.kind[node]
+        street = tree.street[node]
+        if kind == FOLD:
+            folder = tree.player[node]
+            chips = 0.5 + tree.invested[node][folder]
+            return (chips if folder != player else -chips) * (self._compat[street] @ opp)
+        if kind == SHOWDOWN:
+            chips = 0.5 + tree.invested[node][0]
+            return 2 * chips * (self._showdown[player] @ opp) - chips * (self._compat[street] @ opp)
+        if kind == CHANCE:
+            t = self.abs.transitions[street]
+            return t @ self._evaluate(tree.children[node][0], player, opp @ t, best_response)
+        children = tree.children[node]
+        sigma = self.average_strategy(node)
+        if tree.player[node] == player:
+            values = np.array([self._evaluate(c, player, opp, best_response) for c in children])
+            return values.max(axis=0) if best_response else (sigma * values.T).sum(axis=1)
+        return sum(self._evaluate(c, player, opp * sigma[:, a], best_response) for a, c in enumerate(children))
+
+    def stats(self) -> dict:
+        tree = self.tree
+        decisions = len(self.entry_base)
+        return {
+            "nodes": len(tree),
+            "decision_nodes": decisions,
+            "infosets": self.n_infosets,
+            "entries": int(self.regret.size),
+            "array_bytes": int(self.regret.nbytes + self.strategy_sum.nbytes),
+            "iterations": self.iteration,
+            "iterations_per_s": self.iteration / self.elapsed_s if self.elapsed_s else 0.0,
+        }
+
+
+def _layout(tree: GameTree, abstraction: CardAbstraction) -> Tuple[Dict[int, int], Dict[int, int], int, int]:
+    infoset_base, entry_base = {}, {}
+    n_infosets = n_entries = 0
+    for node, kind in enumerate(tree.kind):
+        if kind != DECISION:
+            continue
+        buckets = abstraction.buckets[tree.street[node]]
+        infoset_base[node] = n_infosets
+        entry_base[node] = n_entries
+        n_infosets += buckets
+        n_entries += buckets * len(tree.children[node])
+    return infoset_base, entry_base, n_infosets, n_entries
+
+
+def entries_needed(tree: GameTree, abstraction: CardAbstraction) -> int:
+    """Size of each flat array CFRSolver needs for this tree and abstraction."""
+    return _layout(tree, abstraction)[3]
+
+
+def entry_offsets(tree: GameTree, abstraction: CardAbstraction) -> Dict[int, int]:
+    """Decision node -> first entry of its (buckets, actions) block, as CFRSolver.entry_base."""
+    return _layout(tree, abstraction)[1]
+
+
+def _regret_matching(regret: np.ndarray) -> np.ndarray:
+    return _normalize(np.maximum(regret, 0))
+
+
+def _normalize(weights: np.ndarray) -> np.ndarray:
+    total = weights.sum(axis=1, keepdims=True)
+    uniform = np.full_like(weights, 1.0 / weights.shape[1], dtype=np.float64)
+    return np.divide(weights, total, out=uniform, where=total > 0)
@@ -0,0 +1,203 @@
+import time
+from dataclasses import dataclass
+from typing import Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+import config
+from poker.cards import N_CARDS, parse_cards
+from poker.evaluator import EVALUATOR, HandEvaluator
+
+
+@dataclass
+class EquityResult:
+    equity: float          # win + tie share, 0..1
+    win: float             # fraction of trials won outright
+    tie: float             # fraction of trials split
+    trials: int
+    std_error: float
+    ci_halfwidth: float    # z * std_error at the requested confidence
+    elapsed_s: float
+    converged: bool        # stopped because ci_halfwidth <= target
+
+    def __str__(self) -> str:
+        return (f"equity {100 * self.equity:.1f}% +/- {100 * self.ci_halfwidth:.1f} "
+                f"({self.trials} trials, {1000 * self.elapsed_s:.1f} ms)")
+
+
+# Two-sided normal quantiles for the supported confidence levels
+_Z = {0.9: 1.645, 0.95: 1.96, 0.99: 2.576}
+
+
+class EquityEstimator:
+    """
+    Monte Carlo hero equity against random (or range-restricted) opponents.
+
+    Each batch draws `batch` trials at once: deal() picks the missing board
+    cards and every opponent's hole cards without replacement for all
+    trials together, and all hero and opponent
+    7-card hands go through HandEvaluator.evaluate_batch in one call. A tie
+    for best hand counts as 1 / (players tied). Batches repeat until the
+    confidence interval half-width reaches ci_target, max_trials is hit or
+    the time budget runs out.
+    """
+
+    def __init__(self, evaluator: HandEvaluator = EVALUATOR, batch: int = config.EQUITY_BATCH,
+                 seed: Optional[int] = None):
+        """
+        Args:
+            evaluator: Hand evaluator (the shared one by default).
+            batch: Trials per vectorized batch.
+            seed: RNG seed for reproducible estimates.
+        """
+        self.evaluator = evaluator
+        self.batch = batch
+        self.rng = np.random.default_rng(seed)
+
+    def equity(self, hero: Sequence[int], board: Sequence[int] = (), opponents: int = 1,
+               opponent_range: Optional[np.ndarray] = None, ci_target: float = config.EQUITY_CI_TARGET,
+               confidence: float = 0.95, max_trials: int = config.EQUITY_MAX_TRIALS,
+               time_budget_s: Optional[float] = config.EQUITY_TIME_BUDGET_S) -> EquityResult:
+        """
+        Args:
+            hero: The hero's two card ids.
+            board: 0, 3, 4 or 5 board card ids.
+            opponents: Number of opponents still in the hand (1..8).
+            opponent_range: Optional (r, 2) array of hole-card pairs every
+                opponent is drawn from (uniformly); random hands when None.
+            ci_target: Stop once the CI half-width is at most this (0 = never early).
+            confidence: 0.9, 0.95 or 0.99.
+            max_trials: Upper bound on trials.
+            time_budget_s: Stop after the batch that crosses this (None = no limit).
+        """
+        hero, board = tuple(hero), tuple(board)
+        if len(hero) != 2 or len(board) not in (0, 3, 4, 5):
+            raise ValueError(f"Need 2 hero cards and 0/3/4/5 board cards, got {len(hero)} and {len(board)}")
+        if len(set(hero + board)) != len(hero) + len(board):
+            raise ValueError("Duplicate cards in hero/board")
+        if not 1 <= opponents <= 8:
+            raise ValueError("opponents must be in 1..8")
+        z = _Z[confidence]
+
+        known = np.array(hero + board, dtype=np.uint8)
+        live = np.setdiff1d(np.arange(N_CARDS, dtype=np.uint8), known)
+        n_board = 5 - len(board)
+        if opponent_range is not None:
+            opponent_range = _live_combos(np.asarray(opponent_range, dtype=np.uint8), known)
+            if len(opponent_range) == 0:
+                raise ValueError("Every hand in opponent_range conflicts with the known cards")
+
+        t0 = time.perf_counter()
+        total = total_sq = wins = ties = 0.0
+        trials = 0
+        converged = False
+        while trials < max_trials:
+            n = min(self.batch, max_trials - trials)
+            share = self._batch(n, known, live, n_board, opponents, opponent_range)
+            total += share.sum()
+            total_sq += np.square(share).sum()
+            wins += np.count_nonzero(share == 1.0)
+            ties += np.count_nonzero((share > 0) & (share < 1))
+            trials += n
+
+            mean = total / trials
+            var = max(total_sq / trials - mean * mean, 0.0)
+            half = z * np.sqrt(var / max(trials - 1, 1))
+            if ci_target > 0 and trials >= 2 * self.batch and half <= ci_target:
+                converged = True
+                break
+            if time_budget_s is not None and time.perf_counter() - t0 >= time_budget_s:
+                break
+
+        se = np.sqrt(var / max(trials - 1, 1))
+        return EquityResult(equity=float(mean), win=wins / trials, tie=ties / trials, trials=trials,
+                            std_error=float(se), ci_halfwidth=float(z * se),
+                            elapsed_s=time.perf_counter() - t0, converged=converged)
+
+    def _batch(self, n: int, known: np.ndarray, live: np.ndarray, n_board: int, opponents: int,
+               opponent_range: Optional[np.ndarray]) -> np.ndarray:
+        """Hero's share of the pot in each of n trials."""
+        if opponent_range is None:
+            # Board completion and opponent hole cards in one draw without replacement
+            drawn = deal(self.rng, np.tile(live, (n, 1)), n_board + 2 * opponents)
+            runout, holes = drawn[:, :n_board], drawn[:, n_board:].reshape(n, opponents, 2)
+        else:
+            holes = self._range_holes(n, opponents, opponent_range)
+            runout = self._runout(n, n_board, known, holes)
+
+        board = np.concatenate([np.broadcast_to(known[2:], (n, len(known) - 2)), runout], axis=1)
+        hero_vals = self.evaluator.evaluate_batch(np.concatenate([np.broadcast_to(known[:2], (n, 2)), board], axis=1))
+        opp_hands = np.concatenate([holes, np.broadcast_to(board[:, None, :], (n, opponents, 5))], axis=2)
+        opp_vals = self.evaluator.evaluate_batch(opp_hands.reshape(n * opponents, 7)).reshape(n, opponents)
+
+        best_opp = opp_vals.max(axis=1)
+        tied = (opp_vals == hero_vals[:, None]).sum(axis=1)
+        share = np.where(hero_vals > best_opp, 1.0, 0.0)
+        split = hero_vals == best_opp
+        share[split] = 1.0 / (1 + tied[split])
+        return share
+
+    def _range_holes(self, n: int, opponents: int, combos: np.ndarray) -> np.ndarray:
+        """(n, opponents, 2) hole cards from combos, redrawing trials where opponents share a card."""
+        holes = combos[self.rng.integers(len(combos), size=(n, opponents))]
+        if opponents == 1:
+            return holes
+        for _ in range(100):
+            flat = holes.reshape(n, -1)
+            s = np.sort(flat, axis=1)
+            clash = (s[:, 1:] == s[:, :-1]).any(axis=1)
+            if not clash.any():
+                return holes
+            holes[clash] = combos[self.rng.integers(len(combos), size=(int(clash.sum()), opponents))]
+        raise ValueError("opponent_range is too narrow to deal every opponent a distinct hand")
+
+    def _runout(self, n: int, n_board: int, known: np.ndarray, holes: np.ndarray) -> np.ndarray:
+        """(n, n_board) board cards avoiding the known cards and each trial's opponent holes."""
+        if n_board == 0:
+            return np.empty((n, 0), dtype=np.uint8)
+        keys = self.rng.random((n, N_CARDS))
+        keys[:, known] = 2.0
+        np.put_along_axis(keys, holes.reshape(n, -1).astype(np.intp), 2.0, axis=1)
+        return np.argpartition(keys, n_board - 1, axis=1)[:, :n_board].astype(np.uint8)
+
+
+def deal(rng: np.random.Generator, decks: np.ndarray, need: int) -> np.ndarray:
+    """
+    (n, need) cards drawn without replacement from each row of decks (n, m),
+    which is shuffled in place: a partial Fisher-Yates shuffle run on all n
+    decks at once, one column per step (cheaper than sorting random keys
+    over the whole deck).
+    """
+    n, m = decks.shape
+    rows = np.arange(n)
+    picks = (rng.random((need, n)) * np.arange(m, m - need, -1)[:, None]).astype(np.intp)
+    out = np.empty((n, need), dtype=np.uint8)
+    for i in range(need):
+        j = picks[i] + i
+        out[:, i] = decks[rows, j]
+        decks[rows, j] = decks[:, i]
+    return out
+
+
+def _live_combos(combos: np.ndarray, known: np.ndarray) -> np.ndarray:
+    dead = np.isin(combos, known).any(axis=1)
+    return combos[~dead]
+
+
+# Shared estimator for the decision loop
+ESTIMATOR = EquityEstimator()
+
+
+def hero_equity(hero_labels: Iterable[Optional[str]], board_labels: Iterable[Optional[str]] = (),
+                opponents: int = 1, **kwargs) -> EquityResult:
+    """
+    Equity straight from CardClassifier labels, e.g. TableState.hero and
+    TableState.board: hero_equity(("Ah", "10d"), ("Qh", "7c", "2s"), opponents=3).
+    Unread (None) board slots are ignored; other arguments as EquityEstimator.equity.
+    """
+    return ESTIMATOR.equity(parse_cards(hero_labels), parse_cards(board_labels), opponents, **kwargs)
+
+
+def range_from_labels(hands: Iterable[Tuple[str, str]]) -> np.ndarray:
+    """(r, 2) opponent_range array from pairs of card labels."""
+    return np.array([parse_cards(pair) for pair in hands], dtype=np.uint8).reshape(-1, 2)
@@ -0,0 +1,234 @@
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+import config
+from poker.cards import N_CARDS, N_RANKS, card_rank
+
+
+# Hand values are dense ranks 1..7462 (higher wins, equal values split);
+# HAND_CATEGORIES[hand_category(v)] names the class.
+HAND_CATEGORIES = ("high card", "pair", "two pair", "three of a kind", "straight",
+                   "flush", "full house", "four of a kind", "straight flush")
+N_HAND_VALUES = 7462
+
+# Per-rank keys whose sums are unique for every rank multiset of a fixed size
+# (5, 6 or 7 cards, at most 4 per rank), so sum(keys) indexes a flat table.
+# Sizes overlap (deuce is 0), hence one table per hand size.
+RANK_KEYS = (0, 1, 5, 22, 98, 453, 2031, 8698, 22854, 83661, 262349, 636345, 1479181)
+HAND_SIZES = (5, 6, 7)
+
+_SUIT_MASK = (1 << N_RANKS) - 1
+_WHEEL = (1 << 12) | 0b1111  # A-2-3-4-5
+
+
+def _straight_high(present: int) -> int:
+    """Highest rank of a straight in a 13-bit rank mask, or -1."""
+    for high in range(12, 3, -1):
+        run = 0b11111 << (high - 4)
+        if present & run == run:
+            return high
+    return 3 if present & _WHEEL == _WHEEL else -1
+
+
+def _pack(category: int, ranks: Iterable[int]) -> int:
+    value = category
+    ranks = list(ranks)
+    for r in ranks + [0] * (5 - len(ranks)):
+        value = value << 4 | r
+    return value
+
+
+def _best_unsuited(counts: List[int]) -> int:
+    """Packed value of the best non-flush five cards out of a rank-count vector."""
+    desc = [r for r in range(12, -1, -1) if counts[r]]
+    quads = [r for r in desc if counts[r] >= 4]
+    trips = [r for r in desc if counts[r] >= 3]
+    pairs = [r for r in desc if counts[r] >= 2]
+    if quads:
+        return _pack(7, [quads[0], next(r for r in desc if r != quads[0])])
+    if trips:
+        full = [r for r in pairs if r != trips[0]]
+        if full:
+            return _pack(6, [trips[0], full[0]])
+    present = sum(1 << r for r in desc)
+    high = _straight_high(present)
+    if high >= 0:
+        return _pack(4, [high])
+    if trips:
+        return _pack(3, [trips[0]] + [r for r in desc if r != trips[0]][:2])
+    if len(pairs) >= 2:
+        return _pack(2, pairs[:2] + [r for r in desc if r not in pairs[:2]][:1])
+    if pairs:
+        return _pack(1, [pairs[0]] + [r for r in desc if r != pairs[0]][:3])
+    return _pack(0, desc[:5])
+
+
+def _best_suited(mask: int) -> int:
+    """Packed value of the best flush in a 13-bit suit mask, or 0 if under five cards."""
+    if bin(mask).count("1") < 5:
+        return 0
+    high = _straight_high(mask)
+    if high >= 0:
+        return _pack(8, [high])
+    return _pack(5, [r for r in range(12, -1, -1) if mask >> r & 1][:5])
+
+
+def _rank_multisets(size: int, rank: int = 0, counts: Optional[List[int]] = None):
+    counts = counts if counts is not None else []
+    if rank == N_RANKS:
+        if size == 0:
+            yield counts
+        return
+    for c in range(min(4, size) + 1):
+        counts.append(c)
+        yield from _rank_multisets(size - c, rank + 1, counts)
+        counts.pop()
+
+
+def _dense_values() -> Dict[int, int]:
+    """Packed value -> dense rank 1..7462 over every distinct five-card hand."""
+    packed = {_best_unsuited(c) for c in _rank_multisets(5)}
+    packed |= {_best_suited(m) for m in range(1 << N_RANKS) if bin(m).count("1") == 5}
+    ordered = sorted(packed)
+    assert len(ordered) == N_HAND_VALUES, len(ordered)
+    return {v: i + 1 for i, v in enumerate(ordered)}
+
+
+def build_tables(table_dir: Optional[str] = None, sizes: Tuple[int, ...] = HAND_SIZES) -> Dict[str, np.ndarray]:
+    """
+    Compute the lookup tables (a few seconds in pure Python) and save them
+    as .npy files in table_dir when given:
+      rank{k}.npy  uint16[max key + 1]  sum(RANK_KEYS) of k cards -> best non-flush value
+      flush.npy    uint16[8192]         13-bit suit mask -> best flush value (0 below 5 cards)
+      category.npy uint8[7463]          value -> index into HAND_CATEGORIES
+    """
+    dense = _dense_values()
+    tables = {}
+    flush = np.zeros(1 << N_RANKS, dtype=np.uint16)
+    for m in range(1 << N_RANKS):
+        packed = _best_suited(m)
+        if packed:
+            flush[m] = dense[packed]
+    tables["flush"] = flush
+
+    category = np.zeros(N_HAND_VALUES + 1, dtype=np.uint8)
+    for packed, value in dense.items():
+        category[value] = packed >> 20
+    tables["category"] = category
+
+    for size in sizes:
+        table = np.zeros(RANK_KEYS[-1] * 4 + RANK_KEYS[-2] * (size - 4) + 1, dtype=np.uint16)
+        for counts in _rank_multisets(size):
+            table[sum(c * k for c, k in zip(counts, RANK_KEYS))] = dense[_best_unsuited(counts)]
+        tables[f"rank{size}"] = table
+
+    if table_dir:
+        os.makedirs(table_dir, exist_ok=True)
+        for name, table in tables.items():
+            tmp = os.path.join(table_dir, f"{name}.tmp.npy")
+            np.save(tmp, table)
+            os.replace(tmp, os.path.join(table_dir, f"{name}.npy"))
+    return tables
+
+
+class HandEvaluator:
+    """
+    Table-driven evaluator for 5, 6 and 7 card hands.
+
+    A hand's non-flush value is one lookup at sum(RANK_KEYS[rank]) in the
+    table for its size; flushes are a lookup of each suit's 13-bit field of
+    the card mask (a 7-card hand with a flush can't also hold a full house or
+    quads, so the larger of the two values is the hand's value). Tables are
+    loaded (memory-mapped) from table_dir on first use, and built and saved
+    there if missing, so importing this module costs nothing.
+    """
+
+    def __init__(self, table_dir: Optional[str] = None):
+        """
+        Args:
+            table_dir: Where the .npy tables are cached (config.POKER_TABLE_DIR by default).
+        """
+        self.table_dir = table_dir or config.POKER_TABLE_DIR
+        self._tables: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+        self.card_keys = np.array([RANK_KEYS[card_rank(c)] for c in range(N_CARDS)], dtype=np.int64)
+        self.card_bits = np.array([1 << c for c in range(N_CARDS)], dtype=np.uint64)
+        self._card_keys = self.card_keys.tolist()
+
+    def table(self, name: str) -> np.ndarray:
+        tables = self._tables
+        if name not in tables:
+            with self._lock:
+                if name not in tables:
+                    self._load(name)
+        return tables[name]
+
+    def _load(self, name: str):
+        path = os.path.join(self.table_dir, f"{name}.npy")
+        if os.path.exists(path):
+            self._tables[name] = np.load(path, mmap_mode="r")
+            return
+        sizes = (int(name[4:]),) if name.startswith("rank") else ()
+        try:
+            built = build_tables(self.table_dir, sizes)
+        except OSError:
+            # Read-only checkout: keep the tables in memory only
+            built = build_tables(None, sizes)
+        for key, table in built.items():
+            self._tables.setdefault(key, table)
+
+    def evaluate(self, cards: Iterable[int]) -> int:
+        """Value of one 5-7 card hand given as card ids."""
+        cards = list(cards)
+        value = int(self.table(f"rank{len(cards)}")[sum(self._card_keys[c] for c in cards)])
+        suits = [0, 0, 0, 0]
+        for c in cards:
+            suits[c // N_RANKS] |= 1 << (c % N_RANKS)
+        flush = self.table("flush")
+        return max(value, max(int(flush[m]) for m in suits))
+
+    def evaluate_batch(self, cards: np.ndarray) -> np.ndarray:
+        """
+        Values of many hands at once.
+
+        Args:
+            cards: (n, k) integer array of card ids, k in 5..7, no repeats within a row.
+
+        Returns:
+            (n,) uint16 array of hand values.
+        """
+        cards = np.asarray(cards)
+        if cards.ndim != 2 or cards.shape[1] not in HAND_SIZES:
+            raise ValueError(f"Expected an (n, 5..7) array of cards, got shape {cards.shape}")
+        idx = cards.astype(np.intp, copy=False)
+        value = self.table(f"rank{cards.shape[1]}").take(self.card_keys.take(idx).sum(axis=1))
+        # Distinct cards, so the sum of their bits is the hand mask
+        mask = self.card_bits.take(idx).sum(axis=1, dtype=np.uint64)
+        flush = self.table("flush")
+        for suit in range(4):
+            field = (mask >> np.uint64(suit * N_RANKS)) & np.uint64(_SUIT_MASK)
+            np.maximum(value, flush.take(field.astype(np.intp)), out=value)
+        return value
+
+    def category(self, value: int) -> str:
+        return HAND_CATEGORIES[int(self.table("category")[value])]
+
+
+# Shared instance; the tables load on its first evaluation
+EVALUATOR = HandEvaluator()
+
+
+def evaluate(cards: Iterable[int]) -> int:
+    return EVALUATOR.evaluate(cards)
+
+
+def evaluate_batch(cards: np.ndarray) -> np.ndarray:
+    return EVALUATOR.evaluate_batch(cards)
+
+
+def hand_category(value: int) -> str:
+    return EVALUATOR.category(value)
@@ -0,0 +1,273 @@
+"""
+External-sampling Monte Carlo CFR spread over a process pool.
+
+Each iteration samples both players' buckets (from the prior, then through
+the transitions at every chance node), explores every action of the
+traversing player and one sampled action of the opponent. Cost per
+iteration is a few hundred nodes whatever the bucket count, so iterations
+are cheap and independent enough to run on many cores at once.
+
+The regret and strategy-sum arrays use CFRSolver's flat layout and live in
+one shared-memory segment, so the parent can wrap them in a CFRSolver
+(ParallelMCCFR.solver) for average strategies and exact exploitability.
+"""
+
+import bisect
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context, shared_memory
+from typing import List, Optional
+
+import numpy as np
+
+import config
+from poker.cfr import (CHANCE, DECISION, FOLD, CardAbstraction, CFRSolver, GameTree, TreeConfig, entries_needed,
+                       entry_offsets)
+
+
+class _Traverser:
+    """
+    One process's view of the game: the tree as plain lists, cumulative
+    chance distributions for bisect sampling and Python-list deltas, which
+    are much cheaper to update one entry at a time than NumPy arrays.
+    """
+
+    def __init__(self, cfg: TreeConfig, abstraction: CardAbstraction):
+        tree = GameTree(cfg)
+        entry_base = entry_offsets(tree, abstraction)
+        self.n_entries = entries_needed(tree, abstraction)
+        self.root = tree.root
+        self.kind = tree.kind
+        self.player = tree.player
+        self.street = tree.street
+        self.children = tree.children
+        self.chips = [(0.5 + inv[0], 0.5 + inv[1]) for inv in tree.invested]
+        self.base = [entry_base.get(n, -1) for n in range(len(tree))]
+        self.prior = np.cumsum(abstraction.prior).tolist()
+        self.transitions = [np.cumsum(t, axis=1).tolist() for t in abstraction.transitions]
+        self.showdown = abstraction.showdown.tolist()
+        self.compat = [c.tolist() for c in abstraction.compat] if abstraction.compat else None
+        self.regret: List[float] = []
+        self.d_regret: List[float] = []
+        self.d_strategy: List[float] = []
+
+    def run(self, regret: np.ndarray, d_regret: np.ndarray, d_strategy: np.ndarray, iterations: int, seed: int):
+        """
+        `iterations` iterations (one traversal per player each) against a
+        snapshot of `regret`; the regret and strategy-sum deltas are added
+        into d_regret and d_strategy.
+        """
+        self.regret = regret.tolist()
+        self.d_regret = [0.0] * self.n_entries
+        self.d_strategy = [0.0] * self.n_entries
+        rng = random.Random(seed)
+        for _ in range(iterations):
+            for player in (0, 1):
+                self._walk(self.root, player, _sample(self.prior, rng), _sample(self.prior, rng), rng)
+        d_regret += np.array(self.d_regret, dtype=np.float32)
+        d_strategy += np.array(self.d_strategy, dtype=np.float32)
+
+    def _walk(self, node: int, player: int, b0: int, b1: int, rng: random.Random) -> float:
+        """Sampled counterfactual value of `player` at node for buckets b0, b1."""
+        kind = self.kind[node]
+        if kind == DECISION:
+            acting = self.player[node]
+            children = self.children[node]
+            n = len(children)
+            base = self.base[node] + (b0 if acting == 0 else b1) * n
+            positive = [r if r > 0 else 0.0 for r in self.regret[base:base + n]]
+            total = sum(positive)
+            sigma = [r / total for r in positive] if total > 0 else [1.0 / n] * n
+            if acting != player:
+                d_strategy = self.d_strategy
+                for a in range(n):
+                    d_strategy[base + a] += sigma[a]
+                return self._walk(children[_sample_weights(sigma, rng)], player, b0, b1, rng)
+            values = [self._walk(child, player, b0, b1, rng) for child in children]
+            value = sum(s * v for s, v in zip(sigma, values))
+            d_regret = self.d_regret
+            for a in range(n):
+                d_regret[base + a] += values[a] - value
+            return value
+        if kind == CHANCE:
+            t = self.transitions[self.street[node]]
+            return self._walk(self.children[node][0], player, _sample(t[b0], rng), _sample(t[b1], rng), rng)
+
+        weight = self.compat[self.street[node]][b0][b1] if self.compat else 1.0
+        if kind == FOLD:
+            folder = self.player[node]
+            chips = self.chips[node][folder]
+            return weight * (chips if folder != player else -chips)
+        chips = self.chips[node][0]
+        win = self.showdown[b0][b1] if player == 0 else 1.0 - self.showdown[b0][b1]
+        return weight * chips * (2 * win - 1)
+
+
+def _sample(cumulative: List[float], rng: random.Random) -> int:
+    return min(bisect.bisect_right(cumulative, rng.random() * cumulative[-1]), len(cumulative) - 1)
+
+
+def _sample_weights(weights: List[float], rng: random.Random) -> int:
+    x = rng.random()
+    for i, w in enumerate(weights):
+        x -= w
+        if x < 0:
+            return i
+    return len(weights) - 1
+
+
+# Per-process state of a pool worker, set up by _init_worker
+_WORKER: Optional[dict] = None
+
+
+def _init_worker(shm_name: str, cfg: TreeConfig, abstraction: CardAbstraction, workers: int):
+    global _WORKER
+    shm = shared_memory.SharedMemory(name=shm_name)
+    traverser = _Traverser(cfg, abstraction)
+    arrays = np.ndarray((2 + 2 * workers, traverser.n_entries), dtype=np.float32, buffer=shm.buf)
+    _WORKER = {"shm": shm, "traverser": traverser, "arrays": arrays}
+
+
+def _run_slot(slot: int, iterations: int, seed: int) -> float:
+    """Pool task: run iterations into delta slot `slot`; returns the busy seconds."""
+    t0 = time.perf_counter()
+    arrays = _WORKER["arrays"]
+    _WORKER["traverser"].run(arrays[0], arrays[2 + 2 * slot], arrays[3 + 2 * slot], iterations, seed)
+    return time.perf_counter() - t0
+
+
+class ParallelMCCFR:
+    """
+    External-sampling MCCFR with `workers` processes sharing one set of
+    regrets.
+
+    One shared-memory segment holds the regret and strategy-sum arrays and a
+    pair of delta arrays per worker. A round hands every worker
+    `sync_every` iterations: it traverses against the regrets as they were
+    at the start of the round and adds its deltas into its own slot, so
+    workers never write the same memory. The parent then merges all slots
+    into the shared arrays and clears them. Larger sync_every means less
+    merging and process overhead per iteration but staler regrets within a
+    round.
+
+    workers=0 runs the same rounds in-process (one slot, no pool), the
+    baseline for measuring pool overhead.
+    """
+
+    def __init__(self, cfg: TreeConfig, abstraction: CardAbstraction, workers: Optional[int] = None,
+                 sync_every: int = config.CFR_SYNC_ITERATIONS, floor_regrets: bool = False, seed: int = 0):
+        """
+        Args:
+            cfg: Betting tree configuration (every worker builds the same tree).
+            abstraction: Buckets per street; must have as many streets as the tree.
+            workers: Worker processes; 0 = in-process. None = config.CFR_WORKERS,
+                or one per core when that is 0.
+            sync_every: Iterations per worker between merges.
+            floor_regrets: Floor merged regrets at zero (CFR+-style).
+            seed: Base seed; every round and slot derives its own.
+        """
+        if workers is None:
+            workers = config.CFR_WORKERS or os.cpu_count() or 1
+        self.workers = workers
+        self.sync_every = sync_every
+        self.floor_regrets = floor_regrets
+        self.seed = seed
+        self.iteration = 0
+        self.elapsed_s = 0.0
+        self.busy_s = 0.0
+        self._round = 0
+
+        tree = GameTree(cfg)
+        n_entries = entries_needed(tree, abstraction)
+        slots = max(workers, 1)
+        self._shm = shared_memory.SharedMemory(create=True, size=max((2 + 2 * slots) * n_entries * 4, 1))
+        self._arrays = np.ndarray((2 + 2 * slots, n_entries), dtype=np.float32, buffer=self._shm.buf)
+        self._arrays[:] = 0
+        self.regret, self.strategy_sum = self._arrays[0], self._arrays[1]
+        self._deltas = self._arrays[2:].reshape(slots, 2, n_entries)
+        # Exact evaluation of the shared arrays; its own iterate() is never called
+        self.solver = CFRSolver(tree, abstraction, buffers=(self.regret, self.strategy_sum))
+
+        self._local: Optional[_Traverser] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+        if workers == 0:
+            self._local = _Traverser(cfg, abstraction)
+        else:
+            self._pool = ProcessPoolExecutor(workers, mp_context=get_context("spawn"), initializer=_init_worker,
+                                             initargs=(self._shm.name, cfg, abstraction, workers))
+
+    def run_round(self):
+        """sync_every iterations on every worker, then merge their deltas."""
+        t0 = time.perf_counter()
+        seeds = np.random.SeedSequence((self.seed, self._round)).generate_state(len(self._deltas)).tolist()
+        if self._pool is None:
+            start = time.perf_counter()
+            self._local.run(self.regret, self._deltas[0, 0], self._deltas[0, 1], self.sync_every, seeds[0])
+            self.busy_s += time.perf_counter() - start
+        else:
+            futures = [self._pool.submit(_run_slot, slot, self.sync_every, seeds[slot])
+                       for slot in range(self.workers)]
+            self.busy_s += sum(f.result() for f in futures)
+
+        self.regret += self._deltas[:, 0].sum(axis=0)
+        self.strategy_sum += self._deltas[:, 1].sum(axis=0)
+        self._deltas[:] = 0
+        if self.floor_regrets:
+            np.maximum(self.regret, 0, out=self.regret)
+        self._round += 1
+        self.iteration += self.sync_every * len(self._deltas)
+        self.elapsed_s += time.perf_counter() - t0
+
+    def solve(self, iterations: Optional[int] = None, seconds: Optional[float] = None,
+              eval_every_s: float = 0.0) -> List[dict]:
+        """
+        Run rounds until `iterations` total iterations or `seconds` of solving
+        time. Every eval_every_s of solving time (and at the end) record
+        exploitability; evaluation time is not counted as solving time.
+        Returns the records.
+        """
+        if iterations is None and seconds is None:
+            raise ValueError("Give iterations or seconds")
+        history = []
+        next_eval = self.elapsed_s + eval_every_s
+        while True:
+            self.run_round()
+            done = ((iterations is not None and self.iteration >= iterations)
+                    or (seconds is not None and self.elapsed_s >= seconds))
+            if done or (eval_every_s and self.elapsed_s >= next_eval):
+                history.append({"iteration": self.iteration, "seconds": self.elapsed_s,
+                                "exploitability": self.exploitability()})
+                next_eval = self.elapsed_s + eval_every_s
+            if done:
+                return history
+
+    def exploitability(self) -> float:
+        return self.solver.exploitability()
+
+    def stats(self) -> dict:
+        stats = self.solver.stats()
+        stats.update(workers=self.workers, sync_every=self.sync_every, iterations=self.iteration,
+                     iterations_per_s=self.iteration / self.elapsed_s if self.elapsed_s else 0.0,
+                     shared_bytes=self._shm.size,
+                     # Time workers spent traversing over the time they could have: below 1 = merge / IPC overhead
+                     utilization=self.busy_s / (self.elapsed_s * max(self.workers, 1)) if self.elapsed_s else 0.0)
+        return stats
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        if self._shm is not None:
+            # Drop every view of the buffer before the segment can be closed
+            self.solver = self.regret = self.strategy_sum = self._deltas = self._arrays = None
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self) -> "ParallelMCCFR":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
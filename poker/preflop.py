@@ -0,0 +1,158 @@
+"""
+Preflop equity of the 169 starting-hand classes against 1..8 random
+opponents, computed once offline and memory-mapped at run time.
+
+Build (a few minutes; more trials = tighter estimates):
+    python -m poker.preflop --trials 200000
+"""
+
+import argparse
+import os
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+
+import config
+from poker.cards import N_CARDS, N_RANKS, RANK_CHARS, card_rank, card_suit, make_card, parse_card
+from poker.equity import EquityEstimator
+
+
+N_HAND_CLASSES = 169
+MAX_OPPONENTS = 8
+
+
+# Class index = row * 13 + col on the usual 13x13 chart: aces first, pairs on
+# the diagonal, suited hands above it (row = high card), offsuit below.
+def hand_class(card1: int, card2: int) -> int:
+    hi, lo = sorted((12 - card_rank(card1), 12 - card_rank(card2)))
+    if hi == lo or card_suit(card1) == card_suit(card2):
+        return hi * N_RANKS + lo
+    return lo * N_RANKS + hi
+
+
+def hand_class_name(index: int) -> str:
+    """"AA", "AKs", "72o", ..."""
+    row, col = divmod(index, N_RANKS)
+    hi, lo = RANK_CHARS[12 - min(row, col)], RANK_CHARS[12 - max(row, col)]
+    if row == col:
+        return hi + lo
+    return hi + lo + ("s" if row < col else "o")
+
+
+def class_combo(index: int) -> Tuple[int, int]:
+    """One representative pair of card ids (equity vs random hands is the same for every combo)."""
+    row, col = divmod(index, N_RANKS)
+    hi, lo = 12 - min(row, col), 12 - max(row, col)
+    return make_card(hi, 0), make_card(lo, 0 if row < col else 1)
+
+
+def class_combos(index: int) -> int:
+    row, col = divmod(index, N_RANKS)
+    return 6 if row == col else (4 if row < col else 12)
+
+
+# Card pair -> class, so a lookup is two array reads
+_CLASS_OF = np.array([[hand_class(a, b) if a != b else -1 for b in range(N_CARDS)] for a in range(N_CARDS)],
+                     dtype=np.int16)
+
+
+def hand_classes(holes: np.ndarray) -> np.ndarray:
+    """Hand class of each row of an (n, 2) array of card ids."""
+    holes = np.asarray(holes, dtype=np.intp)
+    return _CLASS_OF[holes[:, 0], holes[:, 1]]
+
+
+def build_table(trials: int, seed: int = 0, batch: int = config.EQUITY_BATCH, verbose: bool = True) -> np.ndarray:
+    """
+    (2, 169, 8) float32: [0] equity and [1] its standard error for each hand
+    class against 1..8 random opponents, from `trials` Monte Carlo trials each.
+    """
+    estimator = EquityEstimator(batch=batch, seed=seed)
+    table = np.zeros((2, N_HAND_CLASSES, MAX_OPPONENTS), dtype=np.float32)
+    t0 = time.perf_counter()
+    for index in range(N_HAND_CLASSES):
+        for opponents in range(1, MAX_OPPONENTS + 1):
+            r = estimator.equity(class_combo(index), (), opponents, ci_target=0, max_trials=trials,
+                                 time_budget_s=None)
+            table[0, index, opponents - 1] = r.equity
+            table[1, index, opponents - 1] = r.std_error
+        if verbose and (index + 1) % 13 == 0:
+            print(f"  {index + 1}/{N_HAND_CLASSES} classes, {time.perf_counter() - t0:.0f} s")
+    return table
+
+
+class PreflopEquityTable:
+    """
+    O(1) preflop equity from the built table: the two hole cards map to a
+    class through a 52x52 array and the (class, opponents) entry is read from
+    the memory-mapped file, loaded on first use.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: Table file (config.PREFLOP_EQUITY_PATH by default).
+        """
+        self.path = path or config.PREFLOP_EQUITY_PATH
+        self._table: Optional[np.ndarray] = None
+
+    @property
+    def table(self) -> np.ndarray:
+        if self._table is None:
+            if not os.path.exists(self.path):
+                raise FileNotFoundError(f"{self.path} not found; build it with: python -m poker.preflop")
+            self._table = np.load(self.path, mmap_mode="r")
+        return self._table
+
+    def equity(self, card1: int, card2: int, opponents: int = 1) -> float:
+        """Equity of two hole-card ids against `opponents` random hands (clamped to 1..8)."""
+        opponents = min(max(opponents, 1), MAX_OPPONENTS)
+        return float(self.table[0, _CLASS_OF[card1, card2], opponents - 1])
+
+    def class_equity(self, index: int, opponents: int = 1) -> float:
+        opponents = min(max(opponents, 1), MAX_OPPONENTS)
+        return float(self.table[0, index, opponents - 1])
+
+    def from_labels(self, label1: str, label2: str, opponents: int = 1) -> float:
+        """Equity from the player_card_1 / player_card_2 labels, e.g. ("Ah", "10h")."""
+        return self.equity(parse_card(label1), parse_card(label2), opponents)
+
+    def for_state(self, state) -> Optional[float]:
+        """
+        Equity for a TableState: hero cards against one opponent per occupied
+        seat. None until both hole cards have been read.
+        """
+        if not state.has_hero_cards:
+            return None
+        return self.from_labels(state.hero[0], state.hero[1], len(state.seats))
+
+
+# Shared table for the decision loop
+PREFLOP = PreflopEquityTable()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the preflop equity table")
+    parser.add_argument("--trials", type=int, default=100000, help="Monte Carlo trials per (class, opponents)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=config.PREFLOP_EQUITY_PATH)
+    args = parser.parse_args()
+
+    print(f"{N_HAND_CLASSES} classes x 1..{MAX_OPPONENTS} opponents, {args.trials} trials each")
+    t0 = time.perf_counter()
+    table = build_table(args.trials, args.seed)
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    tmp = args.out + ".tmp.npy"
+    np.save(tmp, table)
+    os.replace(tmp, args.out)
+
+    best = np.argsort(-table[0, :, 0])
+    print(f"wrote {args.out} ({os.path.getsize(args.out)} bytes) in {time.perf_counter() - t0:.0f} s, "
+          f"max std error {table[1].max():.4f}")
+    print("heads-up top 5: " + ", ".join(f"{hand_class_name(i)} {100 * table[0, i, 0]:.1f}%" for i in best[:5]))
+    print("heads-up bottom 3: " + ", ".join(f"{hand_class_name(i)} {100 * table[0, i, 0]:.1f}%" for i in best[-3:]))
+
+
+if __name__ == "__main__":
+    main()
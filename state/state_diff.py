@@ -0,0 +1,194 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+from state.table_state import TableState
+
+
+# Fields of TableState that are debounced and diffed
+_TRACKED = ("hero", "board", "occupied", "pot")
+
+
+@dataclass(frozen=True)
+class StateEvent:
+    """
+    One change on one table. kind is one of:
+        table_appeared, table_gone, new_hand, hero_cards, street,
+        card_revealed, seat_occupied, seat_vacated, pot_changed
+    """
+    kind: str
+    table_id: int
+    data: Dict[str, Any] = field(default_factory=dict)
+    frame_seq: int = 0
+
+    def __str__(self) -> str:
+        details = " ".join(f"{k}={v}" for k, v in self.data.items())
+        return f"table {self.table_id}: {self.kind} {details}".rstrip()
+
+
+class _TableTrack:
+    """
+    Committed state of one table plus the pending (not yet stable) field
+    values. A track is not confirmed until the table has been seen in
+    stable_frames consecutive frames; until then committed is just its
+    latest state and nothing is reported.
+    """
+
+    def __init__(self, state: TableState):
+        self.committed = state
+        self.pending: Dict[str, Any] = {}
+        self.pending_frames: Dict[str, int] = {}
+        self.absent_frames = 0
+        self.present_frames = 1
+        self.confirmed = False
+
+
+class TableStateDiffer:
+    """
+    Turns a stream of per-frame TableStates into change events.
+
+    A field (hero cards, board, occupied seats, pot) only counts as changed
+    once its new value has been seen in stable_frames consecutive frames, so
+    a classifier flicker on a single frame never produces events. Likewise
+    a table is only reported as appeared once it has been seen, and as gone
+    once it has been missing, in stable_frames consecutive frames: a
+    one-frame false detection produces nothing, and one missed detection
+    does not replay the whole table as table_gone / table_appeared.
+    table_id must be persistent (TableDetector.table_ids), not a position in
+    the frame's table list. Consumers
+    call update() once per analyzed frame and handle the (usually empty)
+    event list instead of re-reading every table's full state.
+    """
+
+    def __init__(self, stable_frames: int = 2):
+        """
+        Args:
+            stable_frames: Consecutive frames a new field value, a new table or a
+                           missing table must persist.
+        """
+        self.stable_frames = max(1, stable_frames)
+        self._tables: Dict[int, _TableTrack] = {}
+
+    def state(self, table_id: int) -> Optional[TableState]:
+        """Last committed (stable) state of a reported table."""
+        track = self._tables.get(table_id)
+        return track.committed if track is not None and track.confirmed else None
+
+    @property
+    def states(self) -> Dict[int, TableState]:
+        return {table_id: track.committed for table_id, track in self._tables.items() if track.confirmed}
+
+    def update(self, states: Iterable[TableState]) -> List[StateEvent]:
+        """
+        Feed every table's state for one frame. Tables seen for stable_frames
+        consecutive frames count as appeared, tables missing for as many as gone.
+        """
+        events: List[StateEvent] = []
+        seen = set()
+        for state in states:
+            seen.add(state.table_id)
+            track = self._tables.get(state.table_id)
+            if track is None:
+                track = self._tables[state.table_id] = _TableTrack(state)
+            elif not track.confirmed:
+                track.committed = state
+                track.present_frames += 1
+            else:
+                track.absent_frames = 0
+                events.extend(self._advance(track, state))
+                continue
+            if track.present_frames >= self.stable_frames:
+                track.confirmed = True
+                events.append(StateEvent("table_appeared", state.table_id, {"seats": state.seats},
+                                         state.frame_seq))
+                events.extend(self._diff(TableState(state.table_id), state))
+
+        for table_id in [t for t in self._tables if t not in seen]:
+            track = self._tables[table_id]
+            if not track.confirmed:
+                # Not seen in enough consecutive frames: never reported, dropped silently
+                del self._tables[table_id]
+                continue
+            track.absent_frames += 1
+            if track.absent_frames >= self.stable_frames:
+                del self._tables[table_id]
+                events.append(StateEvent("table_gone", table_id))
+        return events
+
+    def reset(self):
+        self._tables.clear()
+
+    def _advance(self, track: _TableTrack, state: TableState) -> List[StateEvent]:
+        old = track.committed
+        changed = {}
+        for name in _TRACKED:
+            value = getattr(state, name)
+            if value == getattr(old, name):
+                track.pending.pop(name, None)
+                track.pending_frames.pop(name, None)
+                continue
+            if track.pending.get(name, _MISSING) == value:
+                track.pending_frames[name] += 1
+            else:
+                track.pending[name] = value
+                track.pending_frames[name] = 1
+            if track.pending_frames[name] >= self.stable_frames:
+                changed[name] = value
+                del track.pending[name], track.pending_frames[name]
+
+        if not changed:
+            # Keep geometry current even when nothing in the game changed
+            track.committed = _replace(old, state, {})
+            return []
+        new = _replace(old, state, changed)
+        track.committed = new
+        return self._diff(old, new)
+
+    @staticmethod
+    def _diff(old: TableState, new: TableState) -> List[StateEvent]:
+        t, seq = new.table_id, new.frame_seq
+        events = []
+
+        hand_over = (old.has_hero_cards and new.has_hero_cards and old.hero != new.hero) or \
+                    (len(new.board) < len(old.board))
+        if hand_over:
+            events.append(StateEvent("new_hand", t, {"hero": new.hero, "board": new.board}, seq))
+        if new.hero != old.hero and new.has_hero_cards:
+            events.append(StateEvent("hero_cards", t, {"cards": new.hero}, seq))
+
+        if new.board != old.board:
+            # After a new hand (or a misread board) every visible card is new
+            start = 0 if hand_over or new.board[:len(old.board)] != old.board else len(old.board)
+            for idx in range(start, len(new.board)):
+                events.append(StateEvent("card_revealed", t, {"index": idx, "card": new.board[idx]}, seq))
+            if new.street is not None and new.street != old.street:
+                events.append(StateEvent("street", t, {"street": new.street, "board": new.board}, seq))
+
+        if new.occupied != old.occupied:
+            gained = new.occupied & ~old.occupied
+            lost = old.occupied & ~new.occupied
+            for seat_id in range(max(gained, lost).bit_length()):
+                if gained >> seat_id & 1:
+                    events.append(StateEvent("seat_occupied", t, {"seat": seat_id}, seq))
+                elif lost >> seat_id & 1:
+                    events.append(StateEvent("seat_vacated", t, {"seat": seat_id}, seq))
+
+        if new.pot != old.pot:
+            events.append(StateEvent("pot_changed", t, {"pot": new.pot, "previous": old.pot}, seq))
+        return events
+
+
+_MISSING = object()
+
+
+def _replace(old: TableState, new: TableState, changed: Dict[str, Any]) -> TableState:
+    """Committed state: stable game fields from old unless changed, geometry from new."""
+    return TableState(
+        table_id=new.table_id,
+        hero=changed.get("hero", old.hero),
+        board=changed.get("board", old.board),
+        occupied=changed.get("occupied", old.occupied),
+        pot=changed.get("pot", old.pot),
+        box=new.box,
+        seat_rois=new.seat_rois,
+        frame_seq=new.frame_seq,
+    )
@@ -1,5 +1,6 @@
-from dataclasses import dataclass
-from typing import Tuple
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+import numpy as np
 
 
 @dataclass(frozen=True)
@@ -35,3 +36,175 @@ class TableBox:
         w = int(w_pct * self.w)
         h = int(h_pct * self.h)
         return (x, y, x + w, y + h)
+
+
+class TableLayout:
+    """
+    Every ROI of one table geometry compiled to pixel boxes.
+
+    Built once per (TableBox geometry, frame size) from the table-relative
+    TABLE_ROIS / SEAT_ROIS dicts. Row i of `boxes` is the full-frame
+    (x1, y1, x2, y2) of ROI `names[i]` clipped to the frame; `raw_boxes` holds
+    the unclipped values and `inside` flags ROIs that lie fully in the frame.
+    Boxes are computed exactly like TableBox.roi_from_rel.
+    """
+
+    def __init__(self, table: TableBox, frame_shape, table_rois: Dict, seat_rois: Dict):
+        self.table_xyxy = table.as_xyxy()
+        self.frame_hw = tuple(frame_shape[:2])
+
+        # (group, roi_name): group is "table" for TABLE_ROIS, else the seat name
+        self.names: List[Tuple[str, str]] = []
+        rel = []
+        for roi_name, coords in table_rois.items():
+            self.names.append(("table", roi_name))
+            rel.append(coords)
+
+        self.seat_names: List[str] = list(seat_rois.keys())
+        for seat_name, seat_data in seat_rois.items():
+            if isinstance(seat_data, dict):
+                # occupancy first so each seat's occupancy box is easy to index
+                for roi_name in ["occupancy"] + [k for k in seat_data if k != "occupancy"]:
+                    self.names.append((seat_name, roi_name))
+                    rel.append(seat_data[roi_name])
+            else:
+                self.names.append((seat_name, "occupancy"))
+                rel.append(seat_data)
+
+        rel = np.asarray(rel, dtype=np.float64).reshape(-1, 4)
+        w, h = table.w, table.h
+        x = np.trunc(table.x1 + rel[:, 0] * w).astype(np.int64)
+        y = np.trunc(table.y1 + rel[:, 1] * h).astype(np.int64)
+        bw = np.trunc(rel[:, 2] * w).astype(np.int64)
+        bh = np.trunc(rel[:, 3] * h).astype(np.int64)
+        self.raw_boxes = np.stack([x, y, x + bw, y + bh], axis=1)
+
+        frame_h, frame_w = self.frame_hw
+        self.boxes = self.raw_boxes.copy()
+        self.boxes[:, [0, 2]] = np.clip(self.boxes[:, [0, 2]], 0, frame_w)
+        self.boxes[:, [1, 3]] = np.clip(self.boxes[:, [1, 3]], 0, frame_h)
+        self.inside = ((self.raw_boxes[:, 0] >= 0) & (self.raw_boxes[:, 1] >= 0) &
+                       (self.raw_boxes[:, 2] <= frame_w) & (self.raw_boxes[:, 3] <= frame_h))
+
+        self.index = {name: i for i, name in enumerate(self.names)}
+
+        # Card ROIs that can be cropped without clipping: (roi_name, (x1, y1, x2, y2))
+        self.card_rois = [
+            (roi_name, tuple(int(v) for v in self.raw_boxes[i]))
+            for i, (group, roi_name) in enumerate(self.names)
+            if group == "table" and "card" in roi_name and self.inside[i]
+        ]
+
+        # Per-seat occupancy boxes (clipped) as an [n_seats, 4] array, plus the
+        # clipped name/VPIP/stack/bet/pos boxes of each seat as tuples
+        self.seat_occupancy_idx = np.array([self.index[(s, "occupancy")] for s in self.seat_names], dtype=np.int64)
+        self.seat_boxes = self.boxes[self.seat_occupancy_idx]
+        self.seat_rois: List[Dict[str, Tuple[int, int, int, int]]] = [
+            {roi_name: tuple(int(v) for v in self.boxes[i])
+             for i, (group, roi_name) in enumerate(self.names) if group == seat_name and roi_name != "occupancy"}
+            for seat_name in self.seat_names
+        ]
+
+    def box(self, group: str, roi_name: str) -> Tuple[int, int, int, int]:
+        """Clipped pixel box of one ROI, e.g. box("table", "pot_area")."""
+        return tuple(int(v) for v in self.boxes[self.index[(group, roi_name)]])
+
+
+class LayoutCache:
+    """
+    Keeps compiled TableLayouts keyed by table geometry and frame size, so ROI
+    geometry is only recomputed when a table box actually changes.
+    """
+
+    def __init__(self, table_rois: Dict, seat_rois: Dict, max_entries: int = 32):
+        self.table_rois = table_rois
+        self.seat_rois = seat_rois
+        self.max_entries = max_entries
+        self._layouts: Dict[Tuple, TableLayout] = {}
+
+    def get(self, table: TableBox, frame_shape) -> TableLayout:
+        key = (table.as_xyxy(), tuple(frame_shape[:2]))
+        layout = self._layouts.get(key)
+        if layout is None:
+            # YOLO boxes jitter by a pixel or two between passes; don't grow forever
+            if len(self._layouts) >= self.max_entries:
+                self._layouts.clear()
+            layout = TableLayout(table, frame_shape, self.table_rois, self.seat_rois)
+            self._layouts[key] = layout
+        return layout
+
+    def clear(self):
+        self._layouts.clear()
+
+
+STREETS = {0: "preflop", 3: "flop", 4: "turn", 5: "river"}
+
+
+@dataclass(frozen=True)
+class TableState:
+    """
+    What one table shows in one frame, reduced to the fields game logic needs.
+
+    hero holds the two hole-card labels (None where no card was read); board
+    holds the community cards revealed so far, left to right, stopping at the
+    first empty slot. occupied is a bitmask over seat ids. Only the
+    compared fields take part in ==, so two frames showing the same game
+    compare equal even if the table box or ROIs moved a pixel.
+    """
+    table_id: int
+    hero: Tuple[Optional[str], Optional[str]] = (None, None)
+    board: Tuple[str, ...] = ()
+    occupied: int = 0
+    pot: Optional[float] = None  # filled in once a pot reader exists
+
+    box: Optional[TableBox] = field(default=None, compare=False)
+    seat_rois: Dict[int, Dict[str, Tuple[int, int, int, int]]] = field(default_factory=dict, compare=False)
+    frame_seq: int = field(default=0, compare=False)
+
+    @property
+    def street(self) -> Optional[str]:
+        """preflop/flop/turn/river, or None while the board is mid-deal (1 or 2 cards)."""
+        return STREETS.get(len(self.board))
+
+    @property
+    def seats(self) -> List[int]:
+        return [i for i in range(self.occupied.bit_length()) if self.occupied >> i & 1]
+
+    @property
+    def has_hero_cards(self) -> bool:
+        return all(card is not None for card in self.hero)
+
+    @classmethod
+    def from_analysis(cls, table_id: int, table_result: dict, frame_seq: int = 0) -> "TableState":
+        """
+        Build from one entry of app.analysis.analyze_tables' output
+        ({"table", "players", "cards"}).
+        """
+        labels = {}
+        for roi_name, _, card_info in table_result["cards"]:
+            label = card_info["label"]
+            labels[roi_name] = None if label == "NO_CARD" else label
+
+        board = []
+        for k in range(1, 6):
+            label = labels.get(f"community_card_{k}")
+            if label is None:
+                break
+            board.append(label)
+
+        occupied = 0
+        seat_rois = {}
+        for seat in table_result["players"]:
+            if seat.is_occupied:
+                occupied |= 1 << seat.seat_id
+                seat_rois[seat.seat_id] = seat.rois
+
+        return cls(
+            table_id=table_id,
+            hero=(labels.get("player_card_1"), labels.get("player_card_2")),
+            board=tuple(board),
+            occupied=occupied,
+            box=table_result["table"],
+            seat_rois=seat_rois,
+            frame_seq=frame_seq,
+        )
@@ -0,0 +1,100 @@
+import cv2
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict, Hashable, Optional, Tuple
+from vision.card_detector import CardPrediction
+
+
+@dataclass
+class _CacheEntry:
+    fingerprint: np.ndarray
+    shape: Tuple[int, ...]
+    prediction: CardPrediction
+
+
+class CardCache:
+    """
+    Per-ROI cache of card predictions keyed by a cheap perceptual fingerprint.
+
+    The fingerprint is the crop downsampled to a small grayscale thumbnail.
+    A cached prediction is reused while the mean absolute difference between
+    the current thumbnail and the one that was last classified stays below
+    diff_threshold (in 0..255 gray levels).
+
+    Keys are arbitrary hashables, typically (table_idx, roi_name).
+    """
+
+    def __init__(self, diff_threshold: float = 6.0, fingerprint_size: int = 16):
+        """
+        Args:
+            diff_threshold: Max mean-abs-diff (gray levels) to treat a crop as unchanged.
+                            Lower = re-classify more often.
+            fingerprint_size: Side of the square grayscale thumbnail.
+        """
+        self.diff_threshold = diff_threshold
+        self.fingerprint_size = fingerprint_size
+        self._entries: Dict[Hashable, _CacheEntry] = {}
+
+        self.hits = 0
+        self.misses = 0
+
+    def fingerprint(self, crop_bgr: np.ndarray) -> np.ndarray:
+        """Downsampled grayscale thumbnail of the crop (float32)."""
+        gray = cv2.cvtColor(crop_bgr, cv2.COLOR_BGR2GRAY) if crop_bgr.ndim == 3 else crop_bgr
+        thumb = cv2.resize(gray, (self.fingerprint_size, self.fingerprint_size), interpolation=cv2.INTER_AREA)
+        return thumb.astype(np.float32)
+
+    def get(self, key: Hashable, crop_bgr: np.ndarray, fingerprint: np.ndarray) -> Optional[CardPrediction]:
+        """
+        Return the cached prediction for key if the crop is unchanged, else None.
+        Counts a hit or a miss.
+        """
+        entry = self._entries.get(key)
+        if (entry is not None and entry.shape == crop_bgr.shape
+                and float(np.mean(np.abs(fingerprint - entry.fingerprint))) <= self.diff_threshold):
+            self.hits += 1
+            return entry.prediction
+
+        self.misses += 1
+        return None
+
+    def put(self, key: Hashable, crop_bgr: np.ndarray, fingerprint: np.ndarray, prediction: CardPrediction):
+        """Store the prediction for a freshly classified crop."""
+        self._entries[key] = _CacheEntry(fingerprint=fingerprint, shape=crop_bgr.shape, prediction=prediction)
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drop one entry, or every entry when key is None."""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    @property
+    def lookups(self) -> int:
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    @property
+    def skipped_inferences(self) -> int:
+        # Every hit is one crop that did not go through the classifier
+        return self.hits
+
+    def stats(self) -> dict:
+        return {
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "skipped_inferences": self.skipped_inferences,
+        }
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def summary(self) -> str:
+        return (f"Card cache: {self.hit_rate * 100:.1f}% hits, "
+                f"{self.skipped_inferences}/{self.lookups} inferences skipped")
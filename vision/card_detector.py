@@ -1,16 +1,20 @@
 # vision/card_classifier.py
 from dataclasses import dataclass
-from typing import Tuple, Optional
+from typing import List, Tuple, Optional
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
 from torchvision import transforms
 import numpy as np
 import cv2
+import os
 
 RANKS = ["A","K","Q","J","10","9","8","7","6","5","4","3","2"]
 SUITS = ["c","d","h","s"]
 
+# Inference backends for CardClassifier
+BACKENDS = ("eager", "torchscript", "onnx", "onnx_int8")
+
 class TinyCornerNet(nn.Module):
     def __init__(self):
         super().__init__()
@@ -34,6 +38,53 @@ class TinyCornerNet(nn.Module):
         x = self.fc(x)
         return self.rank_head(x), self.suit_head(x)
 
+def load_tiny_corner_net(weights_path: str, device: str = "cpu") -> TinyCornerNet:
+    """Build TinyCornerNet from a training checkpoint, in eval mode."""
+    model = TinyCornerNet().to(device)
+    ckpt = torch.load(weights_path, map_location=device)
+
+    # supports either raw state_dict or {"model_state": state_dict}
+    state = ckpt["model_state"] if isinstance(ckpt, dict) and "model_state" in ckpt else ckpt
+    model.load_state_dict(state)
+    model.eval()
+    return model
+
+
+def backend_path(weights_path: str, backend: str) -> str:
+    """Where the exported model for a checkpoint lives: x.pt -> x.torchscript.pt / x.onnx / x.int8.onnx"""
+    stem = os.path.splitext(weights_path)[0]
+    if backend == "torchscript":
+        return stem + ".torchscript.pt"
+    if backend == "onnx":
+        return stem + ".onnx"
+    if backend == "onnx_int8":
+        return stem + ".int8.onnx"
+    return weights_path
+
+
+def to_torchscript(model: TinyCornerNet, input_size: int = 96) -> torch.jit.ScriptModule:
+    """Trace and freeze (constant-fold weights, drop training-only ops) for inference."""
+    example = torch.rand(1, 3, input_size, input_size, device=next(model.parameters()).device)
+    with torch.no_grad():
+        traced = torch.jit.trace(model, example)
+    return torch.jit.freeze(traced)
+
+
+def export_onnx(model: TinyCornerNet, path: str, input_size: int = 96):
+    """
+    Export with a dynamic batch dimension so one file serves any number of crops.
+    Weights are embedded (no .onnx.data sidecar); the model is only a few MB.
+    """
+    example = torch.rand(1, 3, input_size, input_size, device=next(model.parameters()).device)
+    torch.onnx.export(
+        model, (example,), path,
+        input_names=["input"], output_names=["rank_logits", "suit_logits"],
+        dynamic_axes={"input": {0: "batch"}, "rank_logits": {0: "batch"}, "suit_logits": {0: "batch"}},
+        opset_version=17,
+        external_data=False,
+    )
+
+
 @dataclass
 class CardPrediction:
     label: str           # e.g. "Qh"
@@ -46,15 +97,43 @@ class CardClassifier:
     Classifies an already-cropped card-corner image (BGR numpy) into rank+suit.
     """
 
-    def __init__(self, weights_path: str, device: str = "cpu", input_size: int = 96):
+    def __init__(self, weights_path: str, device: str = "cpu", input_size: int = 96,
+                 fast_preprocess: bool = True, backend: str = "eager"):
+        """
+        Args:
+            weights_path: Training checkpoint (.pt). Exported models are looked up
+                          next to it (see backend_path / vision.export_card_model),
+                          or weights_path may point at an exported file directly.
+            backend: "eager" (plain PyTorch), "torchscript" (traced + frozen; traced
+                     on the fly if no exported file exists), "onnx" (ONNX Runtime
+                     CPU, needs onnxruntime and an exported .onnx file) or
+                     "onnx_int8" (same, with the int8 model written by
+                     vision.quantize_card_model).
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
         self.device = torch.device(device)
-        self.model = TinyCornerNet().to(self.device)
-        ckpt = torch.load(weights_path, map_location=self.device)
-
-        # supports either raw state_dict or {"model_state": state_dict}
-        state = ckpt["model_state"] if isinstance(ckpt, dict) and "model_state" in ckpt else ckpt
-        self.model.load_state_dict(state)
-        self.model.eval()
+        self.backend = backend
+        self.model = None
+        self.session = None
+
+        if backend in ("onnx", "onnx_int8"):
+            import onnxruntime as ort
+            onnx_path = weights_path if weights_path.endswith(".onnx") else backend_path(weights_path, backend)
+            if not os.path.exists(onnx_path):
+                tool = "export_card_model" if backend == "onnx" else "quantize_card_model"
+                raise FileNotFoundError(
+                    f"{onnx_path} not found; run: python -m vision.{tool} {weights_path}"
+                )
+            self.session = ort.InferenceSession(onnx_path, providers=["CPUExecutionProvider"])
+        elif backend == "torchscript":
+            ts_path = weights_path if weights_path.endswith(".torchscript.pt") else backend_path(weights_path, "torchscript")
+            if os.path.exists(ts_path):
+                self.model = torch.jit.load(ts_path, map_location=self.device)
+            else:
+                self.model = to_torchscript(load_tiny_corner_net(weights_path, self.device), input_size)
+        else:
+            self.model = load_tiny_corner_net(weights_path, self.device)
 
         self.tf = transforms.Compose([
             transforms.ToPILImage(),
@@ -62,26 +141,91 @@ class CardClassifier:
             transforms.ToTensor(),
         ])
 
-    @torch.no_grad()
-    def predict_corner(self, corner_bgr: np.ndarray) -> CardPrediction:
+        # cv2 path: resize straight into a reusable uint8 staging array, then
+        # BGR->RGB, HWC->CHW and /255 land in a (pinned) float32 buffer in one op
+        self.input_size = input_size
+        self.fast_preprocess = fast_preprocess
+        self._staging = np.empty((0, input_size, input_size, 3), dtype=np.uint8)
+        self._buffer = torch.empty((0, 3, input_size, input_size), dtype=torch.float32)
+
+    def _ensure_buffers(self, n: int):
+        """Grow the staging/input buffers to hold at least n crops."""
+        if self._buffer.shape[0] >= n:
+            return
+        size = self.input_size
+        self._staging = np.empty((n, size, size, 3), dtype=np.uint8)
+        # Pinned memory only exists with CUDA; it speeds up the host->device copy
+        self._buffer = torch.empty((n, 3, size, size), dtype=torch.float32,
+                                   pin_memory=self.device.type == "cuda")
+
+    def preprocess_tv(self, corners_bgr: List[np.ndarray]) -> torch.Tensor:
+        """Reference torchvision/PIL preprocessing. Returns [N,3,H,W] float32 in 0..1."""
         # Convert BGR -> RGB because PIL expects RGB
-        corner_rgb = cv2.cvtColor(corner_bgr, cv2.COLOR_BGR2RGB)
-
-        x = self.tf(corner_rgb).unsqueeze(0).to(self.device)  # [1,3,H,W]
-
-        rank_logits, suit_logits = self.model(x)
-
-        rank_probs = F.softmax(rank_logits, dim=1)[0]
-        suit_probs = F.softmax(suit_logits, dim=1)[0]
-
-        r_idx = int(torch.argmax(rank_probs))
-        s_idx = int(torch.argmax(suit_probs))
+        return torch.stack([
+            self.tf(cv2.cvtColor(corner_bgr, cv2.COLOR_BGR2RGB)) for corner_bgr in corners_bgr
+        ])
 
-        rank = RANKS[r_idx]
-        suit = SUITS[s_idx]
+    def preprocess_cv2(self, corners_bgr: List[np.ndarray]) -> torch.Tensor:
+        """
+        PIL-free preprocessing. Matches preprocess_tv within ~1/255 per pixel.
+        The returned tensor is a view of an internal buffer and is overwritten by the next call.
+        """
+        n = len(corners_bgr)
+        self._ensure_buffers(n)
+        size = self.input_size
+        staging = self._staging[:n]
+
+        for i, corner_bgr in enumerate(corners_bgr):
+            h, w = corner_bgr.shape[:2]
+            # INTER_LINEAR matches PIL bilinear when upscaling (the usual case for
+            # card corners); INTER_AREA approximates PIL's antialiasing when shrinking
+            interp = cv2.INTER_AREA if (h > size and w > size) else cv2.INTER_LINEAR
+            cv2.resize(corner_bgr, (size, size), dst=staging[i], interpolation=interp)
+
+        out = self._buffer[:n]
+        np.multiply(staging[..., ::-1].transpose(0, 3, 1, 2), np.float32(1.0 / 255.0), out=out.numpy())
+        return out
+
+    def _forward(self, x: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Run the selected backend on a [N,3,H,W] batch, returning (rank_logits, suit_logits)."""
+        if self.session is not None:
+            rank_logits, suit_logits = self.session.run(None, {"input": x.cpu().numpy()})
+            return torch.from_numpy(rank_logits), torch.from_numpy(suit_logits)
+        return self.model(x)
 
-        rank_conf = float(rank_probs[r_idx])
-        suit_conf = float(suit_probs[s_idx])
-        card_conf = rank_conf * suit_conf  # simple combine
+    @torch.no_grad()
+    def predict_corner(self, corner_bgr: np.ndarray) -> CardPrediction:
+        return self.predict_corners([corner_bgr])[0]
 
-        return CardPrediction(label=f"{rank}{suit}", rank_conf=rank_conf, suit_conf=suit_conf, card_conf=card_conf)
+    @torch.no_grad()
+    def predict_corners(self, corners_bgr: List[np.ndarray]) -> List[CardPrediction]:
+        """
+        Classify many card-corner crops (BGR numpy) in a single forward pass.
+        Crops may come from any ROI of any table; order of results matches input.
+        """
+        if len(corners_bgr) == 0:
+            return []
+
+        if self.fast_preprocess:
+            x = self.preprocess_cv2(corners_bgr)
+        else:
+            x = self.preprocess_tv(corners_bgr)
+        x = x.to(self.device, non_blocking=True)  # [N,3,H,W]
+
+        rank_logits, suit_logits = self._forward(x)
+
+        rank_probs = F.softmax(rank_logits, dim=1)
+        suit_probs = F.softmax(suit_logits, dim=1)
+
+        rank_conf, r_idx = rank_probs.max(dim=1)
+        suit_conf, s_idx = suit_probs.max(dim=1)
+
+        predictions = []
+        for rc, ri, sc, si in zip(rank_conf.tolist(), r_idx.tolist(), suit_conf.tolist(), s_idx.tolist()):
+            rank = RANKS[ri]
+            suit = SUITS[si]
+            card_conf = rc * sc  # simple combine
+            predictions.append(
+                CardPrediction(label=f"{rank}{suit}", rank_conf=rc, suit_conf=sc, card_conf=card_conf)
+            )
+        return predictions
@@ -0,0 +1,132 @@
+"""
+Export TinyCornerNet checkpoints to TorchScript and ONNX for CardClassifier's
+"torchscript" / "onnx" backends, then check that every backend predicts the
+same labels as eager PyTorch.
+
+Run from the repo root:
+    python -m vision.export_card_model                      # all tiny_corner_net_best_card*.pt
+    python -m vision.export_card_model vision/models/tiny_corner_net_best_cardv4.pt --formats onnx
+    python -m vision.export_card_model --check-only --images captured_cards/20240101_120000
+"""
+
+import argparse
+import glob
+import os
+import sys
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+import torch
+
+from vision.card_detector import (
+    BACKENDS, CardClassifier, backend_path, export_onnx, load_tiny_corner_net, to_torchscript
+)
+
+
+DEFAULT_WEIGHTS = "vision/models/tiny_corner_net_best_card*.pt"
+CARDS_DIR = "vision/models/52cards"
+
+
+def source_images(image_dirs: List[str]) -> List[Tuple[str, Optional[str]]]:
+    """(path, label) of every reference card image, then every captured ROI image (label None)."""
+    paths = [(p, os.path.splitext(os.path.basename(p))[0])
+             for p in sorted(glob.glob(os.path.join(CARDS_DIR, "*.png")))]
+    for d in image_dirs:
+        paths += [(p, None) for p in sorted(glob.glob(os.path.join(d, "**", "*.png"), recursive=True))]
+    return paths
+
+
+def labelled_crops(image_dirs: List[str], seed: int = 0, variants: int = 3,
+                   sources: Optional[List[Tuple[str, Optional[str]]]] = None
+                   ) -> Tuple[List[np.ndarray], List[Optional[str]]]:
+    """
+    Reference card images plus jittered variants (rescaled, shifted, noisy) and
+    any captured ROI images, so checks run on more than 52 clean inputs.
+
+    Returns (crops, labels). Reference cards are labelled from their file name
+    ("Qh.png" -> "Qh"); captured ROIs are unlabelled (None). `sources`
+    restricts the images to a subset of source_images(image_dirs).
+    """
+    paths = source_images(image_dirs) if sources is None else sources
+
+    rng = np.random.default_rng(seed)
+    crops, labels = [], []
+    for p, label in paths:
+        img = cv2.imread(p)
+        if img is None:
+            continue
+        crops.append(img)
+        labels.append(label)
+        h, w = img.shape[:2]
+        for _ in range(variants):
+            scale = rng.uniform(0.5, 1.2)
+            jittered = cv2.resize(img, (max(8, int(w * scale)), max(8, int(h * scale))))
+            dy, dx = rng.integers(0, 4, 2)
+            jittered = jittered[dy:, dx:]
+            noise = rng.normal(0, 6, jittered.shape)
+            crops.append(np.clip(jittered + noise, 0, 255).astype(np.uint8))
+            labels.append(label)
+    return crops, labels
+
+
+def parity_crops(image_dirs: List[str], seed: int = 0) -> List[np.ndarray]:
+    return labelled_crops(image_dirs, seed)[0]
+
+
+def check_parity(weights_path: str, crops: List[np.ndarray], backends=BACKENDS) -> bool:
+    """True if every backend predicts the same label as eager for every crop."""
+    reference = CardClassifier(weights_path, backend="eager").predict_corners(crops)
+    ok = True
+    for backend in backends:
+        if backend == "eager":
+            continue
+        preds = CardClassifier(weights_path, backend=backend).predict_corners(crops)
+        mismatches = sum(a.label != b.label for a, b in zip(reference, preds))
+        max_conf_diff = max(abs(a.card_conf - b.card_conf) for a, b in zip(reference, preds))
+        status = "OK" if mismatches == 0 else "MISMATCH"
+        print(f"  {backend:<12} {status}: {mismatches}/{len(crops)} labels differ, "
+              f"max card_conf diff {max_conf_diff:.2e}")
+        ok &= mismatches == 0
+    return ok
+
+
+def export(weights_path: str, formats: List[str], input_size: int = 96):
+    model = load_tiny_corner_net(weights_path, "cpu")
+    if "torchscript" in formats:
+        path = backend_path(weights_path, "torchscript")
+        torch.jit.save(to_torchscript(model, input_size), path)
+        print(f"  wrote {path}")
+    if "onnx" in formats:
+        path = backend_path(weights_path, "onnx")
+        export_onnx(model, path, input_size)
+        print(f"  wrote {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export TinyCornerNet checkpoints and check backend parity")
+    parser.add_argument("weights", nargs="*", help=f"Checkpoints (default: {DEFAULT_WEIGHTS})")
+    parser.add_argument("--formats", nargs="+", choices=["torchscript", "onnx"], default=["torchscript", "onnx"])
+    parser.add_argument("--images", action="append", default=[], help="Extra directory of captured card ROIs")
+    parser.add_argument("--check-only", action="store_true", help="Skip export, only check parity")
+    args = parser.parse_args()
+
+    weights = args.weights or sorted(
+        p for p in glob.glob(DEFAULT_WEIGHTS) if not p.endswith(".torchscript.pt")
+    )
+    crops = parity_crops(args.images)
+
+    ok = True
+    for weights_path in weights:
+        print(weights_path)
+        if not args.check_only:
+            export(weights_path, args.formats)
+        ok &= check_parity(weights_path, crops, ["eager"] + args.formats)
+
+    if not ok:
+        print("Backend parity check FAILED")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
+import time
 import cv2
 import numpy as np
 from typing import List, Tuple, Dict, Optional
 from dataclasses import dataclass, field
 import config
+from app.metrics import METRICS
+from state.table_state import LayoutCache, TableLayout
 
 
 @dataclass
@@ -29,6 +32,23 @@ class PlayerSeat:
         return (self.x2 - self.x1) * (self.y2 - self.y1)
 
 
+def intersection_over_min(boxes: np.ndarray) -> np.ndarray:
+    """
+    Pairwise intersection / min(area_a, area_b) for boxes [..., N, 4] (x1, y1, x2, y2).
+    Better for overlapping ROIs than IoU.
+
+    Returns:
+        [..., N, N] overlap matrix (0..1); 0 where either box has no area
+    """
+    a = boxes[..., :, None, :]
+    b = boxes[..., None, :, :]
+    iw = np.maximum(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0)
+    ih = np.maximum(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0)
+    areas = (boxes[..., 2] - boxes[..., 0]) * (boxes[..., 3] - boxes[..., 1])
+    min_area = np.minimum(areas[..., :, None], areas[..., None, :])
+    return np.where(min_area > 0, (iw * ih) / np.maximum(min_area, 1), 0.0)
+
+
 class PlayerDetector:
     """
     Detects players at poker table seats using Canny edge detection + NMS.
@@ -37,7 +57,7 @@ class PlayerDetector:
     - Compute edge density (edge_ratio) using Canny edge detection
     - Compute Laplacian variance for texture detail
     - Use dual-threshold: occupied if both metrics exceed thresholds
-    - Apply NMS to handle overlapping seat ROIs
+    - Apply exclusion groups + NMS (array-based) to handle overlapping seat ROIs
     
     This approach is robust to:
     - Single boundary edges (empty seats with felt/background edge)
@@ -46,7 +66,8 @@ class PlayerDetector:
     """
     
     def __init__(self, edge_ratio_threshold: float = 0.1, laplacian_var_threshold: float = 100.0,
-                 canny_low: int = 50, canny_high: int = 150, nms_overlap_threshold: float = 0.6):
+                 canny_low: int = 50, canny_high: int = 150, nms_overlap_threshold: float = 0.6,
+                 empty_slot_edge_ratio: float = 0.02, empty_slot_laplacian_var: float = 250.0):
         """
         Args:
             edge_ratio_threshold: Min edge pixel ratio (0..1) to consider seat occupied.
@@ -58,19 +79,32 @@ class PlayerDetector:
             nms_overlap_threshold: NMS suppression threshold (0..1).
                                   Uses intersection / min(areaA, areaB) metric.
                                   Typical: 0.35-0.60. Higher = more aggressive suppression.
+            empty_slot_edge_ratio: A card ROI is bare felt if its edge ratio is below this...
+            empty_slot_laplacian_var: ...and its Laplacian variance is below this.
+                                      Card faces measure >0.06 / >900; noisy felt ~0 / <300.
         """
         self.edge_ratio_threshold = edge_ratio_threshold
         self.laplacian_var_threshold = laplacian_var_threshold
         self.canny_low = canny_low
         self.canny_high = canny_high
         self.nms_overlap_threshold = nms_overlap_threshold
+        self.empty_slot_edge_ratio = empty_slot_edge_ratio
+        self.empty_slot_laplacian_var = empty_slot_laplacian_var
         
         # Load seat coordinates from config
         self.seat_coords = config.SEAT_ROIS
+        self.layouts = LayoutCache(config.TABLE_ROIS, self.seat_coords)
+
+        self._compile_exclusion_groups()
+
+        # NMS overlap masks keyed by box geometry
+        self._overlap_masks = {}
 
     def set_seat_coords(self, seat_coords: dict):
         """Update seat coordinates. Dict format: {seat_name: (x_pct, y_pct, w_pct, h_pct)}"""
         self.seat_coords = seat_coords
+        self.layouts = LayoutCache(config.TABLE_ROIS, self.seat_coords)
+        self._compile_exclusion_groups()
 
     def _to_grayscale(self, roi: np.ndarray) -> np.ndarray:
         """Convert ROI to grayscale if needed."""
@@ -92,7 +126,7 @@ class PlayerDetector:
         edges = cv2.Canny(roi_gray, self.canny_low, self.canny_high)
         
         # Count edge pixels
-        edge_pixels = np.count_nonzero(edges)
+        edge_pixels = cv2.countNonZero(edges)
         total_pixels = edges.size
         
         return float(edge_pixels) / total_pixels
@@ -109,16 +143,42 @@ class PlayerDetector:
         if roi_gray.size == 0:
             return 0.0
         
-        # Apply Laplacian operator (detects sharp transitions/detail)
-        laplacian = cv2.Laplacian(roi_gray, cv2.CV_64F)
+        # Apply Laplacian operator (detects sharp transitions/detail).
+        # The 3x3 Laplacian of uint8 fits in int16 exactly; CV_16S + meanStdDev
+        # (which accumulates in double) is about twice as fast as CV_64F + np.var
+        laplacian = cv2.Laplacian(roi_gray, cv2.CV_16S)
         
         # Return variance of Laplacian response
-        return float(np.var(laplacian))
+        _, std = cv2.meanStdDev(laplacian)
+        return float(std[0, 0]) ** 2
+
+    def _score_seats(self, frame: np.ndarray, boxes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Edge ratio and Laplacian variance of every seat box, each filtered on
+        its own ROI (Canny's hysteresis depends on the ROI extent, so shared
+        filtering cannot reproduce per-ROI values).
+
+        Args:
+            frame: Input frame (BGR image)
+            boxes: int array [N, 4] of (x1, y1, x2, y2), already clipped to the frame
 
-    def _calculate_confidence(self, edge_ratio: float, laplacian_var: float) -> float:
+        Returns:
+            (edge_ratios [N], laplacian_vars [N]) as float64 arrays; 0 for boxes without area
+        """
+        edge_ratios = np.zeros(len(boxes), dtype=np.float64)
+        laplacian_vars = np.zeros(len(boxes), dtype=np.float64)
+        for i, (x1, y1, x2, y2) in enumerate(boxes.tolist()):
+            if x2 <= x1 or y2 <= y1:
+                continue
+            roi_gray = self._to_grayscale(frame[y1:y2, x1:x2])
+            edge_ratios[i] = self._calculate_edge_ratio(roi_gray)
+            laplacian_vars[i] = self._calculate_laplacian_variance(roi_gray)
+        return edge_ratios, laplacian_vars
+
+    def _calculate_confidence(self, edge_ratio, laplacian_var):
         """
         Calculate occupancy confidence score (0..1) based on both metrics.
-        Used for NMS ranking.
+        Used for NMS ranking. Works on floats or NumPy arrays.
         
         Args:
             edge_ratio: Edge density metric
@@ -128,198 +188,234 @@ class PlayerDetector:
             Confidence score (0..1)
         """
         # Normalize both metrics to 0..1 range (simple approach)
-        edge_score = min(edge_ratio / 0.3, 1.0)  # normalize assuming max ~0.3
-        lap_score = min(laplacian_var / 500.0, 1.0)  # normalize assuming max ~500
+        edge_score = np.minimum(edge_ratio / 0.3, 1.0)  # normalize assuming max ~0.3
+        lap_score = np.minimum(laplacian_var / 500.0, 1.0)  # normalize assuming max ~500
         
         # Combine as average
         return (edge_score + lap_score) / 2.0
 
-    def _compute_intersection_over_min(self, box_a: Tuple[int, int, int, int], 
-                                       box_b: Tuple[int, int, int, int]) -> float:
+    def _compile_exclusion_groups(self):
         """
-        Compute intersection / min(area_a, area_b) metric.
-        Better for overlapping ROIs than IoU.
-        
-        Args:
-            box_a: (x1, y1, x2, y2)
-            box_b: (x1, y1, x2, y2)
-        
-        Returns:
-            Overlap metric (0..1)
+        Turn config.SEAT_EXCLUSION_GROUPS (seat names) into a padded index
+        matrix [n_groups, max_group_len] over self.seat_coords order, -1 = padding.
+        Seats missing from seat_coords are ignored.
         """
-        x1_a, y1_a, x2_a, y2_a = box_a
-        x1_b, y1_b, x2_b, y2_b = box_b
-        
-        # Intersection area
-        xi1 = max(x1_a, x1_b)
-        yi1 = max(y1_a, y1_b)
-        xi2 = min(x2_a, x2_b)
-        yi2 = min(y2_a, y2_b)
-        
-        if xi2 < xi1 or yi2 < yi1:
-            return 0.0
-        
-        intersection = (xi2 - xi1) * (yi2 - yi1)
-        
-        # Min area
-        area_a = (x2_a - x1_a) * (y2_a - y1_a)
-        area_b = (x2_b - x1_b) * (y2_b - y1_b)
-        min_area = min(area_a, area_b)
-        
-        if min_area == 0:
-            return 0.0
-        
-        return intersection / min_area
+        seat_index = {name: i for i, name in enumerate(self.seat_coords)}
+        groups = [
+            [seat_index[name] for name in group if name in seat_index]
+            for group in getattr(config, "SEAT_EXCLUSION_GROUPS", [])
+        ]
+        groups = [g for g in groups if len(g) > 1]
+        width = max((len(g) for g in groups), default=0)
+        self._exclusion_idx = np.full((len(groups), width), -1, dtype=np.int64)
+        for row, group in enumerate(groups):
+            self._exclusion_idx[row, :len(group)] = group
 
-    def _apply_nms(self, candidates: List[PlayerSeat]) -> List[PlayerSeat]:
+    def _apply_exclusion_groups(self, confidences: np.ndarray, occupied: np.ndarray) -> np.ndarray:
         """
-        Apply non-maximum suppression to overlapping seat detections.
-        
+        Enforce mutual exclusion: in each group, keep at most 1 occupied seat
+        (the one with highest confidence; first in group order on ties).
+
         Args:
-            candidates: List of PlayerSeat candidates
-        
+            confidences: [..., n_seats] occupancy confidences
+            occupied: [..., n_seats] bool occupancy before exclusion
+
         Returns:
-            Filtered list with overlapping detections suppressed
+            [..., n_seats] bool occupancy after exclusion
         """
-        if len(candidates) <= 1:
-            return candidates
-        
-        # Sort by confidence (descending)
-        sorted_candidates = sorted(candidates, key=lambda x: x.confidence, reverse=True)
-        
-        keep = []
-        suppressed = set()
-        
-        for i, cand_i in enumerate(sorted_candidates):
-            if i in suppressed:
-                continue
-            
-            keep.append(cand_i)
-            
-            # Check for overlaps with remaining candidates
-            box_i = (cand_i.x1, cand_i.y1, cand_i.x2, cand_i.y2)
-            for j in range(i + 1, len(sorted_candidates)):
-                if j in suppressed:
-                    continue
-                
-                cand_j = sorted_candidates[j]
-                box_j = (cand_j.x1, cand_j.y1, cand_j.x2, cand_j.y2)
-                
-                overlap = self._compute_intersection_over_min(box_i, box_j)
-                
-                if overlap > self.nms_overlap_threshold:
-                    suppressed.add(j)
-        
-        return keep
-    
-    def _apply_exclusion_groups(self, occupied: List[PlayerSeat]) -> List[PlayerSeat]:
+        groups = self._exclusion_idx
+        if groups.size == 0:
+            return occupied
+
+        valid = groups >= 0
+        idx = np.where(valid, groups, 0)
+        member_occupied = occupied[..., idx] & valid  # [..., n_groups, width]
+        member_conf = np.where(member_occupied, confidences[..., idx], -np.inf)
+        best = np.argmax(member_conf, axis=-1)[..., None]
+
+        losers = member_occupied & (np.arange(groups.shape[1]) != best)
+        removed = np.zeros(occupied.shape, dtype=bool)
+        # scatter losers back to seat positions (padding slots are never losers)
+        lead, g, k = np.nonzero(losers.reshape((-1,) + groups.shape))
+        removed.reshape(-1, occupied.shape[-1])[lead, groups[g, k]] = True
+        return occupied & ~removed
+
+    def _apply_nms(self, boxes: np.ndarray, confidences: np.ndarray, occupied: np.ndarray) -> np.ndarray:
         """
-        Enforce mutual exclusion: in each group, keep at most 1 occupied seat
-        (the one with highest confidence).
+        Greedy non-maximum suppression of overlapping occupied seats.
+
+        Seats are visited in descending confidence (stable, so ties keep seat
+        order); each kept seat suppresses every later one whose
+        intersection-over-min exceeds nms_overlap_threshold. The overlap matrix
+        is computed in one shot and the greedy pass is vectorized over the
+        leading (table) dimension.
+
+        Args:
+            boxes: [..., n_seats, 4] seat boxes (x1, y1, x2, y2)
+            confidences: [..., n_seats]
+            occupied: [..., n_seats] bool, seats taking part in NMS
+
+        Returns:
+            [..., n_seats] bool, occupied seats that survive NMS
         """
-        if not hasattr(config, "SEAT_EXCLUSION_GROUPS"):
+        n = occupied.shape[-1]
+        if n <= 1:
             return occupied
 
-        by_name = {p.seat_name: p for p in occupied}
-        to_remove = set()
+        lead_shape = occupied.shape[:-1]
+        boxes = boxes.reshape(-1, n, 4)
+        occupied = occupied.reshape(-1, n)
+        confidences = np.broadcast_to(confidences, lead_shape + (n,)).reshape(-1, n)
 
-        for group in config.SEAT_EXCLUSION_GROUPS:
-            present = [by_name[name] for name in group if name in by_name]
-            if len(present) <= 1:
-                continue
+        # Rank occupied seats first, by confidence descending
+        order = np.argsort(np.where(occupied, -confidences, np.inf), axis=1, kind="stable")
+        rows = np.arange(len(order))[:, None]
+        suppresses = self._overlap_mask(boxes)[rows[:, :, None], order[:, :, None], order[:, None, :]]
+
+        alive = occupied[rows, order]
+        # Unoccupied seats are ranked last and never suppress anything
+        n_active = int(occupied.sum(axis=1).max())
+        for k in range(n_active - 1):
+            kept = alive[:, k]
+            alive[:, k + 1:] &= ~(kept[:, None] & suppresses[:, k, k + 1:])
 
-        # keep best
-            best = max(present, key=lambda p: p.confidence)
-            for p in present:
-                if p.seat_name != best.seat_name:
-                    to_remove.add(p.seat_name)
+        keep = np.zeros_like(occupied)
+        keep[rows, order] = alive
+        return keep.reshape(lead_shape + (n,))
 
-        return [p for p in occupied if p.seat_name not in to_remove]
+    def _overlap_mask(self, boxes: np.ndarray) -> np.ndarray:
+        """
+        intersection_over_min(boxes) > nms_overlap_threshold. Seat boxes only
+        change with the table box, so masks are cached per box geometry.
+        """
+        key = (boxes.shape, boxes.tobytes(), self.nms_overlap_threshold)
+        mask = self._overlap_masks.get(key)
+        if mask is None:
+            # YOLO boxes jitter between passes; don't grow forever
+            if len(self._overlap_masks) >= 32:
+                self._overlap_masks.clear()
+            mask = intersection_over_min(boxes) > self.nms_overlap_threshold
+            self._overlap_masks[key] = mask
+        return mask
+
+    def resolve_occupied(self, boxes: np.ndarray, confidences: np.ndarray, occupied: np.ndarray) -> np.ndarray:
+        """
+        Exclusion groups followed by NMS, for one table ([n_seats] inputs) or
+        many tables at once ([n_tables, n_seats] inputs, boxes [..., n_seats, 4]).
+
+        Returns:
+            bool mask of occupied seats that are kept
+        """
+        occupied = self._apply_exclusion_groups(confidences, occupied)
+        return self._apply_nms(boxes, confidences, occupied)
 
-    def detect(self, frame: np.ndarray, table_box) -> List[PlayerSeat]:
+    def detect(self, frame: np.ndarray, table_box, layout: Optional[TableLayout] = None) -> List[PlayerSeat]:
         """
         Detect players at all seat positions using dual-threshold method + NMS.
         
         Args:
             frame: Input frame (BGR image)
             table_box: TableBox object defining table boundaries
+            layout: Compiled ROI geometry for table_box (must use this detector's
+                    seat coords); looked up from self.layouts when omitted
             
         Returns:
             List of PlayerSeat objects with occupancy status (NMS-filtered)
         """
-        candidates = []
-        
-        for seat_idx, (seat_name, seat_data) in enumerate(self.seat_coords.items()):
-            # Extract occupancy coordinates from nested dictionary
-            if isinstance(seat_data, dict):
-                x_pct, y_pct, w_pct, h_pct = seat_data["occupancy"]
-            else:
-                x_pct, y_pct, w_pct, h_pct = seat_data
-            # Get pixel coordinates from relative coordinates
-            x1, y1, x2, y2 = table_box.roi_from_rel(x_pct, y_pct, w_pct, h_pct)
-            
-            # Clip to frame boundaries
-            x1 = max(0, min(x1, frame.shape[1]))
-            x2 = max(0, min(x2, frame.shape[1]))
-            y1 = max(0, min(y1, frame.shape[0]))
-            y2 = max(0, min(y2, frame.shape[0]))
-            
-            # Extract ROI
-            roi = frame[y1:y2, x1:x2]
-            roi_gray = self._to_grayscale(roi)
-            
-            # Calculate metrics
-            edge_ratio = self._calculate_edge_ratio(roi_gray)
-            laplacian_var = self._calculate_laplacian_variance(roi_gray)
-            confidence = self._calculate_confidence(edge_ratio, laplacian_var)
-            
-            # Dual-threshold: occupied if BOTH metrics exceed thresholds
-            is_occupied = (edge_ratio > self.edge_ratio_threshold and 
-                          laplacian_var > self.laplacian_var_threshold)
-            
-            # Extract additional ROIs from the seat data dictionary
-            additional_rois = {}
-            if isinstance(seat_data, dict) and is_occupied:
-                for roi_key, roi_coords in seat_data.items():
-                    if roi_key != "occupancy":  # Skip the occupancy key
-                        roi_x1, roi_y1, roi_x2, roi_y2 = table_box.roi_from_rel(
-                            roi_coords[0], roi_coords[1], roi_coords[2], roi_coords[3]
-                        )
-                        # Clip to frame boundaries
-                        roi_x1 = max(0, min(roi_x1, frame.shape[1]))
-                        roi_x2 = max(0, min(roi_x2, frame.shape[1]))
-                        roi_y1 = max(0, min(roi_y1, frame.shape[0]))
-                        roi_y2 = max(0, min(roi_y2, frame.shape[0]))
-                        additional_rois[roi_key] = (roi_x1, roi_y1, roi_x2, roi_y2)
-            
-            player = PlayerSeat(
-                seat_name=seat_name,
-                seat_id=seat_idx,
-                x1=x1,
-                y1=y1,
-                x2=x2,
-                y2=y2,
-                edge_ratio=edge_ratio,
-                laplacian_var=laplacian_var,
-                confidence=confidence,
-                is_occupied=is_occupied,
-                rois=additional_rois
-            )
-            candidates.append(player)
-        
-        # Apply NMS to occupied candidates
-        occupied_candidates = [c for c in candidates if c.is_occupied]
-        occupied_candidates = self._apply_exclusion_groups(occupied_candidates)
-        filtered_occupied = self._apply_nms(occupied_candidates)
-        
-        # Combine filtered occupied with all unoccupied for complete picture
-        unoccupied = [c for c in candidates if not c.is_occupied]
-        result = filtered_occupied + unoccupied
-        
-        # Sort by seat_id for consistent ordering
-        result.sort(key=lambda x: x.seat_id)
-        
-        return result
+        if layout is None:
+            layout = self.layouts.get(table_box, frame.shape)
+        return self.detect_tables(frame, [layout])[0]
+
+    def detect_tables(self, frame: np.ndarray, layouts: List[TableLayout],
+                      table_ids: Optional[List[int]] = None) -> List[List[PlayerSeat]]:
+        """
+        detect() for every table of a frame at once: seats are scored table by
+        table, then exclusion groups and NMS run once over [n_tables, n_seats]
+        arrays instead of once per table.
+
+        Each table gets one "player_detect" observation: its own scoring time
+        plus an equal share of the batched exclusion groups + NMS.
+
+        Args:
+            frame: Input frame (BGR image)
+            layouts: Compiled ROI geometry of each table (this detector's seat coords)
+            table_ids: Table numbers for the per-table metrics (default: position in layouts)
+
+        Returns:
+            One list of PlayerSeat objects per layout, as detect() returns
+        """
+        if not layouts:
+            return []
+
+        # Calculate metrics for all seats of each table at once
+        edge_ratios = np.empty((len(layouts), len(self.seat_coords)), dtype=np.float64)
+        laplacian_vars = np.empty_like(edge_ratios)
+        score_s = []
+        for t, layout in enumerate(layouts):
+            t0 = time.perf_counter()
+            edge_ratios[t], laplacian_vars[t] = self._score_seats(frame, layout.seat_boxes)
+            score_s.append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        confidences = self._calculate_confidence(edge_ratios, laplacian_vars)
+
+        # Dual-threshold: occupied if BOTH metrics exceed thresholds
+        occupied = (edge_ratios > self.edge_ratio_threshold) & (laplacian_vars > self.laplacian_var_threshold)
+
+        # Exclusion groups + NMS for all tables together; suppressed occupied seats are dropped from the result
+        boxes = np.stack([layout.seat_boxes for layout in layouts])
+        kept = self.resolve_occupied(boxes, confidences, occupied)
+        resolve_share_s = (time.perf_counter() - t0) / len(layouts)
+        for t, seconds in enumerate(score_s):
+            METRICS.observe("player_detect", seconds + resolve_share_s,
+                            table=table_ids[t] if table_ids is not None else t)
+
+        results = []
+        for t, layout in enumerate(layouts):
+            result = []
+            for seat_idx, (seat_name, (x1, y1, x2, y2)) in enumerate(zip(layout.seat_names, boxes[t].tolist())):
+                is_occupied = bool(occupied[t, seat_idx])
+                if is_occupied and not kept[t, seat_idx]:
+                    continue
+
+                # Additional ROIs (name, VPIP, stack, bet, pos) for occupied seats
+                additional_rois = dict(layout.seat_rois[seat_idx]) if is_occupied else {}
+
+                player = PlayerSeat(
+                    seat_name=seat_name,
+                    seat_id=seat_idx,
+                    x1=x1,
+                    y1=y1,
+                    x2=x2,
+                    y2=y2,
+                    edge_ratio=float(edge_ratios[t, seat_idx]),
+                    laplacian_var=float(laplacian_vars[t, seat_idx]),
+                    confidence=float(confidences[t, seat_idx]),
+                    is_occupied=is_occupied,
+                    rois=additional_rois
+                )
+                result.append(player)
+
+            # Already in seat_id order
+            results.append(result)
+        return results
+
+    def empty_card_slots(self, crops: List[np.ndarray]) -> np.ndarray:
+        """
+        Flag card ROI crops that show bare felt, using the same edge ratio and
+        Laplacian variance metrics as seat occupancy. Only a slot that is flat by
+        both measures counts as empty; anything textured still goes to the classifier.
+
+        Returns:
+            bool array, True where the slot is empty
+        """
+        empty = np.zeros(len(crops), dtype=bool)
+        for i, crop in enumerate(crops):
+            roi_gray = self._to_grayscale(crop)
+            # Canny first: it is cheaper and already rules out any dealt card
+            if self._calculate_edge_ratio(roi_gray) >= self.empty_slot_edge_ratio:
+                continue
+            empty[i] = self._calculate_laplacian_variance(roi_gray) < self.empty_slot_laplacian_var
+        return empty
 
     def detect_occupied_seats(self, frame: np.ndarray, table_box) -> List[Tuple[str, int]]:
         """
@@ -0,0 +1,254 @@
+"""
+Post-training int8 quantization of TinyCornerNet for CardClassifier's
+"onnx_int8" backend, with an accuracy gate against the fp32 model.
+
+Static mode (default) calibrates activation ranges on the 52 reference cards
+(plus jittered variants) and any captured ROI directories passed with --images;
+dynamic mode only quantizes weights (smaller file, but ConvInteger is much
+slower than fp32 Conv on ORT CPU, so it is only useful for size).
+The source images are split first: a --holdout fraction of the reference
+cards (and of the captured ROIs) is never used for calibration. Rank and suit
+accuracy are measured on those held-out images and their jittered variants for
+both the fp32 and the int8 model; if either drops by more than --max-drop
+percentage points the int8 file is deleted and the script exits non-zero.
+Captured ROIs have no labels, so the fp32 prediction is used as their label.
+
+Besides file size, each model's memory is reported as the resident memory a
+fresh process gains by loading its session and running one batch (Linux).
+
+Run from the repo root:
+    python -m vision.quantize_card_model                      # cardv4
+    python -m vision.quantize_card_model vision/models/tiny_corner_net_best_cardv3.pt --mode dynamic
+    python -m vision.quantize_card_model --images captured_cards/20240101_120000 --max-drop 0.5
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import List, Optional, Tuple
+
+import numpy as np
+import torch
+
+from vision.card_detector import (
+    RANKS, SUITS, CardClassifier, backend_path, export_onnx, load_tiny_corner_net
+)
+from vision.export_card_model import labelled_crops, source_images
+
+
+CARD_MODEL_PATH = "vision/models/tiny_corner_net_best_cardv4.pt"
+
+
+class CropCalibrationReader:
+    """onnxruntime CalibrationDataReader over preprocessed card crops."""
+
+    def __init__(self, batches: List[np.ndarray]):
+        self._batches = iter(batches)
+
+    def get_next(self) -> Optional[dict]:
+        batch = next(self._batches, None)
+        return None if batch is None else {"input": batch}
+
+    def rewind(self):
+        pass
+
+
+def calibration_batches(clf: CardClassifier, crops: List[np.ndarray], batch_size: int = 32) -> List[np.ndarray]:
+    # preprocess_cv2 returns a view of a reused buffer, so copy each batch out
+    return [clf.preprocess_cv2(crops[i:i + batch_size]).numpy().copy()
+            for i in range(0, len(crops), batch_size)]
+
+
+def quantize(weights_path: str, mode: str, calib_crops: List[np.ndarray], per_channel: bool = True) -> str:
+    """Write the int8 model next to the checkpoint and return its path."""
+    import onnx
+    from onnxruntime.quantization import (
+        QuantFormat, QuantType, quantize_dynamic, quantize_static
+    )
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    fp32_path = backend_path(weights_path, "onnx")
+    if not os.path.exists(fp32_path):
+        export_onnx(load_tiny_corner_net(weights_path, "cpu"), fp32_path)
+        print(f"  wrote {fp32_path}")
+
+    int8_path = backend_path(weights_path, "onnx_int8")
+    prep_path = int8_path + ".prep"
+    if mode == "dynamic":
+        # The exporter records shapes for initializers too; drop them, since the
+        # dynamic quantizer transposes Gemm weights and re-runs shape inference
+        model = onnx.load(fp32_path)
+        initializers = {init.name for init in model.graph.initializer}
+        kept = [vi for vi in model.graph.value_info if vi.name not in initializers]
+        del model.graph.value_info[:]
+        model.graph.value_info.extend(kept)
+        onnx.save(model, prep_path)
+        try:
+            quantize_dynamic(prep_path, int8_path, weight_type=QuantType.QInt8, per_channel=per_channel)
+        finally:
+            os.remove(prep_path)
+        return int8_path
+
+    # Shape inference + graph cleanup, so the static quantizer sees every tensor's shape
+    quant_pre_process(fp32_path, prep_path, skip_symbolic_shape=True)
+    try:
+        clf = CardClassifier(weights_path, backend="eager")
+        quantize_static(
+            prep_path, int8_path,
+            CropCalibrationReader(calibration_batches(clf, calib_crops)),
+            quant_format=QuantFormat.QDQ,
+            per_channel=per_channel,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+        )
+    finally:
+        os.remove(prep_path)
+    return int8_path
+
+
+def accuracy(clf: CardClassifier, crops: List[np.ndarray], labels: List[str]) -> dict:
+    preds = clf.predict_corners(crops)
+    rank_ok = [p.label[:-1] == l[:-1] for p, l in zip(preds, labels)]
+    suit_ok = [p.label[-1] == l[-1] for p, l in zip(preds, labels)]
+    return {
+        "rank": 100.0 * np.mean(rank_ok),
+        "suit": 100.0 * np.mean(suit_ok),
+        "card": 100.0 * np.mean([r and s for r, s in zip(rank_ok, suit_ok)]),
+    }
+
+
+def split_sources(sources: List[Tuple[str, Optional[str]]], holdout: float, seed: int = 0):
+    """
+    (calibration, held-out) source images. Reference cards and captured ROIs
+    are split separately, so both sides get some of each.
+    """
+    rng = np.random.default_rng(seed)
+    calib, held_out = [], []
+    for group in ([s for s in sources if s[1] is not None], [s for s in sources if s[1] is None]):
+        n_held = int(round(len(group) * holdout))
+        held = set(rng.permutation(len(group))[:n_held].tolist())
+        calib += [s for i, s in enumerate(group) if i not in held]
+        held_out += [s for i, s in enumerate(group) if i in held]
+    return calib, held_out
+
+
+def model_size_mb(path: str) -> float:
+    """On-disk size including an external-data sidecar (x.onnx.data), if any."""
+    size = os.path.getsize(path)
+    if os.path.exists(path + ".data"):
+        size += os.path.getsize(path + ".data")
+    return size / (1024 * 1024)
+
+
+def _rss_mb() -> Optional[float]:
+    """Current resident set size of this process in MB (Linux /proc; None elsewhere)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+@torch.no_grad()
+def _session_rss(weights_path: str, backend: str, batch: int) -> Tuple[Optional[float], Optional[float]]:
+    import onnxruntime  # noqa: F401  (imported before the baseline so only the session is counted)
+    before = _rss_mb()
+    clf = CardClassifier(weights_path, backend=backend)
+    clf._forward(torch.rand(batch, 3, clf.input_size, clf.input_size))
+    return before, _rss_mb()
+
+
+def session_memory_mb(weights_path: str, backend: str, batch: int) -> Optional[float]:
+    """
+    Resident memory a fresh process gains by creating the backend's ORT
+    session and running one batch (weights, arena, kernels). None where RSS
+    is not available.
+    """
+    with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as pool:
+        before, after = pool.submit(_session_rss, weights_path, backend, batch).result()
+    return None if before is None else after - before
+
+
+@torch.no_grad()
+def forward_p50_ms(clf: CardClassifier, batch: int, iters: int = 100) -> float:
+    x = torch.rand(batch, 3, clf.input_size, clf.input_size)
+    for _ in range(5):
+        clf._forward(x)
+    samples = []
+    for _ in range(iters):
+        t0 = time.perf_counter()
+        clf._forward(x)
+        samples.append(time.perf_counter() - t0)
+    return float(np.median(samples) * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Int8 post-training quantization of the card classifier")
+    parser.add_argument("weights", nargs="?", default=CARD_MODEL_PATH)
+    parser.add_argument("--mode", choices=["static", "dynamic"], default="static")
+    parser.add_argument("--images", action="append", default=[], help="Captured card ROI directory (repeatable)")
+    parser.add_argument("--max-drop", type=float, default=1.0,
+                        help="Max allowed rank or suit accuracy drop vs fp32, in percentage points")
+    parser.add_argument("--holdout", type=float, default=0.3,
+                        help="Fraction of source images kept out of calibration for the accuracy gate")
+    parser.add_argument("--eval-variants", type=int, default=10, help="Jittered variants per held-out image")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--per-tensor", action="store_true", help="Per-tensor instead of per-channel weights")
+    parser.add_argument("--batches", nargs="+", type=int, default=[1, 14, 28])
+    args = parser.parse_args()
+
+    # Calibration never sees the images the gate is measured on
+    calib_sources, eval_sources = split_sources(source_images(args.images), args.holdout, args.seed)
+    calib_crops, _ = labelled_crops(args.images, seed=args.seed, sources=calib_sources)
+    eval_crops, eval_labels = labelled_crops(args.images, seed=args.seed + 1, variants=args.eval_variants,
+                                             sources=eval_sources)
+
+    print(f"{args.weights}: {args.mode} quantization, {len(calib_crops)} calibration crops "
+          f"from {len(calib_sources)} images, {len(eval_sources)} images held out")
+    int8_path = quantize(args.weights, args.mode, calib_crops, per_channel=not args.per_tensor)
+
+    fp32 = CardClassifier(args.weights, backend="onnx")
+    int8 = CardClassifier(args.weights, backend="onnx_int8")
+
+    # Unlabelled captured ROIs are scored against the fp32 prediction
+    fp32_preds = fp32.predict_corners(eval_crops)
+    labels = [l if l is not None else p.label for l, p in zip(eval_labels, fp32_preds)]
+    acc_fp32 = accuracy(fp32, eval_crops, labels)
+    acc_int8 = accuracy(int8, eval_crops, labels)
+    agree = np.mean([a.label == b.label for a, b in zip(fp32_preds, int8.predict_corners(eval_crops))])
+
+    print(f"\naccuracy on {len(eval_crops)} held-out crops ({len(RANKS)} ranks x {len(SUITS)} suits):")
+    print(f"  {'':<6}{'rank':>8}{'suit':>8}{'card':>8}")
+    print(f"  {'fp32':<6}{acc_fp32['rank']:>7.2f}%{acc_fp32['suit']:>7.2f}%{acc_fp32['card']:>7.2f}%")
+    print(f"  {'int8':<6}{acc_int8['rank']:>7.2f}%{acc_int8['suit']:>7.2f}%{acc_int8['card']:>7.2f}%")
+    print(f"  int8 agrees with fp32 on {100 * agree:.2f}% of labels")
+
+    fp32_path = backend_path(args.weights, "onnx")
+    print(f"\nmodel file: fp32 {model_size_mb(fp32_path):.2f} MB -> int8 {model_size_mb(int8_path):.2f} MB")
+    batch = max(args.batches)
+    mem_fp32 = session_memory_mb(args.weights, "onnx", batch)
+    mem_int8 = session_memory_mb(args.weights, "onnx_int8", batch)
+    if mem_fp32 is not None:
+        print(f"session RSS, load + batch {batch}: fp32 {mem_fp32:.1f} MB -> int8 {mem_int8:.1f} MB")
+    print("forward latency p50 (ms):")
+    for batch in args.batches:
+        t_fp32 = forward_p50_ms(fp32, batch)
+        t_int8 = forward_p50_ms(int8, batch)
+        print(f"  batch {batch:>3}: fp32 {t_fp32:7.3f}  int8 {t_int8:7.3f}  ({t_fp32 / t_int8:.2f}x)")
+
+    drop = max(acc_fp32["rank"] - acc_int8["rank"], acc_fp32["suit"] - acc_int8["suit"])
+    if drop > args.max_drop:
+        os.remove(int8_path)
+        print(f"\nFAILED: int8 accuracy dropped {drop:.2f} points (> {args.max_drop}); removed {int8_path}")
+        sys.exit(1)
+    print(f"\nOK: wrote {int8_path} (max accuracy drop {drop:.2f} points)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,77 @@
+import time
+import numpy as np
 from typing import List, Optional
 from ultralytics import YOLO
 from state.table_state import TableBox
 
 
+def box_iou(a: List[TableBox], b: List[TableBox]) -> np.ndarray:
+    """Pairwise intersection over union, [len(a), len(b)]."""
+    if not a or not b:
+        return np.zeros((len(a), len(b)))
+    a = np.array([t.as_xyxy() for t in a], dtype=np.float64)[:, None, :]
+    b = np.array([t.as_xyxy() for t in b], dtype=np.float64)[None, :, :]
+    iw = np.maximum(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0)
+    ih = np.maximum(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0)
+    inter = iw * ih
+    union = ((a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1]) +
+             (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1]) - inter)
+    return np.where(union > 0, inter / np.maximum(union, 1), 0.0)
+
+
 class TableDetector:
     #Test confidence thresholds. Seems very low
-    def __init__(self, model_path: str, conf_thres: float = 0.8, device: str = "cpu"):
+    def __init__(self, model_path: str, conf_thres: float = 0.8, device: str = "cpu",
+                 redetect_every_n_frames: int = 30, redetect_interval_s: float = 2.0,
+                 pixel_diff_threshold: int = 25, changed_fraction_threshold: float = 0.05,
+                 border_offset: int = 3, sample_step: int = 8, grid_step: int = 32,
+                 match_iou: float = 0.5):
+        """
+        Args:
+            redetect_every_n_frames: In track(), force a YOLO pass after this many reused frames.
+            redetect_interval_s: In track(), force a YOLO pass after this many seconds.
+            pixel_diff_threshold: Per-pixel abs diff (0..255) for a sampled pixel to count as changed.
+            changed_fraction_threshold: Fraction of changed samples in any group (one table border,
+                                        or the background) that triggers a YOLO pass.
+            border_offset: Distance in px inside/outside each table edge where border pixels are sampled.
+            sample_step: Spacing in px of border samples along each edge.
+            grid_step: Spacing in px of background samples outside known tables.
+            match_iou: In track(), a re-detected box keeps the id of the previous box it
+                       overlaps by at least this IoU; other boxes get new ids.
+        """
         self.model = YOLO(model_path)
         self.conf_thres = conf_thres
         self.device = device
 
+        self.redetect_every_n_frames = redetect_every_n_frames
+        self.redetect_interval_s = redetect_interval_s
+        self.pixel_diff_threshold = pixel_diff_threshold
+        self.changed_fraction_threshold = changed_fraction_threshold
+        self.border_offset = border_offset
+        self.sample_step = sample_step
+        self.grid_step = grid_step
+        self.match_iou = match_iou
+
+        # Tracking state (set by the last YOLO pass in track())
+        self._tables: Optional[List[TableBox]] = None
+        self._frame_shape = None
+        self._sample_ys = None
+        self._sample_xs = None
+        self._sample_groups = None
+        self._group_counts = None
+        self._reference = None
+        self._frames_since_detect = 0
+        self._last_detect_t = 0.0
+
+        # Persistent table ids, parallel to the boxes of the last YOLO pass
+        # (kept across reset_tracking() so ids survive a forced re-detect)
+        self._id_boxes: List[TableBox] = []
+        self._table_ids: List[int] = []
+        self._next_table_id = 0
+
+        self.yolo_runs = 0
+        self.tracked_frames = 0
+
     def detect(self, frame) -> List[TableBox]:
         """
         Returns all detected poker tables in the frame.
@@ -29,4 +91,126 @@ class TableDetector:
 
         # Optional: sort left-to-right then top-to-bottom (useful when multiple tables)
         tables.sort(key=lambda t: (t.y1, t.x1))
-        return tables
\ No newline at end of file
+        return tables
+
+    def track(self, frame) -> List[TableBox]:
+        """
+        Same result as detect(), but reuses the last TableBox list while the
+        screen layout looks unchanged. YOLO only re-runs when the schedule
+        expires or when pixels around a known table edge (window moved/closed)
+        or in the background (window opened) change.
+
+        Each returned table also has a persistent id (see table_ids): detect()
+        sorts boxes by position, so a list index changes whenever a table above
+        or left of another one opens or closes.
+        """
+        if self._needs_detect(frame):
+            self._tables = self.detect(frame)
+            self._table_ids = self._match_ids(self._tables)
+            self._id_boxes = list(self._tables)
+            self._build_samples(frame, self._tables)
+            self._frames_since_detect = 0
+            self._last_detect_t = time.perf_counter()
+            self.yolo_runs += 1
+        else:
+            self._frames_since_detect += 1
+            self.tracked_frames += 1
+        return list(self._tables)
+
+    @property
+    def table_ids(self) -> List[int]:
+        """Persistent ids of the tables the last track() call returned, in the same order."""
+        return list(self._table_ids)
+
+    def _match_ids(self, tables: List[TableBox]) -> List[int]:
+        """
+        Ids for a fresh detection: greedily pair new and previous boxes by
+        descending IoU (at least match_iou); unpaired boxes get new ids.
+        """
+        iou = box_iou(self._id_boxes, tables)
+        ids = [-1] * len(tables)
+        if iou.size:
+            prev_idx, new_idx = np.nonzero(iou >= self.match_iou)
+            order = np.argsort(-iou[prev_idx, new_idx], kind="stable")
+            used = set()
+            for p, n in zip(prev_idx[order].tolist(), new_idx[order].tolist()):
+                if p not in used and ids[n] < 0:
+                    used.add(p)
+                    ids[n] = self._table_ids[p]
+        for n in range(len(ids)):
+            if ids[n] < 0:
+                ids[n] = self._next_table_id
+                self._next_table_id += 1
+        return ids
+
+    def reset_tracking(self):
+        """Force a YOLO pass on the next track() call."""
+        self._tables = None
+
+    def _needs_detect(self, frame) -> bool:
+        if self._tables is None or frame.shape != self._frame_shape:
+            return True
+        if self._frames_since_detect + 1 >= self.redetect_every_n_frames:
+            return True
+        if time.perf_counter() - self._last_detect_t >= self.redetect_interval_s:
+            return True
+        return self._layout_changed(frame)
+
+    def _build_samples(self, frame, tables: List[TableBox]):
+        """
+        Precompute pixel sample coordinates for the cheap change check:
+        group i < len(tables) is a ring of pixels just inside and outside
+        table i's border, the last group is a sparse grid outside all tables.
+        """
+        h, w = frame.shape[:2]
+        off, step = self.border_offset, self.sample_step
+        ys, xs, groups = [], [], []
+
+        for group_idx, t in enumerate(tables):
+            edge_x = np.arange(t.x1, t.x2, step)
+            edge_y = np.arange(t.y1, t.y2, step)
+            ring_y, ring_x = [], []
+            for d in (-off, off):
+                # top / bottom edges
+                for y in (t.y1 + d, t.y2 - 1 - d):
+                    ring_y.append(np.full_like(edge_x, y))
+                    ring_x.append(edge_x)
+                # left / right edges
+                for x in (t.x1 + d, t.x2 - 1 - d):
+                    ring_y.append(edge_y)
+                    ring_x.append(np.full_like(edge_y, x))
+            ring_y = np.concatenate(ring_y)
+            ys.append(ring_y)
+            xs.append(np.concatenate(ring_x))
+            groups.append(np.full(len(ring_y), group_idx))
+
+        grid_y, grid_x = np.mgrid[self.grid_step // 2:h:self.grid_step, self.grid_step // 2:w:self.grid_step]
+        grid_y, grid_x = grid_y.ravel(), grid_x.ravel()
+        outside = np.ones(grid_y.shape, dtype=bool)
+        for t in tables:
+            outside &= ~((grid_x >= t.x1 - off) & (grid_x < t.x2 + off) &
+                         (grid_y >= t.y1 - off) & (grid_y < t.y2 + off))
+        ys.append(grid_y[outside])
+        xs.append(grid_x[outside])
+        groups.append(np.full(int(outside.sum()), len(tables)))
+
+        ys = np.concatenate(ys)
+        xs = np.concatenate(xs)
+        groups = np.concatenate(groups)
+        valid = (ys >= 0) & (ys < h) & (xs >= 0) & (xs < w)
+
+        self._sample_ys = ys[valid]
+        self._sample_xs = xs[valid]
+        self._sample_groups = groups[valid]
+        self._group_counts = np.maximum(np.bincount(self._sample_groups, minlength=len(tables) + 1), 1)
+        self._reference = frame[self._sample_ys, self._sample_xs].astype(np.int16)
+        self._frame_shape = frame.shape
+
+    def _layout_changed(self, frame) -> bool:
+        samples = frame[self._sample_ys, self._sample_xs].astype(np.int16)
+        diff = np.abs(samples - self._reference)
+        if diff.ndim == 2:
+            diff = diff.max(axis=1)
+        changed = diff > self.pixel_diff_threshold
+        changed_per_group = np.bincount(self._sample_groups, weights=changed, minlength=len(self._group_counts))
+        return bool(np.any(changed_per_group / self._group_counts > self.changed_fraction_threshold))
@@ -0,0 +1,156 @@
+import glob
+import os
+import cv2
+import numpy as np
+from typing import List, Optional, Tuple
+from vision.card_detector import CardPrediction
+
+
+class TemplateCardMatcher:
+    """
+    Classifies card-corner crops by normalized cross-correlation against the 52
+    reference images in vision/models/52cards.
+
+    Every reference is resized once at startup to a small (w, h) thumbnail and
+    stored as a zero-mean, unit-norm vector, together with copies shifted by up
+    to max_shift pixels (edge-replicated) to tolerate ROI misalignment. A batch
+    of crops is matched against the whole bank in a single matrix product; a
+    card's score is its best correlation over all its shifts.
+
+    A match is accepted only when the best score reaches min_score and beats
+    the best *other* card by at least min_margin. Anything else (empty slots,
+    face-down cards, odd scales) is left for the CNN.
+    """
+
+    def __init__(self, templates_dir: str = "vision/models/52cards", size: Tuple[int, int] = (20, 36),
+                 max_shift: int = 1, min_score: float = 0.85, min_margin: float = 0.05):
+        """
+        Args:
+            templates_dir: Directory of <label>.png reference images ("Qh.png").
+            size: (width, height) that templates and crops are resized to.
+            max_shift: Max template shift in pixels (at `size`) in each direction.
+            min_score: Min correlation (-1..1) to accept a match.
+            min_margin: Min gap between the best and second-best card's score.
+        """
+        paths = sorted(glob.glob(os.path.join(templates_dir, "*.png")))
+        if not paths:
+            raise FileNotFoundError(f"No card templates found in {templates_dir}")
+
+        self.size = size
+        self.max_shift = max_shift
+        self.min_score = min_score
+        self.min_margin = min_margin
+        self.labels: List[str] = [os.path.splitext(os.path.basename(p))[0] for p in paths]
+
+        w, h = size
+        s = max_shift
+        refs = np.stack([cv2.resize(cv2.imread(p), size, interpolation=cv2.INTER_AREA) for p in paths])
+        padded = np.stack([cv2.copyMakeBorder(r, s, s, s, s, cv2.BORDER_REPLICATE) for r in refs])
+
+        # Bank row (shift_idx * n_cards + card_idx), so scores reshape to [N, shifts, cards]
+        shifted = [padded[:, dy:dy + h, dx:dx + w] for dy in range(2 * s + 1) for dx in range(2 * s + 1)]
+        self._n_shifts = len(shifted)
+        self._bank_t = np.ascontiguousarray(self._normalize(np.concatenate(shifted)).T)  # [D, shifts*cards]
+
+        self._staging = np.empty((0, h, w, 3), dtype=np.uint8)
+
+    @staticmethod
+    def _normalize(stack: np.ndarray) -> np.ndarray:
+        """[N, ...] -> [N, D] float32 rows with zero mean and unit norm."""
+        x = stack.reshape(len(stack), -1).astype(np.float32)
+        x -= x.mean(axis=1, keepdims=True)
+        x /= np.linalg.norm(x, axis=1, keepdims=True) + 1e-6
+        return x
+
+    def features(self, corners_bgr: List[np.ndarray]) -> np.ndarray:
+        """Resize crops into a reusable staging array and normalize them: [N, D]."""
+        n = len(corners_bgr)
+        if self._staging.shape[0] < n:
+            self._staging = np.empty((n,) + self._staging.shape[1:], dtype=np.uint8)
+        staging = self._staging[:n]
+        for i, corner_bgr in enumerate(corners_bgr):
+            cv2.resize(corner_bgr, self.size, dst=staging[i], interpolation=cv2.INTER_AREA)
+        return self._normalize(staging)
+
+    def match(self, corners_bgr: List[np.ndarray]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns:
+            (card_idx [N], score [N], margin [N]) where card_idx indexes self.labels,
+            score is the best correlation and margin its lead over the runner-up card.
+        """
+        n = len(corners_bgr)
+        scores = self.features(corners_bgr) @ self._bank_t                      # [N, shifts*cards]
+        per_card = scores.reshape(n, self._n_shifts, -1).max(axis=1)           # [N, cards]
+        top2 = np.partition(per_card, -2, axis=1)[:, -2:]
+        card_idx = per_card.argmax(axis=1)
+        return card_idx, top2[:, 1], top2[:, 1] - top2[:, 0]
+
+    def predict_corners(self, corners_bgr: List[np.ndarray]) -> List[Optional[CardPrediction]]:
+        """
+        Confident matches as CardPrediction (all confidences set to the match
+        score), None for crops that need the CNN. Order matches input.
+        """
+        if len(corners_bgr) == 0:
+            return []
+
+        card_idx, score, margin = self.match(corners_bgr)
+        accepted = (score >= self.min_score) & (margin >= self.min_margin)
+
+        predictions = []
+        for idx, conf, ok in zip(card_idx.tolist(), score.tolist(), accepted.tolist()):
+            predictions.append(
+                CardPrediction(label=self.labels[idx], rank_conf=conf, suit_conf=conf, card_conf=conf)
+                if ok else None
+            )
+        return predictions
+
+
+class CascadeCardClassifier:
+    """
+    Template matching first, CardClassifier only for the crops the matcher is
+    not confident about (batched into one forward pass). Drop-in replacement
+    for CardClassifier.predict_corners / predict_corner.
+    """
+
+    def __init__(self, matcher: TemplateCardMatcher, classifier):
+        self.matcher = matcher
+        self.classifier = classifier
+
+        self.template_hits = 0
+        self.fallbacks = 0
+
+    def predict_corner(self, corner_bgr: np.ndarray) -> CardPrediction:
+        return self.predict_corners([corner_bgr])[0]
+
+    def predict_corners(self, corners_bgr: List[np.ndarray]) -> List[CardPrediction]:
+        predictions = self.matcher.predict_corners(corners_bgr)
+
+        fallback_idx = [i for i, p in enumerate(predictions) if p is None]
+        if fallback_idx:
+            fallback = self.classifier.predict_corners([corners_bgr[i] for i in fallback_idx])
+            for i, p in zip(fallback_idx, fallback):
+                predictions[i] = p
+
+        self.fallbacks += len(fallback_idx)
+        self.template_hits += len(predictions) - len(fallback_idx)
+        return predictions
+
+    @property
+    def template_rate(self) -> float:
+        total = self.template_hits + self.fallbacks
+        return self.template_hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "template_hits": self.template_hits,
+            "fallbacks": self.fallbacks,
+            "template_rate": self.template_rate,
+        }
+
+    def reset_stats(self):
+        self.template_hits = 0
+        self.fallbacks = 0
+
+    def summary(self) -> str:
+        return (f"Card templates: {self.template_rate * 100:.1f}% matched, "
+                f"{self.fallbacks} crops sent to the CNN")